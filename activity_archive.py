@@ -0,0 +1,225 @@
+"""Rotation of old Activities rows into an attached archive database.
+
+Rows older than the retention window are copied to
+ArchivedActivities in <database>-archive.db (with the username at the
+time of archiving) and deleted from the live table, one chunk per
+transaction so the write lock is only ever held briefly.
+
+    python activity_archive.py --days 90 --chunk-size 5000
+"""
+import argparse
+import os
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+
+import db as database
+from db import db_connection
+
+RETENTION_DAYS = 90
+CHUNK_SIZE = 5000
+ARCHIVE_ALIAS = 'archive'
+ARCHIVE_VERSION = 1  # PRAGMA user_version of an archive with the current schema and timestamp format
+
+
+def archive_path():
+    """Archive file kept next to the live database."""
+    return os.path.splitext(database.get_pool().path)[0] + '-archive.db'
+
+
+def _is_attached(conn):
+    return any(row[1] == ARCHIVE_ALIAS for row in conn.execute('PRAGMA database_list'))
+
+
+def _prepare_archive(conn):
+    """Create the archive table if needed and store its timestamps in CURRENT_TIMESTAMP text format."""
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_ALIAS}.ArchivedActivities (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            username TEXT,
+            activity TEXT NOT NULL,
+            timestamp DATETIME NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_ALIAS}.idx_archived_timestamp
+        ON ArchivedActivities(timestamp, id)
+    ''')
+    # Rows archived from ISO 'T' timestamps would sort after every space-separated one
+    conn.execute(f"UPDATE {ARCHIVE_ALIAS}.ArchivedActivities SET timestamp = replace(timestamp, 'T', ' ') "
+                 "WHERE timestamp LIKE '____-__-__T%'")
+    conn.execute(f'PRAGMA {ARCHIVE_ALIAS}.user_version = {ARCHIVE_VERSION}')
+    conn.commit()
+
+
+@contextmanager
+def attached_archive(conn, path=None, create=True):
+    """Attach the archive database to conn for the duration of the block.
+
+    Yields True if the archive is attached, False if it does not exist and
+    create is False. The archive is detached again on the way out, so the
+    pooled connection goes back without it; an archive some outer block
+    attached is left for that block to detach.
+    """
+    path = path or archive_path()
+    if _is_attached(conn):
+        yield True
+        return
+    if not create and not os.path.exists(path):
+        yield False
+        return
+    conn.execute(f'ATTACH DATABASE ? AS {ARCHIVE_ALIAS}', (path,))
+    try:
+        if conn.execute(f'PRAGMA {ARCHIVE_ALIAS}.user_version').fetchone()[0] < ARCHIVE_VERSION:
+            _prepare_archive(conn)
+        yield True
+    finally:
+        if conn.in_transaction:
+            conn.rollback()  # DETACH is refused inside a transaction
+        conn.execute(f'DETACH DATABASE {ARCHIVE_ALIAS}')
+
+
+def rotate_activities(older_than_days=RETENTION_DAYS, chunk_size=CHUNK_SIZE, pause=0.01, progress=None):
+    """Move activities older than the retention window into the archive.
+
+    Each chunk is copied and deleted in its own short transaction, with
+    `pause` seconds between chunks so other writers can get in. Returns the
+    number of rows moved.
+    """
+    cutoff = database.timestamp_text(datetime.now(timezone.utc) - timedelta(days=older_than_days))
+    database.flush_activities()
+    moved = 0
+    try:
+        with db_connection() as conn, attached_archive(conn):
+            while True:
+                conn.execute('BEGIN IMMEDIATE')
+                # Last (timestamp, id) of this chunk, in index order
+                boundary = conn.execute('''
+                    SELECT CAST(timestamp AS TEXT), id FROM Activities
+                    WHERE timestamp < ?
+                    ORDER BY timestamp, id
+                    LIMIT 1 OFFSET ?
+                ''', (cutoff, chunk_size - 1)).fetchone()
+                if boundary:
+                    where, params = 'a.timestamp < ? AND (a.timestamp, a.id) <= (?, ?)', (cutoff, *boundary)
+                else:
+                    where, params = 'a.timestamp < ?', (cutoff,)
+
+                conn.execute(f'''
+                    INSERT OR IGNORE INTO {ARCHIVE_ALIAS}.ArchivedActivities
+                        (id, user_id, username, activity, timestamp)
+                    SELECT a.id, a.user_id, u.username, a.activity, a.timestamp
+                    FROM Activities a
+                    LEFT JOIN Users u ON u.id = a.user_id
+                    WHERE {where}
+                ''', params)
+                deleted = conn.execute(f'DELETE FROM Activities AS a WHERE {where}', params).rowcount
+                conn.commit()
+
+                moved += deleted
+                if progress:
+                    progress(moved)
+                if not boundary or deleted == 0:
+                    break
+                time.sleep(pause)
+    except sqlite3.DatabaseError as e:
+        print(f"Error rotating activities: {e}")
+    return moved
+
+
+def iter_activity_range(start=None, end=None, user_id=None, username=None, text=None, action=None,
+                        batch_size=database.FETCH_BATCH_SIZE):
+    """Yield activities between start and end, newest first, from live and archived rows.
+
+    The archive is only read when the range reaches back past the oldest
+    live activity. username, text and action filter like the same
+    get_activity_feed() arguments; archived rows match username against
+    the name they were archived with. Rows look like view_activities()
+    rows, with the username in 'user_id'; it is None for live activities
+    of deleted users, while archived rows keep the username they had when
+    they were archived.
+    """
+    if action is not None and action not in database.ACTIVITY_ACTIONS:
+        print(f"Unknown activity action: {action}")
+        return
+    database.flush_activities()
+    start, end = database.timestamp_bound(start), database.timestamp_bound(end)
+    filters = dict(start=start, end=end, user_id=user_id, username=username, text=text, action=action)
+    live_where, live_params = database.activity_filters(**filters)
+    archive_where, archive_params = database.activity_filters(**filters, archived=True)
+    live_where.insert(0, '1')
+    archive_where.insert(0, '1')
+    with db_connection() as conn:
+        oldest_live = database.oldest_live_activity(conn)
+        reaches_archive = not start or oldest_live is None or start < oldest_live
+
+        # LEFT JOIN, like the archive half, so activities of deleted users are kept
+        sql = f'''
+            SELECT a.id, u.username AS user_id, a.activity, a.timestamp
+            FROM Activities a
+            LEFT JOIN Users u ON a.user_id = u.id
+            WHERE {' AND '.join(live_where)}
+        '''
+        params = list(live_params)
+        with attached_archive(conn, create=False) if reaches_archive else nullcontext(False) as span_archive:
+            if span_archive:
+                # Skip rows an interrupted rotation left in both places
+                sql += f'''
+                UNION ALL
+                SELECT a.id, a.username AS user_id, a.activity, a.timestamp
+                FROM {ARCHIVE_ALIAS}.ArchivedActivities a
+                WHERE {' AND '.join(archive_where)}
+                  AND NOT EXISTS (SELECT 1 FROM main.Activities l WHERE l.id = a.id)
+                '''
+                params += archive_params
+                sql += ' ORDER BY timestamp DESC, id DESC'
+            else:
+                sql += ' ORDER BY a.timestamp DESC, a.id DESC'
+
+            cursor = conn.execute(sql, params)
+            try:
+                columns = [column[0] for column in cursor.description]
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(zip(columns, row))
+            finally:
+                cursor.close()  # The archive cannot be detached while the query is open
+
+
+def query_activities(start=None, end=None, user_id=None, limit=None):
+    """Return activities in a date range as a list, spanning the archive when needed."""
+    rows = []
+    try:
+        for row in iter_activity_range(start, end, user_id):
+            rows.append(row)
+            if limit is not None and len(rows) >= limit:
+                break
+    except sqlite3.DatabaseError as e:
+        print(f"Error querying activities: {e}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old activities into the archive database.")
+    parser.add_argument('--days', type=int, default=RETENTION_DAYS, help="keep this many days live")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.db != database.DB_PATH:
+        database.configure_pool(path=args.db)
+
+    started = time.perf_counter()
+    moved = rotate_activities(args.days, args.chunk_size,
+                              progress=lambda n: print(f"\r{n} activities archived", end='', flush=True))
+    print(f"\nArchived {moved} activities older than {args.days} days "
+          f"to {archive_path()} in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Command-line administration for safety.db, for scripts and cron jobs.
+
+    python admin_cli.py users import accounts.csv
+    python admin_cli.py users export --format csv --output users.csv
+    python admin_cli.py tips import pack.jsonl more.csv
+    python admin_cli.py tips export --search flood
+    python admin_cli.py activities query --since 2024-01-01 --until 2024-04-01 --user alice --action login
+
+Imports commit one transaction per --chunk-size records. Exports and
+queries stream JSONL (default) or CSV through export.py to stdout or
+--output, so large results never have to fit in memory. Progress and
+summaries go to stderr.
+
+User records need a username and either a password, which is hashed
+with the configured hasher, or a password_hash in a format passwords.py
+can verify. is_admin is optional. Exports never include password
+hashes.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import db as database
+import export
+import passwords
+from db import db_connection
+from tip_import import read_tips as read_records, import_files, print_progress, CHUNK_SIZE
+
+TRUE_WORDS = {'1', 'true', 'yes', 'y', 't'}
+
+
+def _password_hash(record):
+    """Hash the record's password, or check its password_hash; None if it has neither."""
+    password = record.get('password')
+    if password:
+        return passwords.hash_password(password)
+    encoded = (record.get('password_hash') or '').strip()
+    return encoded if encoded and passwords.is_valid_hash(encoded) else None
+
+
+def import_users(records, chunk_size=CHUNK_SIZE, progress=None):
+    """Insert an iterable of user dicts, skipping usernames that already exist.
+
+    Passwords in each chunk are hashed in parallel before the chunk's
+    transaction starts, so the write lock is never held across the KDF.
+    Returns stats like tip_import.import_tips: read, inserted, duplicates,
+    invalid, seconds and rows_per_sec, plus 'error' if the import stopped
+    on a database error.
+    """
+    stats = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+    started = time.perf_counter()
+
+    def chunks():
+        chunk = []
+        for record in records:
+            stats['read'] += 1
+            if not isinstance(record, dict):
+                stats['invalid'] += 1
+                continue
+            chunk.append(record)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    try:
+        with ThreadPoolExecutor(passwords.VERIFY_WORKERS, thread_name_prefix='password-hash') as hashers:
+            for chunk in chunks():
+                hashes = list(hashers.map(_password_hash, chunk))
+                rows = []
+                for record, password_hash in zip(chunk, hashes):
+                    username = (record.get('username') or '').strip()
+                    if not username or not password_hash:
+                        stats['invalid'] += 1
+                        continue
+                    is_admin = str(record.get('is_admin') or '').strip().lower() in TRUE_WORDS
+                    rows.append((username, password_hash, is_admin))
+                with db_connection() as conn:
+                    cursor = conn.executemany('''
+                        INSERT INTO Users (username, password, is_admin)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (username) DO NOTHING
+                    ''', rows)
+                    conn.commit()
+                stats['inserted'] += cursor.rowcount
+                stats['duplicates'] += len(rows) - cursor.rowcount
+                stats['seconds'] = time.perf_counter() - started
+                stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+                if progress:
+                    progress(stats)
+    except sqlite3.DatabaseError as e:
+        print(f"Error importing users: {e}")
+        stats['error'] = str(e)
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def _import_status(stats):
+    """Exit status for an import: 2 if it stopped on an error, 1 if rows were invalid."""
+    if 'error' in stats:
+        print(f"Import stopped early: {stats['error']}", file=sys.stderr)
+        return 2
+    return 0 if stats['invalid'] == 0 else 1
+
+
+def users_import(args):
+    def users():
+        for path in args.files:
+            yield from read_records(path, args.format)
+    stats = import_users(users(), args.chunk_size, print_progress)
+    print(file=sys.stderr)
+    print(f"Imported {stats['inserted']} users ({stats['duplicates']} duplicates, {stats['invalid']} invalid) "
+          f"in {stats['seconds']:.2f}s, {stats['rows_per_sec']:.0f} rows/sec", file=sys.stderr)
+    return _import_status(stats)
+
+
+def users_export(args):
+    stats = export.export_users(args.output, args.format, limit=args.limit)
+    print(f"Exported {stats['rows']} users ({stats['rows_per_sec']:.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+def tips_import(args):
+    stats = import_files(args.files, args.format, args.chunk_size, print_progress)
+    print(file=sys.stderr)
+    print(f"Imported {stats['inserted']} tips ({stats['duplicates']} duplicates, {stats['invalid']} invalid) "
+          f"in {stats['seconds']:.2f}s, {stats['rows_per_sec']:.0f} rows/sec", file=sys.stderr)
+    return _import_status(stats)
+
+
+def tips_export(args):
+    stats = export.export_tips(args.output, args.format, search_query=args.search, limit=args.limit)
+    print(f"Exported {stats['rows']} tips ({stats['rows_per_sec']:.0f} rows/sec)", file=sys.stderr)
+    return 0
+
+
+def activities_query(args):
+    # Through the archive too, so a range past the rotation cutoff is complete
+    filters = {'username': args.user, 'user_id': args.user_id, 'start': args.since, 'end': args.until,
+               'text': args.text, 'action': args.action}
+    stats = export.export_activities(args.output, args.format, limit=args.limit,
+                                     batch_size=args.chunk_size, **filters)
+    print(f"Found {stats['rows']} activities", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Bulk administration for the Safety Tips database.")
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="records per transaction or page")
+    subjects = parser.add_subparsers(dest='subject', required=True)
+
+    def add_import(commands, func, what):
+        command = commands.add_parser('import', help=f"add {what} from JSONL, JSON or CSV files")
+        command.add_argument('files', nargs='+')
+        command.add_argument('--format', choices=['jsonl', 'json', 'csv'], help="override detection by file extension")
+        command.set_defaults(func=func)
+
+    def add_output_options(command):
+        command.add_argument('--format', choices=export.FORMATS, help="default: from --output's extension, else jsonl")
+        command.add_argument('--output', '-o', help="write here instead of stdout; .gz to compress")
+        command.add_argument('--limit', type=int, help="stop after this many records")
+
+    users = subjects.add_parser('users', help="user accounts").add_subparsers(dest='command', required=True)
+    add_import(users, users_import, "users")
+    command = users.add_parser('export', help="write every user, newest first")
+    add_output_options(command)
+    command.set_defaults(func=users_export)
+
+    tips = subjects.add_parser('tips', help="safety tips").add_subparsers(dest='command', required=True)
+    add_import(tips, tips_import, "tips")
+    command = tips.add_parser('export', help="write tips, newest first or best match first")
+    command.add_argument('--search', help="only tips matching this search")
+    add_output_options(command)
+    command.set_defaults(func=tips_export)
+
+    activities = subjects.add_parser('activities', help="activity log").add_subparsers(dest='command', required=True)
+    command = activities.add_parser('query', help="write matching activities, newest first, archived ones included")
+    command.add_argument('--since', type=datetime.fromisoformat, help="inclusive, e.g. 2024-01-31")
+    command.add_argument('--until', type=datetime.fromisoformat, help="exclusive")
+    command.add_argument('--user', help="username")
+    command.add_argument('--user-id', type=int)
+    command.add_argument('--action', choices=list(database.ACTIVITY_ACTIONS))
+    command.add_argument('--text', help="text anywhere in the message")
+    add_output_options(command)
+    command.set_defaults(func=activities_query)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db != database.DB_PATH:
+        database.configure_pool(path=args.db)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # Output piped into head and friends: stop quietly, without a traceback at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    finally:
+        database.close_pool()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
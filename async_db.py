@@ -0,0 +1,119 @@
+"""asyncio front end for db.py.
+
+Reads run on a small thread pool, each worker thread holding its own
+pooled connection; writes go through a single writer thread so they are
+serialized. Every call takes an optional `timeout`. When a call times out
+or its task is cancelled, the statement it is running is interrupted with
+sqlite3's interrupt(), and a call that has not started yet is skipped.
+authenticate_user verifies on the read pool and sends the occasional
+hash upgrade through the writer thread.
+
+    tips = await async_db.get_tips_page(limit=20)
+    await async_db.log_activity(user_id, "User logged in")
+"""
+import asyncio
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+
+import db as database
+from passwords import needs_rehash
+
+READ_WORKERS = 4
+DEFAULT_TIMEOUT = 30.0
+
+READ_FUNCTIONS = [
+    'verify_user', 'get_tips', 'search_tips', 'get_tips_page', 'get_tip_by_id',
+    'get_tips_by_ids', 'tip_exists', 'get_user_by_id', 'get_users_by_ids', 'view_users', 'view_users_page',
+    'view_activities', 'view_activities_page', 'get_activity_feed', 'tips_generation',
+    'fetch_tips_page', 'fetch_tip',
+]
+WRITE_FUNCTIONS = [
+    'add_tip', 'update_tip', 'remove_tip', 'add_user', 'update_user', 'remove_user',
+    'log_activity', 'rehash_password',
+]
+
+
+class AsyncDB:
+    """Run db.py functions from coroutines without blocking the event loop."""
+
+    def __init__(self, read_workers=READ_WORKERS, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._readers = ThreadPoolExecutor(read_workers, thread_name_prefix='db-read')
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix='db-write')
+
+    async def run(self, func, *args, write=False, timeout=None, **kwargs):
+        """Await func(*args, **kwargs) on the read pool, or the writer thread if write=True."""
+        loop = asyncio.get_running_loop()
+        job = database.CancellableCall(func, args, kwargs)
+        future = loop.run_in_executor(self._writer if write else self._readers, job)
+        try:
+            return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            job.cancel()
+            raise
+
+    async def authenticate_user(self, username, password, timeout=None):
+        """Verify on the read pool; an outdated hash is upgraded on the writer thread."""
+        user = await self.verify_user(username, password, timeout=timeout)
+        if user and needs_rehash(user['password']):
+            await self.rehash_password(user['id'], user['password'], password, timeout=timeout)
+        return user
+
+    def close(self, wait=True):
+        """Stop the worker threads, finishing queued calls if wait is True."""
+        self._readers.shutdown(wait=wait, cancel_futures=not wait)
+        self._writer.shutdown(wait=wait, cancel_futures=not wait)
+
+
+def _make_method(name, write):
+    func = getattr(database, name)
+
+    @functools.wraps(func)
+    async def method(self, *args, timeout=None, **kwargs):
+        return await self.run(func, *args, write=write, timeout=timeout, **kwargs)
+    return method
+
+
+for _name in READ_FUNCTIONS:
+    setattr(AsyncDB, _name, _make_method(_name, write=False))
+for _name in WRITE_FUNCTIONS:
+    setattr(AsyncDB, _name, _make_method(_name, write=True))
+
+_default = None
+
+
+def get_async_db():
+    """Return the shared AsyncDB used by the module-level functions."""
+    global _default
+    if _default is None:
+        _default = AsyncDB()
+    return _default
+
+
+def configure(**options):
+    """Replace the shared AsyncDB, e.g. configure(read_workers=8, timeout=5.0)."""
+    global _default
+    old, _default = _default, AsyncDB(**options)
+    if old is not None:
+        old.close()
+    return _default
+
+
+def close():
+    """Shut down the shared AsyncDB."""
+    global _default
+    if _default is not None:
+        _default.close()
+        _default = None
+
+
+def _make_function(name):
+    @functools.wraps(getattr(database, name))
+    async def function(*args, **kwargs):
+        return await getattr(get_async_db(), name)(*args, **kwargs)
+    return function
+
+
+for _name in READ_FUNCTIONS + WRITE_FUNCTIONS + ['authenticate_user']:
+    globals()[_name] = _make_function(_name)
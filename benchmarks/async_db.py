@@ -0,0 +1,79 @@
+"""Hundreds of concurrent coroutines against one safety.db through async_db.
+
+Run from the project root:
+
+    python -m benchmarks.async_db --coroutines 500 --ops 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import async_db
+import db
+
+from benchmarks.pragma_profiles import seed
+
+
+async def client(ops, admin_id, latencies, errors, timeout):
+    rng = random.Random()
+    for _ in range(ops):
+        roll = rng.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.5:
+                await async_db.get_tips_page(limit=20, timeout=timeout)
+            elif roll < 0.7:
+                await async_db.get_tips(search_query=rng.choice(['fire', 'tip 1', 'safety']), timeout=timeout)
+            elif roll < 0.8:
+                await async_db.view_activities_page(limit=20, timeout=timeout)
+            elif roll < 0.95:
+                await async_db.log_activity(admin_id, "Benchmark write", timeout=timeout)
+            else:
+                await async_db.add_tip(f"Async tip {rng.random()}", "Written by the async benchmark.",
+                                       timeout=timeout)
+        except asyncio.TimeoutError:
+            errors['timeouts'] += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+async def run(coroutines, ops, timeout):
+    admin_id = db.authenticate_user('ADMIN', '#sbm@86140764')['id']
+    latencies, errors = [], {'timeouts': 0}
+    started = time.perf_counter()
+    await asyncio.gather(*(client(ops, admin_id, latencies, errors, timeout) for _ in range(coroutines)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--coroutines', type=int, default=500)
+    parser.add_argument('--ops', type=int, default=20, help="operations per coroutine")
+    parser.add_argument('--workers', type=int, default=async_db.READ_WORKERS)
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--tips', type=int, default=2000)
+    parser.add_argument('--profile', default='fast', choices=list(db.PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure_pool(path=os.path.join(tmp, 'bench.db'), profile=args.profile, max_size=args.workers + 2)
+        seed(args.tips)
+        async_db.configure(read_workers=args.workers)
+        latencies, errors, elapsed = asyncio.run(run(args.coroutines, args.ops, args.timeout))
+        async_db.close()
+        db.close_pool()
+
+    latencies.sort()
+    print(f"{len(latencies)} calls from {args.coroutines} coroutines in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} calls/sec), {errors['timeouts']} timeouts")
+    print(f"p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Login throughput and latency for each password hasher cost setting.
+
+Run from the project root:
+
+    python -m benchmarks.auth --users 50 --logins 400 --threads 8
+    python -m benchmarks.auth --scrypt-n 8192 16384 32768 --pbkdf2-iterations 300000 600000
+
+Every setting gets a fresh database. Users are created with that setting,
+then --threads clients log in concurrently through db.authenticate_user,
+the way the Tk app's background worker does.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+import passwords
+
+
+def run_setting(hasher, users, logins, threads, workers, tmp):
+    passwords.configure(hasher, verify_workers=workers)
+    db.configure_pool(path=os.path.join(tmp, f'auth-{hasher.algorithm}-{id(hasher)}.db'), max_size=threads + 2)
+    names = [f'bench-user-{i}' for i in range(users)]
+    for name in names:
+        db.add_user(name, f'{name}-password')
+
+    def login(name):
+        started = time.perf_counter()
+        user = db.authenticate_user(name, f'{name}-password')
+        elapsed = time.perf_counter() - started
+        if user is None:
+            raise RuntimeError(f"Login failed for {name}")
+        return elapsed
+
+    rng = random.Random(1)
+    attempts = [rng.choice(names) for _ in range(logins)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = sorted(pool.map(login, attempts))
+    elapsed = time.perf_counter() - started
+    db.close_pool()
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8, help="concurrent login callers")
+    parser.add_argument('--workers', type=int, default=passwords.VERIFY_WORKERS, help="password verify pool size")
+    parser.add_argument('--scrypt-n', type=int, nargs='*', default=[2 ** 13, 2 ** 14, 2 ** 15])
+    parser.add_argument('--pbkdf2-iterations', type=int, nargs='*', default=[300000, 600000])
+    args = parser.parse_args()
+
+    hashers = [passwords.ScryptHasher(n=n) for n in args.scrypt_n]
+    hashers += [passwords.Pbkdf2Hasher(iterations=i) for i in args.pbkdf2_iterations]
+    print(f"{args.logins} logins, {args.threads} callers, {args.workers} verify workers")
+    with tempfile.TemporaryDirectory() as tmp:
+        for hasher in hashers:
+            latencies, elapsed = run_setting(hasher, args.users, args.logins, args.threads, args.workers, tmp)
+            print(f"{hasher!r:40} {len(latencies) / elapsed:8.1f} logins/sec  "
+                  f"p50 {statistics.median(latencies) * 1000:7.1f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
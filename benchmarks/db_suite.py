@@ -0,0 +1,237 @@
+"""Latency, throughput and memory of db.py operations as the database grows.
+
+Run from the project root:
+
+    python -m benchmarks.db_suite --rows 1000 10000 100000 --output run.json
+    python -m benchmarks.db_suite --rows 1000 10000 --baseline run.json --threshold 0.2
+    python -m benchmarks.db_suite --rows 10000000 --data-dir bench-data --operations get_tips_page log_activity
+
+For each size a database with that many tips and activities is seeded
+with synthetic_data (and kept in --data-dir for later runs, if given). Every operation is then
+measured in its own process against that database: --warmup untimed
+calls, then --repeat timed ones. Results are written as JSON with
+p50/p95/p99 latency, throughput and the process's peak RSS. With
+--baseline, any operation whose p95 got more than --threshold slower
+(or whose throughput dropped by as much) is reported, and the exit
+status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import db
+import synthetic_data
+
+PASSWORD = synthetic_data.DEFAULT_PASSWORD
+SEARCH_TERMS = ['fire', 'flood safety', 'earthquake', 'evacuation route', 'water']
+SEED_END = datetime(2025, 1, 1)  # Fixed so a seed always builds the same database
+# Part of the --data-dir file name: bump it whenever seeding writes different rows, so
+# databases kept from earlier runs are rebuilt. Version 1 stored ISO 'T' timestamps
+# that sorted apart from CURRENT_TIMESTAMP's 'YYYY-MM-DD HH:MM:SS' rows; version 3
+# derives the password salt from the seed.
+SEED_VERSION = 3
+USER_SAMPLE = 1000
+
+
+def seed(path, rows, seed_value):
+    """Create a database at path with `rows` tips and activities and rows // 100 users."""
+    db.configure_pool(path=path, profile='fast')
+    synthetic_data.generate(users=max(10, rows // 100), tips=rows, activities=rows, seed=seed_value,
+                            end=SEED_END, password=PASSWORD)
+    db.close_pool()
+
+
+def database_for(rows, seed_value, data_dir):
+    """Path of a seeded database for this size, creating it unless data_dir already has one."""
+    import migrations
+    name = f'bench-{rows}-seed{seed_value}-v{migrations.LATEST_VERSION}-s{SEED_VERSION}.db'
+    path = os.path.join(data_dir, name)
+    if not os.path.exists(path):
+        started = time.perf_counter()
+        seed(path + '.partial', rows, seed_value)
+        os.replace(path + '.partial', path)
+        print(f"Seeded {rows} rows in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return path
+
+
+# name -> (make_call(rng, users) returning a zero-argument callable, full scan?),
+# where users is a sample of (id, username) pairs from the database.
+# Full scans return every row, so they are skipped above --full-scan-limit.
+OPERATIONS = {
+    'get_tips': (lambda rng, users: db.get_tips, True),
+    'get_tips_search': (lambda rng, users: lambda: db.get_tips(rng.choice(SEARCH_TERMS)), True),
+    'get_tips_page': (lambda rng, users: db.get_tips_page, False),
+    'get_tips_page_search': (lambda rng, users: lambda: db.get_tips_page(search_query=rng.choice(SEARCH_TERMS)),
+                             False),
+    'authenticate_user': (lambda rng, users: lambda: db.authenticate_user(rng.choice(users)[1], PASSWORD),
+                          False),
+    'view_users': (lambda rng, users: db.view_users, True),
+    'view_users_page': (lambda rng, users: db.view_users_page, False),
+    'view_activities': (lambda rng, users: db.view_activities, True),
+    'view_activities_page': (lambda rng, users: db.view_activities_page, False),
+    'get_activity_feed': (lambda rng, users: lambda: db.get_activity_feed(user_id=rng.choice(users)[0]), False),
+    # Writes run last so they do not change what the reads see
+    'log_activity': (lambda rng, users: lambda: db.log_activity(rng.choice(users)[0], 'Benchmark write'), False),
+}
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    return ordered[max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))]
+
+
+def peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak  # macOS reports bytes
+
+
+def measure(path, operation, repeat, warmup, seed_value, tip_cache):
+    """Time one operation against path; runs in a fresh process so peak RSS is its own."""
+    db.configure_pool(path=path)
+    db.configure_tip_cache(enabled=tip_cache)
+    with db.db_connection() as conn:
+        users = conn.execute("SELECT id, username FROM Users WHERE username != 'ADMIN' ORDER BY id LIMIT ?",
+                             (USER_SAMPLE,)).fetchall()
+    rng = random.Random(seed_value)
+    call = OPERATIONS[operation][0](rng, users)
+    for _ in range(warmup):
+        call()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    db.close_pool()
+
+    latencies.sort()
+    return {
+        'operation': operation,
+        'iterations': repeat,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(elapsed / repeat * 1000, 3),
+        'ops_per_sec': round(repeat / elapsed, 2),
+        'peak_rss_kb': peak_rss_kb(),
+    }
+
+
+def run(sizes, operations, repeat, warmup, seed_value, data_dir, full_scan_limit, tip_cache):
+    results = []
+    context = get_context('spawn')
+    for rows in sizes:
+        path = database_for(rows, seed_value, data_dir)
+        for operation in operations:
+            if OPERATIONS[operation][1] and rows > full_scan_limit:
+                print(f"{rows:>9} {operation:<22} skipped (full scan above --full-scan-limit)", file=sys.stderr)
+                continue
+            # authenticate_user is KDF-bound; fewer calls give the same picture
+            count = min(repeat, 20) if operation == 'authenticate_user' else repeat
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                result = executor.submit(measure, path, operation, count, warmup, seed_value, tip_cache).result()
+            result = {'rows': rows, **result}
+            results.append(result)
+            print(f"{rows:>9} {operation:<22} p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  "
+                  f"p99 {result['p99_ms']:9.3f} ms  {result['ops_per_sec']:10.1f} ops/s", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms=0.0):
+    """Return a message for each result more than threshold worse than its baseline entry.
+
+    p95 changes smaller than min_delta_ms are ignored as timer noise.
+    """
+    previous = {(entry['rows'], entry['operation']): entry for entry in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['rows'], result['operation']))
+        if old is None:
+            continue
+        slower = result['p95_ms'] - old['p95_ms']
+        if slower > min_delta_ms and result['p95_ms'] > old['p95_ms'] * (1 + threshold):
+            regressions.append(f"{result['operation']} at {result['rows']} rows: "
+                               f"p95 {old['p95_ms']} -> {result['p95_ms']} ms")
+        if slower > min_delta_ms and result['ops_per_sec'] < old['ops_per_sec'] * (1 - threshold):
+            regressions.append(f"{result['operation']} at {result['rows']} rows: "
+                               f"{old['ops_per_sec']} -> {result['ops_per_sec']} ops/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help="database sizes, in tips and activities each")
+    parser.add_argument('--operations', nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument('--repeat', type=int, default=50, help="timed calls per operation")
+    parser.add_argument('--warmup', type=int, default=5, help="untimed calls per operation first")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--data-dir', help="keep seeded databases here and reuse them")
+    parser.add_argument('--full-scan-limit', type=int, default=100000,
+                        help="skip operations that return every row above this size")
+    parser.add_argument('--tip-cache', action='store_true', help="measure with the tip cache on")
+    parser.add_argument('--output', help="write results here instead of stdout")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before flagging")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="ignore p95 changes smaller than this as noise")
+    args = parser.parse_args()
+
+    operations = [name for name in OPERATIONS if name in args.operations]
+    if args.data_dir:
+        os.makedirs(args.data_dir, exist_ok=True)
+        results = run(args.rows, operations, args.repeat, args.warmup, args.seed, args.data_dir,
+                      args.full_scan_limit, args.tip_cache)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run(args.rows, operations, args.repeat, args.warmup, args.seed, tmp,
+                          args.full_scan_limit, args.tip_cache)
+
+    report = {
+        'meta': {
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+            'tip_cache': args.tip_cache,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
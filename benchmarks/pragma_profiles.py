@@ -0,0 +1,87 @@
+"""Concurrent read/write throughput of db.py under each PRAGMA profile.
+
+Run from the project root:
+
+    python -m benchmarks.pragma_profiles --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import db
+
+
+def seed(tip_count):
+    """Fill a fresh database with tips so readers have something to scan."""
+    db.create_tables()
+    with db.db_connection() as conn:
+        conn.executemany(
+            'INSERT INTO Tips (title, content) VALUES (?, ?)',
+            [(f"Tip {i}", f"Safety tip number {i}.") for i in range(tip_count)]
+        )
+        conn.commit()
+
+
+def run_profile(profile, readers, writers, seconds, tip_count):
+    """Return (reads/sec, writes/sec) for one profile against a temporary database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db.configure_pool(path=os.path.join(tmp, 'bench.db'), profile=profile,
+                          max_size=readers + writers)
+        db.configure_tip_cache(enabled=False)  # Otherwise get_tips() measures cache hits, not the profile
+        seed(tip_count)
+        admin_id = db.authenticate_user('ADMIN', '#sbm@86140764')['id']
+
+        counts = {'reads': 0, 'writes': 0}
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def reader():
+            done = 0
+            while not stop.is_set():
+                db.get_tips()
+                db.view_activities_page()  # One page, so reads do not slow down as writers add rows
+                done += 1
+            with lock:
+                counts['reads'] += done
+
+        def writer():
+            done = 0
+            while not stop.is_set():
+                if db.log_activity(admin_id, "Benchmark write"):
+                    done += 1
+            with lock:
+                counts['writes'] += done
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads += [threading.Thread(target=writer) for _ in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        db.close_pool()
+    return counts['reads'] / elapsed, counts['writes'] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tips', type=int, default=200)
+    parser.add_argument('--profiles', nargs='+', default=list(db.PRAGMA_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10}")
+    for profile in args.profiles:
+        reads, writes = run_profile(profile, args.readers, args.writers, args.seconds, args.tips)
+        print(f"{profile:<12} {reads:>10.1f} {writes:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Requests/sec the tip server sustains on one core against a local database.
+
+Run from the project root:
+
+    python -m benchmarks.tip_server --tips 100000 --connections 50 --seconds 5
+
+The server runs in its own process so the load generator does not share
+its core. Clients reuse keep-alive connections and request a mix of tip
+pages, single tips and searches; with --revalidate they send back the
+ETag they got, as a kiosk polling for changes would.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from multiprocessing import get_context
+
+import db
+import synthetic_data
+import tip_server
+
+
+def run_server(path, port_queue):
+    db.configure_pool(path=path, profile='read-heavy')
+    asyncio.run(tip_server.serve('127.0.0.1', 0, ready=lambda address: port_queue.put(address[1])))
+
+
+async def client(port, paths, deadline, revalidate, latencies, counts):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    rng = random.Random()
+    etags = {}
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths)
+        request = f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+        if revalidate and path in etags:
+            request += f'If-None-Match: {etags[path]}\r\n'
+        started = time.perf_counter()
+        writer.write((request + '\r\n').encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n')[1:] if ': ' in line)
+        await reader.readexactly(int(headers.get('Content-Length', 0)))
+        latencies.append(time.perf_counter() - started)
+        status = head.split(b' ', 2)[1].decode()
+        counts[status] = counts.get(status, 0) + 1
+        if 'ETag' in headers:
+            etags[path] = headers['ETag']
+    writer.close()
+
+
+async def load(port, connections, seconds, revalidate, tips):
+    rng = random.Random(1)
+    paths = ['/tips', '/tips?limit=50']
+    paths += [f'/tips/{rng.randint(1, tips)}' for _ in range(50)]
+    paths += [f'/search?q={term}' for term in ('fire', 'flood', 'earthquake', 'evacuation')]
+    latencies, counts = [], {}
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, paths, deadline, revalidate, latencies, counts)
+                           for _ in range(connections)))
+    return latencies, counts, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tips', type=int, default=100000)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--revalidate', action='store_true', help="send If-None-Match with known ETags")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        db.configure_pool(path=path, profile='fast')
+        synthetic_data.generate(users=100, tips=args.tips, activities=0, seed=1)
+        db.close_pool()
+
+        context = get_context('spawn')
+        ports = context.Queue()
+        server = context.Process(target=run_server, args=(path, ports), daemon=True)
+        server.start()
+        try:
+            port = ports.get(timeout=30)
+            latencies, counts, elapsed = asyncio.run(
+                load(port, args.connections, args.seconds, args.revalidate, args.tips))
+        finally:
+            server.terminate()
+            server.join()
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} req/s), statuses {counts}")
+    print(f"p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,10 @@
-import sqlite3
-from datetime import datetime
-
-
-def connect_db():
-    """Connect to the SQLite database and return the connection."""
-    return sqlite3.connect('safety.db')
+from db import create_tables
+from tip_import import import_tips
 
 
 def initialize_database():
     """Initialize the database and create tables if they don't exist."""
-    conn = connect_db()
-    c = conn.cursor()
-    
-    # Create the tips table if it doesn't exist
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS tips (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,
-            content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    create_tables()
 
 
 def add_safety_tips():
@@ -191,27 +172,13 @@ def add_safety_tips():
         {"title": "Alien Invasion Safety", "content": "Stay in a group and trust no one unless they have proven their loyalty."}
     ]
 
-    try:
-        conn = connect_db()
-        c = conn.cursor()
-
-        # Insert the tips into the database
-        c.executemany(
-            'INSERT INTO tips (title, content) VALUES (?, ?)',
-            [(tip['title'], tip['content']) for tip in safety_tips]
-        )
-
-        conn.commit()
-        print(f"{len(safety_tips)} safety tips have been added to the database.")
-
-    except sqlite3.Error as e:
-        print(f"Database error: {e}")
-    finally:
-        if conn:
-            conn.close()
+    # Duplicate tips are skipped, so seeding twice is harmless
+    stats = import_tips(safety_tips)
+    print(f"{stats['inserted']} safety tips have been added to the database "
+          f"({stats['duplicates']} already present).")
 
 
 if __name__ == "__main__":
     initialize_database()
     add_safety_tips()
-    print("Disaster safety tips added successfully!")
\ No newline at end of file
+    print("Disaster safety tips added successfully!")
@@ -1,90 +1,423 @@
 import sqlite3 as db
-from datetime import datetime
+from datetime import datetime, timezone
 import hashlib
-from contextlib import contextmanager
+import base64
+import json
+import threading
+import queue
+import time
+import atexit
+from collections import OrderedDict
+from concurrent.futures import CancelledError
+from contextlib import contextmanager, nullcontext
 
-# Register datetime adapters and converters
-db.register_adapter(datetime, lambda d: d.isoformat())
+from passwords import hash_password, verify_password, needs_rehash
+import query_log
+
+DB_PATH = 'safety.db'
+
+# Connection setup profiles, applied once when the pool opens a connection.
+# WAL lets readers keep going while log_activity and friends write.
+# foreign_keys stays OFF on purpose: Activities.user_id is declared ON DELETE
+# CASCADE, so enforcing it would make remove_user delete the user's activity
+# history along with the account.
+PRAGMA_PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'temp_store': 'DEFAULT',
+        'cache_size': -2000,
+        'foreign_keys': 'OFF',
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,
+        'foreign_keys': 'OFF',
+    },
+    'read-heavy': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 10000,
+        'temp_store': 'MEMORY',
+        'cache_size': -64000,
+        'mmap_size': 268435456,
+        'foreign_keys': 'OFF',
+    },
+}
+DEFAULT_PROFILE = 'durable'
+
+# Register datetime adapters and converters. Datetimes are stored in the
+# CURRENT_TIMESTAMP text format, so bound values compare correctly with
+# column defaults; an ISO 'T' separator would sort after every space.
+db.register_adapter(datetime, lambda d: timestamp_text(d))
 db.register_converter('DATETIME', lambda s: datetime.fromisoformat(s.decode('utf-8')))
 
+class ConnectionPool:
+    """Bounded pool of long-lived connections with per-thread affinity.
+
+    A thread keeps the same connection for nested db_connection() blocks and
+    gets its previous connection back on the next checkout when it is still
+    idle. When max_size connections are all checked out, callers wait up to
+    `timeout` seconds for one to be released.
+    """
+
+    def __init__(self, path=DB_PATH, max_size=8, timeout=30.0, health_check_interval=60.0,
+                 profile=DEFAULT_PROFILE):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile: {profile}")
+        self.path = path
+        self.profile = profile
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._cond = threading.Condition()
+        self._idle = []          # connections ready to hand out
+        self._all = set()        # every open connection owned by the pool
+        self._last_used = {}     # connection -> time it was released
+        self._local = threading.local()
+        self._owners = {}        # thread ident -> connection it has checked out
+        self._closed = False
+        self.stats = {'hits': 0, 'waits': 0, 'creations': 0, 'discarded': 0}
+        self.fts_available = None  # filled in lazily by fts_available()
+
+    def _connect(self):
+        conn = db.connect(self.path, detect_types=db.PARSE_DECLTYPES, check_same_thread=False,
+                          factory=query_log.InstrumentedConnection)  # Times every statement
+        conn.row_factory = db.Row  # Return rows as dictionaries
+        apply_profile(conn, self.profile)
+        return conn
+
+    def _is_healthy(self, conn):
+        if time.monotonic() - self._last_used.get(conn, 0) < self.health_check_interval:
+            return True
+        try:
+            conn.execute('SELECT 1').fetchone()
+            return True
+        except db.Error:
+            return False
+
+    def _discard(self, conn):
+        self._all.discard(conn)
+        self._last_used.pop(conn, None)
+        self.stats['discarded'] += 1
+        try:
+            conn.close()
+        except db.Error:
+            pass
+
+    def _checkout(self):
+        preferred = getattr(self._local, 'preferred', None)
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            waited = False
+            while True:
+                if self._closed:
+                    raise db.ProgrammingError('Connection pool is closed')
+                if self._idle:
+                    conn = preferred if preferred in self._idle else self._idle[-1]
+                    self._idle.remove(conn)
+                    if not self._is_healthy(conn):
+                        self._discard(conn)
+                        continue
+                    self.stats['hits'] += 1
+                    return conn
+                if len(self._all) < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    placeholder = object()
+                    self._all.add(placeholder)
+                    break
+                if not waited:
+                    self.stats['waits'] += 1
+                    waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise db.OperationalError('Timed out waiting for a database connection')
+                self._cond.wait(remaining)
+
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._all.discard(placeholder)
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._all.discard(placeholder)
+            self._all.add(conn)
+            self.stats['creations'] += 1
+        return conn
+
+    def acquire(self):
+        """Check out a connection for the calling thread."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        self._local.preferred = conn
+        self._owners[threading.get_ident()] = conn
+        return conn
+
+    def depth(self):
+        """How many acquire() calls the calling thread has not yet released."""
+        return getattr(self._local, 'depth', 0) if getattr(self._local, 'conn', None) is not None else 0
+
+    def release(self, conn):
+        """Return a connection obtained from acquire() on this same thread."""
+        if getattr(self._local, 'conn', None) is not conn:
+            # Ignoring it would leak the connection and slowly drain the pool
+            raise RuntimeError('Connection released by a thread that did not acquire it')
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+        self._owners.pop(threading.get_ident(), None)
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except db.Error:
+            healthy = False
+        with self._cond:
+            if self._closed or not healthy:
+                self._discard(conn)
+            else:
+                self._last_used[conn] = time.monotonic()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def interrupt(self, thread_id):
+        """Abort the statement running on the connection held by thread_id, if any."""
+        conn = self._owners.get(thread_id)
+        if conn is not None:
+            conn.interrupt()
+            return True
+        return False
+
+    def close(self):
+        """Close idle connections and refuse new checkouts.
+
+        Connections still checked out are closed when they are released.
+        """
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                self._discard(conn)
+            self._idle = []
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """Return the pool counters along with the current pool occupancy."""
+        with self._cond:
+            stats = dict(self.stats)
+            stats['open'] = len(self._all)
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = len(self._all) - len(self._idle)
+        return stats
+
+def apply_profile(conn, profile):
+    """Apply the named PRAGMA profile to an open connection."""
+    for pragma, value in PRAGMA_PROFILES[profile].items():
+        conn.execute(f'PRAGMA {pragma} = {value}').fetchall()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _open_pool(**options):
+    """Create a pool and bring its database up to the latest schema version."""
+    import migrations  # Deferred: it imports this module, and only runs once per pool
+    pool = ConnectionPool(**options)
+    conn = pool.acquire()
+    try:
+        migrations.migrate(conn)  # One PRAGMA read when already up to date
+    except db.DatabaseError:
+        pool.release(conn)
+        pool.close()
+        raise
+    pool.release(conn)
+    return pool
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _open_pool()
+    return _pool
+
+def configure_pool(**options):
+    """Replace the process-wide pool, e.g. configure_pool(path='other.db', profile='fast')."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, _open_pool(**options)
+    _tip_cache.reset()
+    if old is not None:
+        old.close()
+    return _pool
+
+def close_pool():
+    """Shut down the process-wide pool. A later db_connection() opens a fresh one."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, None
+    _tip_cache.reset()
+    if old is not None:
+        old.close()
+
+class CancellableCall:
+    """One blocking db call, dropped if cancelled before it starts or interrupted while it runs.
+
+    Submit the call object itself to an executor. cancel() makes a call
+    that has not started raise CancelledError when it does, and aborts the
+    SQLite statement of one that is running through the pool's interrupt().
+    """
+
+    def __init__(self, func, args=(), kwargs=None):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.state = 'pending'
+        self.thread_id = None
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            if self.state == 'cancelled':
+                raise CancelledError()
+            self.state = 'running'
+            self.thread_id = threading.get_ident()
+        try:
+            return self.func(*self.args, **self.kwargs)
+        finally:
+            with self.lock:
+                self.state = 'done'
+
+    def cancel(self):
+        with self.lock:
+            if self.state == 'pending':
+                self.state = 'cancelled'
+            elif self.state == 'running':
+                get_pool().interrupt(self.thread_id) # Abort the SQLite statement in flight
+
+def pool_stats():
+    """Return hit/wait/creation counters for the current pool."""
+    return get_pool().snapshot()
+
+def query_stats():
+    """Return per-statement timings (calls, total/max/mean ms, rows, slow calls by caller), slowest first."""
+    return query_log.stats()
+
+atexit.register(close_pool)
+
 @contextmanager
 def db_connection():
+    pool = get_pool()
     conn = None
+    outermost = False
     try:
-        conn = db.connect('safety.db', detect_types=db.PARSE_DECLTYPES)
-        conn.row_factory = db.Row  # Return rows as dictionaries
+        conn = pool.acquire()
+        outermost = pool.depth() == 1
         yield conn
     except db.DatabaseError as e:
         print(f"Database error: {e}")
-        if conn:
+        # A nested block leaves the transaction to the outermost one, which may still want it
+        if conn and outermost:
             conn.rollback()
         raise
     finally:
         if conn:
-            conn.close()
+            pool.release(conn)
 
 def create_tables():
+    """Bring the database schema up to date. get_pool() already does this when it opens a database."""
+    import migrations
     try:
         with db_connection() as conn:
-            cursor = conn.cursor()
-
-            # Users Table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL,
-                    is_admin BOOLEAN DEFAULT FALSE,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            # Activities Table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Activities (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    activity TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE
-                )
-            ''')
-
-            # Tips Table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS Tips (
-                    tip_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-
-            # Create indexes
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON Users(username)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_activities_user_id ON Activities(user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tips_title ON Tips(title)')
-
-            conn.commit()
+            migrations.migrate(conn)
     except db.DatabaseError as e:
         print(f"Error creating tables: {e}")
         raise
 
-def default_admin():
+def fts_available():
+    """True if the current database has the TipsFts full-text index.
+
+    The index is skipped when the SQLite build has no FTS5 module; tip
+    searches then fall back to LIKE matching.
+    """
+    pool = get_pool()
+    if pool.fts_available is None:
+        with db_connection() as conn:
+            pool.fts_available = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'TipsFts'"
+            ).fetchone() is not None
+    return pool.fts_available
+
+def tip_content_hash(title, content):
+    """Hash a tip's title and content, ignoring case and whitespace differences."""
+    normalized = ' '.join(title.split()).casefold() + '\0' + ' '.join(content.split()).casefold()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def rebuild_tip_index():
+    """Rebuild the full-text index from the Tips table."""
     try:
         with db_connection() as conn:
-            cursor = conn.cursor()
-            hashed_password = hashlib.sha256('#sbm@86140764'.encode()).hexdigest()
-            cursor.execute('''
-                INSERT OR IGNORE INTO Users 
-                (username, password, is_admin) 
-                VALUES (?, ?, ?)
-            ''', ('ADMIN', hashed_password, True))
+            conn.execute("INSERT INTO TipsFts (TipsFts) VALUES ('rebuild')")
             conn.commit()
+            return True
     except db.DatabaseError as e:
-        print(f"Error creating admin user: {e}")
+        print(f"Error rebuilding tip index: {e}")
+        return False
 
-def authenticate_user(username, password):
+def fts_query(search_query):
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = ''.join(ch if ch.isalnum() else ' ' for ch in search_query).split()
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+def _search_sql(search_query, limit=None):
+    """Return (sql, params) for a tip search, or None when the query has no words."""
+    limit = -1 if limit is None else limit
+    if not fts_available():
+        return '''
+            SELECT tip_id, title, content, created_at
+            FROM Tips
+            WHERE title LIKE ? OR content LIKE ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        ''', (f'%{search_query}%', f'%{search_query}%', limit)
+    match = fts_query(search_query)
+    if match is None:
+        return None
+    return '''
+        SELECT t.tip_id, t.title, t.content, t.created_at
+        FROM TipsFts f
+        JOIN Tips t ON t.tip_id = f.rowid
+        WHERE TipsFts MATCH ?
+        ORDER BY f.rank
+        LIMIT ?
+    ''', (match, limit)
+
+def search_tips(search_query, limit=None):
+    """Return tips matching search_query in title or content, best bm25 match first."""
+    query = _search_sql(search_query, limit)
+    if query is None:
+        return []
+    try:
+        return _tip_cache.get(('search', search_query, limit), lambda: list(_iter_rows(*query)))
+    except db.DatabaseError as e:
+        print(f"Error searching tips: {e}")
+        return []
+
+def verify_user(username, password):
+    """Return the user as a dict if the password matches, else None. Never writes."""
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
@@ -94,38 +427,220 @@ def authenticate_user(username, password):
                 WHERE username = ?
             ''', (username,))
             user = cursor.fetchone()
-            
-            if user and hashlib.sha256(password.encode()).hexdigest() == user['password']:
-                return dict(user)  # Convert to regular dictionary
+
+        # Verify without holding a pooled connection for the length of the KDF
+        if not user or not verify_password(password, user['password']):
             return None
+        return dict(user)  # Convert to regular dictionary
     except db.DatabaseError as e:
         print(f"Authentication error: {e}")
         return None
 
+def authenticate_user(username, password):
+    """verify_user(), then upgrade the stored hash if it is outdated."""
+    user = verify_user(username, password)
+    if user and needs_rehash(user['password']):
+        rehash_password(user['id'], user['password'], password)
+    return user
+
+def rehash_password(user_id, old_hash, password):
+    """Upgrade a legacy or outdated hash after a successful login."""
+    new_hash = hash_password(password)
+    try:
+        with db_connection() as conn:
+            # Skip if the password changed since it was read
+            conn.execute('UPDATE Users SET password = ? WHERE id = ? AND password = ?',
+                         (new_hash, user_id, old_hash))
+            conn.commit()
+    except db.DatabaseError as e:
+        print(f"Error upgrading password hash: {e}")
+
+class TipCache:
+    """Process-wide read-through cache for tip queries.
+
+    Entries are dropped whenever the tips generation moves: add_tip,
+    update_tip and remove_tip invalidate directly, and writes from other
+    connections or processes are noticed through PRAGMA data_version on a
+    dedicated watcher connection followed by a read of TipsGeneration.
+    Cached results are shared, so callers must not modify them.
+    """
+
+    def __init__(self, max_entries=256, max_rows=100000, enabled=True):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self._entries = OrderedDict()  # key -> (value, row count), least recently used first
+        self._rows = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._data_version = None
+        self._generation = None
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def _clear(self):
+        if self._entries:
+            self.stats['invalidations'] += 1
+        self._entries.clear()
+        self._rows = 0
+
+    def _check_fresh(self):
+        """Drop every entry if the tips generation changed since the last check."""
+        try:
+            if self._watcher is None:
+                self._watcher = db.connect(get_pool().path, check_same_thread=False)
+            data_version = self._watcher.execute('PRAGMA data_version').fetchone()[0]
+            if data_version == self._data_version:
+                return
+            generation = self._watcher.execute(
+                'SELECT generation FROM TipsGeneration WHERE id = 1'
+            ).fetchone()
+            generation = generation[0] if generation else None
+        except db.Error:
+            self._close_watcher()
+            data_version = generation = None
+        self._data_version = data_version
+        if generation is None or generation != self._generation:
+            self._clear()
+        self._generation = generation
+
+    def _close_watcher(self):
+        if self._watcher is not None:
+            try:
+                self._watcher.close()
+            except db.Error:
+                pass
+        self._watcher = None
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss."""
+        if not self.enabled:
+            return loader()
+        with self._lock:
+            self._check_fresh()
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key][0]
+            self.stats['misses'] += 1
+            generation = self._generation
+
+        value = loader()
+        if isinstance(value, dict) and 'items' in value:
+            rows = len(value['items'])
+        elif isinstance(value, list):
+            rows = len(value)
+        else:
+            rows = 1
+
+        with self._lock:
+            # Skip storing if the data changed while we were loading
+            if generation is None or generation != self._generation or rows > self.max_rows:
+                return value
+            if key in self._entries:
+                self._rows -= self._entries.pop(key)[1]
+            self._entries[key] = (value, rows)
+            self._rows += rows
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                _, (_, evicted_rows) = self._entries.popitem(last=False)
+                self._rows -= evicted_rows
+                self.stats['evictions'] += 1
+        return value
+
+    def generation(self):
+        """Current tips generation, re-read only when the database has changed; None if unreadable."""
+        with self._lock:
+            self._check_fresh()
+            return self._generation
+
+    def invalidate(self):
+        """Forget every cached entry (called after local tip writes)."""
+        with self._lock:
+            self._clear()
+            self._generation = None
+            self._data_version = None
+
+    def reset(self):
+        """Invalidate and close the watcher, e.g. when the pool points at another database."""
+        with self._lock:
+            self._clear()
+            self._close_watcher()
+            self._generation = None
+            self._data_version = None
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+            stats['rows'] = self._rows
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+_tip_cache = TipCache()
+
+def configure_tip_cache(**options):
+    """Replace the tip cache, e.g. configure_tip_cache(max_entries=64, enabled=False)."""
+    global _tip_cache
+    old, _tip_cache = _tip_cache, TipCache(**options)
+    old.reset()
+    return _tip_cache
+
+def tip_cache_stats():
+    """Return hit/miss/eviction counters for the tip cache."""
+    return _tip_cache.snapshot()
+
+def tips_generation():
+    """Return the Tips change counter maintained by triggers, or None if it cannot be read.
+
+    Comes from the tip cache's watcher, so it costs one PRAGMA data_version
+    unless the database changed since the last call.
+    """
+    return _tip_cache.generation()
+
+def invalidate_tip_cache():
+    """Drop cached tip reads after writing Tips outside add_tip/update_tip/remove_tip."""
+    _tip_cache.invalidate()
+
 def add_tip(title, content):
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO Tips (title, content) 
-                VALUES (?, ?)
-            ''', (title, content))
+                INSERT INTO Tips (title, content, content_hash) 
+                VALUES (?, ?, ?)
+            ''', (title, content, tip_content_hash(title, content)))
             conn.commit()
+            _tip_cache.invalidate()
             return True
+    except db.IntegrityError:
+        print(f"Tip '{title}' already exists")
+        return False
     except db.DatabaseError as e:
         print(f"Error adding tip: {e}")
         return False
 
+def tip_exists(title, content):
+    """True if a tip with this title and content, ignoring case and whitespace, is stored."""
+    try:
+        with db_connection() as conn:
+            return conn.execute(
+                'SELECT 1 FROM Tips WHERE content_hash = ?', (tip_content_hash(title, content),)
+            ).fetchone() is not None
+    except db.DatabaseError as e:
+        print(f"Error checking for tip: {e}")
+        return False
+
 def update_tip(tip_id, title, content):
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE Tips 
-                SET title = ?, content = ? 
+                SET title = ?, content = ?, content_hash = ? 
                 WHERE tip_id = ?
-            ''', (title, content, tip_id))
+            ''', (title, content, tip_content_hash(title, content), tip_id))
             conn.commit()
+            _tip_cache.invalidate()
             return cursor.rowcount > 0
     except db.DatabaseError as e:
         print(f"Error updating tip: {e}")
@@ -137,43 +652,235 @@ def remove_tip(tip_id):
             cursor = conn.cursor()
             cursor.execute('DELETE FROM Tips WHERE tip_id = ?', (tip_id,))
             conn.commit()
+            _tip_cache.invalidate()
             return cursor.rowcount > 0
     except db.DatabaseError as e:
         print(f"Error deleting tip: {e}")
         return False
 
+PAGE_SIZE = 20
+
+def encode_cursor(*values):
+    """Pack the sort key of the last row on a page into an opaque cursor string."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    """Unpack a cursor produced by encode_cursor()."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+
+def _page_result(conn, cursor, limit, id_column, count_sql=None, count_params=()):
+    """Build a page dict from a query that selected limit + 1 rows.
+
+    The cursor is the last row's (sort_key, id), or just its id when the
+    query has no sort_key column because it is ordered by id alone.
+    """
+    columns = [column[0] for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchmany(limit + 1)]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    keyed = 'sort_key' in columns
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last['sort_key'], last[id_column]) if keyed else encode_cursor(last[id_column])
+    if keyed:
+        for row in rows:
+            del row['sort_key']
+
+    total = None
+    if count_sql:
+        total = conn.execute(count_sql, count_params).fetchone()[0]
+    return {'items': rows, 'next': next_cursor, 'total': total}
+
+def _empty_page():
+    return {'items': [], 'next': None, 'total': None}
+
+def _load_tip(tip_id):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT tip_id, title, content, created_at 
+            FROM Tips 
+            WHERE tip_id = ?
+        ''', (tip_id,))
+        tip = cursor.fetchone()
+        return dict(tip) if tip else None
+
+def fetch_tip(tip_id):
+    """Like get_tip_by_id(), but database errors are raised rather than read as a missing tip."""
+    return _tip_cache.get(('tip', tip_id), lambda: _load_tip(tip_id))
+
+def get_tip_by_id(tip_id):
+    """Return a single tip by primary key, or None if it does not exist."""
+    try:
+        return fetch_tip(tip_id)
+    except db.DatabaseError as e:
+        print(f"Error fetching tip: {e}")
+        return None
+
+# Keep IN (...) lists well under SQLite's bound-parameter limit
+ID_BATCH_SIZE = 500
+
+def _rows_by_ids(sql, ids, id_column):
+    """Run sql (with an {ids} placeholder list) in chunks and map id -> row dict."""
+    ids = list(dict.fromkeys(ids))
+    found = {}
+    with db_connection() as conn:
+        for start in range(0, len(ids), ID_BATCH_SIZE):
+            chunk = ids[start:start + ID_BATCH_SIZE]
+            placeholders = ', '.join('?' * len(chunk))
+            for row in conn.execute(sql.format(ids=placeholders), chunk):
+                found[row[id_column]] = dict(row)
+    return found
+
+def get_tips_by_ids(tip_ids):
+    """Return {tip_id: tip} for the given ids; missing ids are left out."""
+    try:
+        return _rows_by_ids('''
+            SELECT tip_id, title, content, created_at 
+            FROM Tips 
+            WHERE tip_id IN ({ids})
+        ''', tip_ids, 'tip_id')
+    except db.DatabaseError as e:
+        print(f"Error fetching tips: {e}")
+        return {}
+
+FETCH_BATCH_SIZE = 500
+
+def _iter_rows(sql, params=(), batch_size=FETCH_BATCH_SIZE):
+    """Yield query rows as dicts, fetching batch_size rows at a time.
+
+    The pooled connection stays checked out until the generator is exhausted
+    or closed, so callers that stop early should close() it.
+    """
+    with db_connection() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(zip(columns, row))
+
+def iter_tips(search_query=None, batch_size=FETCH_BATCH_SIZE):
+    """Lazily yield tips, newest first, or best match first when searching."""
+    if search_query:
+        query = _search_sql(search_query)
+        if query is None:
+            return
+        yield from _iter_rows(*query, batch_size=batch_size)
+        return
+    yield from _iter_rows('''
+        SELECT tip_id, title, content, created_at 
+        FROM Tips 
+        ORDER BY created_at DESC
+    ''', batch_size=batch_size)
+
 def get_tips(search_query=None):
     try:
-        with db_connection() as conn:
-            cursor = conn.cursor()
-            if search_query:
-                cursor.execute('''
-                    SELECT tip_id, title, content, created_at 
-                    FROM Tips 
-                    WHERE title LIKE ?
-                    ORDER BY created_at DESC
-                ''', (f'%{search_query}%',))
-            else:
-                cursor.execute('''
-                    SELECT tip_id, title, content, created_at 
-                    FROM Tips 
-                    ORDER BY created_at DESC
-                ''')
-            
-            # Convert to list of dictionaries with consistent keys
-            columns = [column[0] for column in cursor.description]
-            tips = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            return tips
+        # Convert to list of dictionaries with consistent keys
+        return _tip_cache.get(('tips', search_query or None), lambda: list(iter_tips(search_query)))
     except db.DatabaseError as e:
         print(f"Error fetching tips: {e}")
         return []
 
+def get_tips_page(limit=PAGE_SIZE, after=None, search_query=None, with_total=False, ranked=True):
+    """Return one page of tips, newest first, or best match first when searching.
+
+    Pass the returned 'next' cursor as `after` to fetch the following page.
+    ranked=False returns matches in the order they were added, latest
+    first, instead: bm25 has to score every match before the first row
+    comes back, which is too slow for search-as-you-type on a large
+    catalogue. That is tip_id order, so imported or backdated tips can sit
+    out of created_at order; without an FTS index both orders fall back
+    to newest first.
+    """
+    try:
+        return fetch_tips_page(limit, after, search_query, with_total, ranked)
+    except (db.DatabaseError, ValueError) as e:
+        print(f"Error fetching tips page: {e}")
+        return _empty_page()
+
+def fetch_tips_page(limit=PAGE_SIZE, after=None, search_query=None, with_total=False, ranked=True):
+    """Like get_tips_page(), but raise sqlite3.DatabaseError or ValueError (bad cursor) instead
+    of returning an empty page, for callers that must not mistake a failure for no tips."""
+    key = ('page', limit, after, search_query or None, with_total, ranked)
+    return _tip_cache.get(key, lambda: _load_tips_page(limit, after, search_query, with_total, ranked))
+
+def _load_tips_page(limit, after, search_query, with_total, ranked=True):
+    if search_query and fts_available():
+        return _load_search_page(search_query, limit, after, with_total, ranked)
+    with db_connection() as conn:
+        where = []
+        params = []
+        if search_query:
+            where.append('(title LIKE ? OR content LIKE ?)')
+            params += [f'%{search_query}%', f'%{search_query}%']
+        count_where = ' AND '.join(where)
+        count_params = list(params)
+        if after:
+            where.append('(created_at, tip_id) < (?, ?)')
+            params += decode_cursor(after)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+        cursor = conn.execute(f'''
+            SELECT tip_id, title, content, created_at, CAST(created_at AS TEXT) AS sort_key
+            FROM Tips
+            {where_sql}
+            ORDER BY created_at DESC, tip_id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        count_sql = None
+        if with_total:
+            count_sql = 'SELECT COUNT(*) FROM Tips' + (f' WHERE {count_where}' if count_where else '')
+        return _page_result(conn, cursor, limit, 'tip_id', count_sql, count_params)
+
+def _load_search_page(search_query, limit, after, with_total, ranked=True):
+    match = fts_query(search_query)
+    if match is None:
+        return _empty_page()
+    with db_connection() as conn:
+        params = [match]
+        keyset = ''
+        if ranked:
+            if after:
+                keyset = 'WHERE (m.rank, m.tip_id) > (?, ?)'
+                params += decode_cursor(after)
+            cursor = conn.execute(f'''
+                SELECT t.tip_id, t.title, t.content, t.created_at, m.rank AS sort_key
+                FROM (
+                    SELECT rowid AS tip_id, rank FROM TipsFts WHERE TipsFts MATCH ?
+                ) m
+                JOIN Tips t ON t.tip_id = m.tip_id
+                {keyset}
+                ORDER BY m.rank, m.tip_id
+                LIMIT ?
+            ''', (*params, limit + 1))
+        else:
+            # Walk the index in rowid order so LIMIT stops the scan early;
+            # tip_id alone is the keyset
+            if after:
+                keyset = 'AND f.rowid < ?'
+                params.append(decode_cursor(after)[0])
+            cursor = conn.execute(f'''
+                SELECT t.tip_id, t.title, t.content, t.created_at
+                FROM TipsFts f
+                JOIN Tips t ON t.tip_id = f.rowid
+                WHERE TipsFts MATCH ? {keyset}
+                ORDER BY f.rowid DESC
+                LIMIT ?
+            ''', (*params, limit + 1))
+        count_sql = 'SELECT COUNT(*) FROM TipsFts WHERE TipsFts MATCH ?' if with_total else None
+        return _page_result(conn, cursor, limit, 'tip_id', count_sql, (match,))
+
 def add_user(username, password, is_admin=False):
+    hashed_password = hash_password(password) # Hash before taking a connection
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
-            hashed_password = hashlib.sha256(password.encode()).hexdigest()
             cursor.execute('''
                 INSERT INTO Users 
                 (username, password, is_admin) 
@@ -188,7 +895,9 @@ def add_user(username, password, is_admin=False):
         print(f"Error adding user: {e}")
         return False
 
-def update_user(user_id, new_username=None, new_password=None):
+def update_user(user_id, new_username=None, new_password=None, is_admin=None):
+    """Change any of a user's username, password and admin flag; None leaves a field as it is."""
+    hashed_password = hash_password(new_password) if new_password else None
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
@@ -201,10 +910,13 @@ def update_user(user_id, new_username=None, new_password=None):
                 params.append(new_username)
             
             if new_password:
-                hashed_password = hashlib.sha256(new_password.encode()).hexdigest()
                 updates.append("password = ?")
                 params.append(hashed_password)
             
+            if is_admin is not None:
+                updates.append("is_admin = ?")
+                params.append(bool(is_admin))
+            
             if not updates:
                 return False
                 
@@ -230,25 +942,281 @@ def remove_user(user_id):
         print(f"Error deleting user: {e}")
         return False
 
-def view_users():
+def get_user_by_id(user_id):
+    """Return a single user (without the password hash) by id, or None."""
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT id, username, is_admin, created_at 
                 FROM Users 
-                ORDER BY created_at DESC
-            ''')
-            
-            columns = [column[0] for column in cursor.description]
-            users = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            return users
+                WHERE id = ?
+            ''', (user_id,))
+            user = cursor.fetchone()
+            return dict(user) if user else None
+    except db.DatabaseError as e:
+        print(f"Error fetching user: {e}")
+        return None
+
+def get_users_by_ids(user_ids):
+    """Return {id: user} for the given ids; missing ids are left out."""
+    try:
+        return _rows_by_ids('''
+            SELECT id, username, is_admin, created_at 
+            FROM Users 
+            WHERE id IN ({ids})
+        ''', user_ids, 'id')
+    except db.DatabaseError as e:
+        print(f"Error fetching users: {e}")
+        return {}
+
+def iter_users(batch_size=FETCH_BATCH_SIZE):
+    """Lazily yield users, newest first."""
+    yield from _iter_rows('''
+        SELECT id, username, is_admin, created_at 
+        FROM Users 
+        ORDER BY created_at DESC
+    ''', batch_size=batch_size)
+
+def view_users():
+    try:
+        return list(iter_users())
     except db.DatabaseError as e:
         print(f"Error fetching users: {e}")
         return []
 
+def view_users_page(limit=PAGE_SIZE, after=None, with_total=False):
+    """Return one page of users, newest first."""
+    try:
+        with db_connection() as conn:
+            params = []
+            where = ''
+            if after:
+                where = 'WHERE (created_at, id) < (?, ?)'
+                params += decode_cursor(after)
+            cursor = conn.execute(f'''
+                SELECT id, username, is_admin, created_at, CAST(created_at AS TEXT) AS sort_key
+                FROM Users
+                {where}
+                ORDER BY created_at DESC, id DESC
+                LIMIT ?
+            ''', (*params, limit + 1))
+            count_sql = 'SELECT COUNT(*) FROM Users' if with_total else None
+            return _page_result(conn, cursor, limit, 'id', count_sql)
+    except (db.DatabaseError, ValueError) as e:
+        print(f"Error fetching users page: {e}")
+        return _empty_page()
+
+def _utc_timestamp():
+    """Current UTC time in the same text format as CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+def timestamp_text(value):
+    """Format a datetime the way CURRENT_TIMESTAMP stores it; strings pass through."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+def timestamp_bound(value):
+    """Normalize a start/end filter (datetime or ISO text) to stored timestamp text.
+
+    '2024-01-31T08:00' and '2024-01-31 08:00:00' give the same bound.
+    Raises ValueError for text that is not an ISO date or datetime.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.strip())
+    return timestamp_text(value)
+
+class ActivityWriter:
+    """Background thread that writes queued activities in batched transactions.
+
+    A batch is committed once it holds batch_size events or flush_interval
+    seconds after its first event, whichever comes first. The queue is
+    bounded: log() blocks for up to put_timeout seconds when it is full and
+    drops the event if there is still no room.
+    """
+
+    _STOP = object()
+
+    def __init__(self, batch_size=200, flush_interval=0.25, max_queue=10000, put_timeout=2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.stats = {
+            'logged': 0, 'written': 0, 'failed': 0, 'dropped': 0, 'blocked': 0,
+            'batches': 0, 'max_depth': 0,
+            'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0,
+        }
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='activity-writer', daemon=True)
+            self._thread.start()
+        return self
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def log(self, user_id, activity):
+        """Queue one activity. Returns False if it was invalid or dropped because the queue stayed full."""
+        if user_id is None or activity is None:
+            # Rejected here: the NOT NULL columns would fail the whole batch it landed in
+            print(f"Error logging activity: missing user or message ({user_id!r}, {activity!r})")
+            return False
+        item = (user_id, activity, _utc_timestamp())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.stats['blocked'] += 1
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                with self._lock:
+                    self.stats['dropped'] += 1
+                print(f"Activity queue full, dropped: {activity}")
+                return False
+        with self._lock:
+            self.stats['logged'] += 1
+            self.stats['max_depth'] = max(self.stats['max_depth'], self._queue.qsize())
+        return True
+
+    def flush(self, timeout=5.0):
+        """Block until every activity queued so far has been written."""
+        if not self.is_running():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout=5.0):
+        """Write what is queued, then stop the writer thread. Returns False if it is still writing."""
+        if not self.is_running():
+            return True
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False  # Keep the reference: the thread is still writing
+        self._thread = None
+        return True
+
+    def metrics(self):
+        """Return queue depth, throughput and flush latency figures."""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['batches'] if stats['batches'] else 0.0
+        return stats
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, waiters, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if stop or waiters:
+                # Drain everything queued ahead of the marker
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is self._STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+
+            for start in range(0, len(batch), self.batch_size):
+                self._write(batch[start:start + self.batch_size])
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        written = 0
+        try:
+            with db_connection() as conn:
+                conn.executemany('''
+                    INSERT INTO Activities (user_id, activity, timestamp) 
+                    VALUES (?, ?, ?)
+                ''', batch)
+                conn.commit()
+                written = len(batch)
+        except db.DatabaseError as e:
+            print(f"Error logging activities: {e}")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.stats['written'] += written
+            self.stats['failed'] += len(batch) - written
+            self.stats['batches'] += 1
+            self.stats['last_flush_ms'] = elapsed_ms
+            self.stats['max_flush_ms'] = max(self.stats['max_flush_ms'], elapsed_ms)
+            self.stats['total_flush_ms'] += elapsed_ms
+
+_activity_writer = None
+
+def start_activity_writer(**options):
+    """Route log_activity() through a background batching writer."""
+    global _activity_writer
+    if _activity_writer is None or not _activity_writer.is_running():
+        _activity_writer = ActivityWriter(**options).start()
+    return _activity_writer
+
+def stop_activity_writer():
+    """Write any queued activities and go back to synchronous logging."""
+    global _activity_writer
+    writer, _activity_writer = _activity_writer, None
+    if writer is not None and not writer.stop():
+        print("Activity writer did not finish in time; some activities may not be saved yet")
+
+atexit.register(stop_activity_writer)
+
+def flush_activities(timeout=5.0):
+    """Wait until queued activities are in the database."""
+    writer = _activity_writer
+    if writer is None:
+        return True
+    stats = writer.metrics()
+    if stats['logged'] > stats['written'] + stats['failed']:
+        return writer.flush(timeout)
+    return True
+
+def activity_writer_metrics():
+    """Return the background writer's metrics, or None when logging synchronously."""
+    writer = _activity_writer
+    return writer.metrics() if writer is not None else None
+
 def log_activity(user_id, activity):
+    writer = _activity_writer
+    if writer is not None and writer.is_running():
+        return writer.log(user_id, activity)
     try:
         with db_connection() as conn:
             cursor = conn.cursor()
@@ -262,30 +1230,189 @@ def log_activity(user_id, activity):
         print(f"Error logging activity: {e}")
         return False
 
+def iter_activities(batch_size=FETCH_BATCH_SIZE):
+    """Lazily yield activities with usernames, newest first."""
+    flush_activities()
+    yield from _iter_rows('''
+        SELECT 
+            a.id, 
+            u.username as user_id, 
+            a.activity, 
+            a.timestamp 
+        FROM Activities a
+        JOIN Users u ON a.user_id = u.id
+        ORDER BY a.timestamp DESC
+    ''', batch_size=batch_size)
+
 def view_activities():
     try:
-        with db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT 
-                    a.id, 
-                    u.username as user_id, 
-                    a.activity, 
-                    a.timestamp 
-                FROM Activities a
-                JOIN Users u ON a.user_id = u.id
-                ORDER BY a.timestamp DESC
-            ''')
-            
-            columns = [column[0] for column in cursor.description]
-            activities = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            return activities
+        return list(iter_activities())
     except db.DatabaseError as e:
         print(f"Error fetching activities: {e}")
         return []
 
-# Initialize database
-create_tables()
-default_admin()
-print('db connected')
+def view_activities_page(limit=PAGE_SIZE, after=None, with_total=False):
+    """Return one page of activities with usernames, newest first."""
+    flush_activities()
+    try:
+        with db_connection() as conn:
+            params = []
+            where = ''
+            if after:
+                where = 'WHERE (a.timestamp, a.id) < (?, ?)'
+                params += decode_cursor(after)
+            cursor = conn.execute(f'''
+                SELECT
+                    a.id,
+                    u.username as user_id,
+                    a.activity,
+                    a.timestamp,
+                    CAST(a.timestamp AS TEXT) AS sort_key
+                FROM Activities a
+                JOIN Users u ON a.user_id = u.id
+                {where}
+                ORDER BY a.timestamp DESC, a.id DESC
+                LIMIT ?
+            ''', (*params, limit + 1))
+            count_sql = None
+            if with_total:
+                count_sql = 'SELECT COUNT(*) FROM Activities a JOIN Users u ON a.user_id = u.id'
+            return _page_result(conn, cursor, limit, 'id', count_sql)
+    except (db.DatabaseError, ValueError) as e:
+        print(f"Error fetching activities page: {e}")
+        return _empty_page()
+
+# Action types for get_activity_feed, as LIKE patterns over the messages the app logs
+ACTIVITY_ACTIONS = {
+    'login': ('% logged in',),
+    'logout': ('% logged out',),
+    'password': ('% updated password',),
+    'users': ('Added user:%', 'Removed user:%', 'Updated user ID:%'),
+    'tips': ('Added safety tip:%', 'Updated safety tip ID:%', 'Deleted safety tip:%'),
+}
+
+def like_pattern(text):
+    """Escape LIKE wildcards in text and wrap it to match anywhere."""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+def activity_filters(start=None, end=None, user_id=None, username=None, text=None, action=None,
+                     archived=False):
+    """Return (conditions, params) for activity filters over a table aliased `a`.
+
+    start and end must already be timestamp_bound() text. With archived,
+    username is matched against the name ArchivedActivities rows keep
+    instead of the live Users table.
+    """
+    where, params = [], []
+    if user_id is not None:
+        where.append('a.user_id = ?')
+        params.append(user_id)
+    if username:
+        where.append('a.username = ?' if archived else 'a.user_id IN (SELECT id FROM main.Users WHERE username = ?)')
+        params.append(username)
+    if start:
+        where.append('a.timestamp >= ?')
+        params.append(start)
+    if end:
+        where.append('a.timestamp < ?')
+        params.append(end)
+    if text:
+        where.append("a.activity LIKE ? ESCAPE '\\'")
+        params.append(like_pattern(text))
+    if action:
+        patterns = ACTIVITY_ACTIONS[action]
+        where.append('(' + ' OR '.join('a.activity LIKE ?' for _ in patterns) + ')')
+        params += patterns
+    return where, params
+
+def oldest_live_activity(conn):
+    """Timestamp text of the oldest row still in the live Activities table, or None."""
+    row = conn.execute('SELECT CAST(timestamp AS TEXT) FROM Activities ORDER BY timestamp LIMIT 1').fetchone()
+    return row[0] if row else None  # ORDER BY, not MIN(CAST(...)), so the index answers it
+
+def get_activity_feed(user_id=None, username=None, start=None, end=None, text=None, action=None,
+                      limit=PAGE_SIZE, after=None, with_total=False):
+    """Return one page of activities, newest first, filtered in a single query.
+
+    The user can be given by id or by username. start is inclusive and end
+    exclusive (datetimes or ISO timestamp text),
+    text matches anywhere in the message and action is a key of
+    ACTIVITY_ACTIONS. Items carry both user_id and username; username is
+    None for live activities of deleted users.
+
+    When start is unset or older than the oldest live activity, rotated
+    rows in the archive database are paged through too, so the feed
+    agrees with activity_archive.iter_activity_range().
+    """
+    if action is not None and action not in ACTIVITY_ACTIONS:
+        print(f"Unknown activity action: {action}")
+        return _empty_page()
+    import activity_archive  # Deferred: it imports this module
+    flush_activities()
+    try:
+        filters = dict(start=timestamp_bound(start), end=timestamp_bound(end), user_id=user_id,
+                       username=username, text=text, action=action)
+        live_where, live_params = activity_filters(**filters)
+        archive_where, archive_params = activity_filters(**filters, archived=True)
+        live_sql = '''
+            SELECT
+                a.id,
+                a.user_id,
+                u.username,
+                a.activity,
+                a.timestamp,
+                CAST(a.timestamp AS TEXT) AS sort_key
+            FROM Activities a
+            LEFT JOIN Users u ON a.user_id = u.id
+        '''
+        # Skip rows an interrupted rotation left in both places
+        archive_sql = f'''
+            SELECT a.id, a.user_id, a.username, a.activity, a.timestamp, CAST(a.timestamp AS TEXT) AS sort_key
+            FROM {activity_archive.ARCHIVE_ALIAS}.ArchivedActivities a
+            WHERE NOT EXISTS (SELECT 1 FROM main.Activities l WHERE l.id = a.id)
+        '''
+        live_count = 'SELECT COUNT(*) FROM Activities a' + ''.join(
+            f" {'AND' if i else 'WHERE'} {condition}" for i, condition in enumerate(live_where))
+        archive_count = f'''
+            SELECT COUNT(*) FROM {activity_archive.ARCHIVE_ALIAS}.ArchivedActivities a
+            WHERE NOT EXISTS (SELECT 1 FROM main.Activities l WHERE l.id = a.id)
+        ''' + ''.join(f' AND {condition}' for condition in archive_where)
+        live_count_params, archive_count_params = list(live_params), list(archive_params)
+        if after:
+            keyset = decode_cursor(after)
+            live_where.append('(a.timestamp, a.id) < (?, ?)')
+            archive_where.append('(a.timestamp, a.id) < (?, ?)')
+            live_params += keyset
+            archive_params += keyset
+        if live_where:
+            live_sql += f"WHERE {' AND '.join(live_where)}"
+        archive_sql += ''.join(f' AND {condition}' for condition in archive_where)
+        with db_connection() as conn:
+            oldest_live = oldest_live_activity(conn)
+            reaches_archive = not filters['start'] or oldest_live is None or filters['start'] < oldest_live
+            archive = activity_archive.attached_archive(conn, create=False) if reaches_archive else nullcontext(False)
+            with archive as span_archive:
+                order = ' ORDER BY a.timestamp DESC, a.id DESC LIMIT ?'
+                if span_archive:
+                    # Each half takes its first page from its own index; only those rows are merged
+                    sql = f'''
+                        SELECT * FROM ({live_sql}{order})
+                        UNION ALL
+                        SELECT * FROM ({archive_sql}{order})
+                        ORDER BY timestamp DESC, id DESC LIMIT ?
+                    '''
+                    params = (*live_params, limit + 1, *archive_params, limit + 1, limit + 1)
+                    count_sql = f'SELECT ({live_count}) + ({archive_count})'
+                    count_params = live_count_params + archive_count_params
+                else:
+                    sql, params = live_sql + order, (*live_params, limit + 1)
+                    count_sql, count_params = live_count, live_count_params
+                cursor = conn.execute(sql, params)
+                try:
+                    return _page_result(conn, cursor, limit, 'id', count_sql if with_total else None, count_params)
+                finally:
+                    cursor.close()  # The archive cannot be detached while the query is open
+    except (db.DatabaseError, ValueError) as e:
+        print(f"Error fetching activity feed: {e}")
+        return _empty_page()
@@ -0,0 +1,185 @@
+"""Streaming export of tips, users and activities to JSONL or CSV.
+
+Rows are read through cursors in FETCH_BATCH_SIZE batches and written as
+they arrive, so memory stays flat however large the table is. A path
+ending in .gz (or --gzip) is gzip-compressed; '-' writes to stdout.
+
+    python export.py tips --output tips.jsonl
+    python export.py users --format csv --output users.csv
+    python export.py activities --since 2024-01-01 --until 2024-07-01 --output h1.csv.gz
+
+Activity exports cover archived rows too when the range reaches back
+past the live table (see activity_archive.iter_activity_range). Each
+export returns, and the CLI prints, the row count and rows/sec.
+Password hashes are never exported.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from datetime import datetime
+
+import db as database
+from activity_archive import iter_activity_range
+
+TIP_FIELDS = ['tip_id', 'title', 'content', 'created_at']
+USER_FIELDS = ['id', 'username', 'is_admin', 'created_at']
+ACTIVITY_FIELDS = ['id', 'timestamp', 'user_id', 'username', 'activity']
+ACTIVITY_RANGE_FIELDS = ['id', 'timestamp', 'username', 'activity']  # Archived rows keep only the username
+FORMATS = ['jsonl', 'csv']
+PROGRESS_EVERY = 10000
+
+
+def write_records(records, fields, fmt='jsonl', out=None, progress=None):
+    """Stream dicts to out as JSONL or CSV with the given fields; return how many were written.
+
+    progress, if given, is called with the running count every
+    PROGRESS_EVERY rows.
+    """
+    out = out or sys.stdout
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fields, extrasaction='ignore')
+        writer.writeheader()
+    elif fmt != 'jsonl':
+        raise ValueError(f"Unsupported export format: {fmt}")
+    count = 0
+    for record in records:
+        row = {field: database.timestamp_text(record.get(field)) for field in fields}
+        if writer:
+            writer.writerow(row)
+        else:
+            out.write(json.dumps(row) + '\n')
+        count += 1
+        if progress and count % PROGRESS_EVERY == 0:
+            progress(count)
+    out.flush()
+    return count
+
+
+def format_for(path, fmt=None):
+    """The export format: fmt if given, else guessed from path's extension (JSONL by default)."""
+    if fmt:
+        return fmt
+    name = (path or '').lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'csv' if name.endswith('.csv') else 'jsonl'
+
+
+def open_output(path, compress=None):
+    """Open path for text export; gzip when compress is set or path ends in .gz."""
+    if compress is None:
+        compress = bool(path) and path.lower().endswith('.gz')
+    if not path or path == '-':
+        if compress:
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb'),
+                                    encoding='utf-8', newline='')
+        return sys.stdout
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return open(path, 'w', encoding='utf-8', newline='')
+
+
+def _limited(records, limit):
+    for count, record in enumerate(records):
+        if limit is not None and count >= limit:
+            return
+        yield record
+
+
+def export_records(records, fields, path=None, fmt=None, compress=None, limit=None, progress=None):
+    """Write records to path (stdout if None or '-'); return rows, seconds and rows_per_sec."""
+    started = time.perf_counter()
+    out = open_output(path, compress)
+    try:
+        rows = write_records(_limited(records, limit), fields, format_for(path, fmt), out, progress)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - started
+    return {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds else 0.0}
+
+
+def export_tips(path=None, fmt=None, compress=None, search_query=None, limit=None, progress=None):
+    """Export tips, newest first, or best match first for a search."""
+    return export_records(database.iter_tips(search_query), TIP_FIELDS, path, fmt, compress, limit, progress)
+
+
+def export_users(path=None, fmt=None, compress=None, limit=None, progress=None):
+    """Export users without their password hashes, newest first."""
+    return export_records(database.iter_users(), USER_FIELDS, path, fmt, compress, limit, progress)
+
+
+def _activity_rows(rows):
+    # iter_activity_range keeps view_activities()' shape, with the username under 'user_id'
+    for row in rows:
+        row['username'] = row.pop('user_id')
+        yield row
+
+
+def export_activities(path=None, fmt=None, compress=None, start=None, end=None, user_id=None,
+                      limit=None, progress=None, username=None, text=None, action=None,
+                      batch_size=database.FETCH_BATCH_SIZE):
+    """Export activities in [start, end), newest first, including archived ones.
+
+    username, text and action filter as in get_activity_feed().
+    """
+    rows = _activity_rows(iter_activity_range(start, end, user_id, username, text, action, batch_size))
+    return export_records(rows, ACTIVITY_RANGE_FIELDS, path, fmt, compress, limit, progress)
+
+
+def iter_activity_feed(batch_size=database.FETCH_BATCH_SIZE, **filters):
+    """Yield every activity matching get_activity_feed filters, newest first, a page at a time."""
+    after = None
+    while True:
+        page = database.get_activity_feed(limit=batch_size, after=after, **filters)
+        yield from page['items']
+        after = page['next']
+        if after is None:
+            return
+
+
+def export_activity_feed(path=None, fmt=None, compress=None, limit=None, progress=None, **filters):
+    """Export activities matching the admin screen's filters (username, action, text, dates), archived ones included."""
+    return export_records(iter_activity_feed(**filters), ACTIVITY_FIELDS, path, fmt, compress, limit, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tips, users or activities as JSONL or CSV.")
+    parser.add_argument('table', choices=['tips', 'users', 'activities'])
+    parser.add_argument('--output', '-o', default='-', help="file to write, .gz to compress (default: stdout)")
+    parser.add_argument('--format', choices=FORMATS, help="default: from the file extension, else jsonl")
+    parser.add_argument('--gzip', action='store_true', default=None, help="compress even without .gz")
+    parser.add_argument('--limit', type=int, help="stop after this many rows")
+    parser.add_argument('--search', help="tips only: export matches for this search")
+    parser.add_argument('--since', type=datetime.fromisoformat, help="activities only: inclusive start")
+    parser.add_argument('--until', type=datetime.fromisoformat, help="activities only: exclusive end")
+    parser.add_argument('--user-id', type=int, help="activities only: one user's activities")
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.db != database.DB_PATH:
+        database.configure_pool(path=args.db)
+
+    def progress(rows):
+        print(f"\r{rows} rows", end='', file=sys.stderr, flush=True)
+
+    options = {'path': args.output, 'fmt': args.format, 'compress': args.gzip, 'limit': args.limit,
+               'progress': progress}
+    if args.table == 'tips':
+        stats = export_tips(search_query=args.search, **options)
+    elif args.table == 'users':
+        stats = export_users(**options)
+    else:
+        stats = export_activities(start=args.since, end=args.until, user_id=args.user_id, **options)
+    print(f"\rExported {stats['rows']} {args.table} in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/sec)", file=sys.stderr)
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
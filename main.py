@@ -1,10 +1,16 @@
+import startup # First, so its clock starts before the heavy imports
 import customtkinter as ctk
 from db import (
-    authenticate_user, add_user, remove_user, update_user, view_users,
-    add_tip, update_tip as db_update_tip, remove_tip as db_remove_tip, get_tips,
-    view_activities, log_activity
+    get_pool, CancellableCall, authenticate_user, add_user, remove_user, update_user,
+    add_tip, tip_exists, update_tip as db_update_tip, remove_tip as db_remove_tip,
+    log_activity, close_pool, start_activity_writer, stop_activity_writer,
+    get_tips_page, view_users_page, get_activity_feed, ACTIVITY_ACTIONS, get_tip_by_id, get_user_by_id
 )
-from datetime import datetime # Import datetime for timestamp formatting
+from datetime import datetime, timedelta # Import datetime for timestamp formatting
+from concurrent.futures import ThreadPoolExecutor
+import queue
+
+startup.mark("imports done")
 
 # Modern color theme setup
 ctk.set_appearance_mode("System")
@@ -20,20 +26,165 @@ COLORS = {
     "text": "#F8FAFC"
 }
 
+TIP_LIST_PAGE_SIZE = 200 # Tips fetched per scroll step in the virtual tip list
+SEARCH_DEBOUNCE_MS = 50 # Pause in typing before a live search runs
+MAX_CACHED_PAGES = 8 # Built pages kept hidden for instant navigation
+
+class BackgroundWorker:
+    """Run blocking database calls off the Tk thread and hand results back to it.
+
+    Results are delivered through root.after polling, so callbacks always run
+    on the Tk thread. Each call is tagged with the current screen; when the
+    user navigates away (new_screen()), late results for the old screen are
+    dropped instead of touching destroyed widgets.
+    """
+    POLL_MS = 10
+
+    def __init__(self, root, max_workers=4):
+        self.root = root
+        self.screen = 0
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="ui-db")
+        self._results = queue.SimpleQueue()
+        self._pending = 0
+        self._latest = {} # channel -> newest CancellableCall
+
+    def new_screen(self):
+        """Mark results of calls submitted so far as no longer wanted."""
+        self.screen += 1
+        for call in self._latest.values():
+            call.cancel()
+        self._latest.clear()
+
+    def submit(self, func, *args, on_done=None, on_error=None, **kwargs):
+        """Call func(*args, **kwargs) in the background; on_done(result) runs on the Tk thread."""
+        screen = self.screen
+        future = self._executor.submit(func, *args, **kwargs)
+        future.add_done_callback(lambda f: self._results.put((f, screen, on_done, on_error)))
+        self._pending += 1
+        if self._pending == 1:
+            self.root.after(self.POLL_MS, self._poll)
+        return future
+
+    def submit_latest(self, channel, func, *args, on_done=None, on_error=None, **kwargs):
+        """Like submit(), but cancel the previous call on the same channel.
+
+        A call still queued is dropped and one already running has its
+        query interrupted; either way only the newest call's callbacks run.
+        """
+        previous = self._latest.get(channel)
+        if previous is not None:
+            previous.cancel()
+        call = CancellableCall(func, args, kwargs)
+        self._latest[channel] = call
+
+        def if_latest(callback):
+            def run(value):
+                if self._latest.get(channel) is call:
+                    del self._latest[channel]
+                    if callback:
+                        callback(value)
+                    elif isinstance(value, BaseException):
+                        print(f"Background task failed: {value}")
+            return run
+
+        return self.submit(call, on_done=if_latest(on_done), on_error=if_latest(on_error))
+
+    def _poll(self):
+        while True:
+            try:
+                future, screen, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if screen != self.screen:
+                continue # The screen that asked for this is gone
+            error = future.exception()
+            if error is not None:
+                if on_error:
+                    on_error(error)
+                else:
+                    print(f"Background task failed: {error}")
+            elif on_done:
+                on_done(future.result())
+        if self._pending:
+            self.root.after(self.POLL_MS, self._poll)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+def get_worker(root):
+    """Return the background worker shared by every screen on this root window."""
+    if not hasattr(root, "db_worker"):
+        root.db_worker = BackgroundWorker(root)
+    return root.db_worker
+
+def open_database():
+    """Open the connection pool ahead of the first query (runs on the background worker)."""
+    get_pool()
+    startup.mark("db ready")
+
+def get_pages(root):
+    """Return the page manager shared by every screen on this root window."""
+    if not hasattr(root, "pages"):
+        from widgets import PageManager # Imported here, with the first page, rather than up front
+        # Switching pages drops late results meant for the page being left
+        root.pages = PageManager(max_pages=MAX_CACHED_PAGES, on_switch=get_worker(root).new_screen)
+    return root.pages
+
+def show_message(root, message, color):
+    """Show a short-lived message along the bottom of the window."""
+    previous = getattr(root, "message_label", None)
+    if previous is not None and previous.winfo_exists():
+        previous.destroy()
+    message_label = ctk.CTkLabel(root, text=message, text_color=color)
+    message_label.place(relx=0.5, rely=1.0, anchor="s", y=-10)
+    root.message_label = message_label
+    root.after(3000, message_label.destroy)
+
+def show_loading(parent):
+    """Show a placeholder until background data arrives; destroy it when done."""
+    loading_label = ctk.CTkLabel(parent, text="Loading...", text_color=COLORS["text"])
+    loading_label.pack(pady=10)
+    return loading_label
+
+def create_pager(parent, page, cursors, on_navigate):
+    """Add Previous/Next controls under a paginated list.
+
+    `cursors` is the stack of 'after' cursors that led to the current page;
+    on_navigate is called with the stack for the previous or next page.
+    """
+    pager = ctk.CTkFrame(parent, fg_color="transparent")
+    pager.pack(pady=10)
+
+    prev_button = ctk.CTkButton(
+        pager, text="Previous", fg_color="#64748B", hover_color="#475569", width=100,
+        state="normal" if len(cursors) > 1 else "disabled",
+        command=lambda: on_navigate(cursors[:-1])
+    )
+    prev_button.pack(side="left", padx=5)
+
+    page_label = ctk.CTkLabel(pager, text=f"Page {len(cursors)}", text_color=COLORS["text"])
+    page_label.pack(side="left", padx=10)
+
+    next_button = ctk.CTkButton(
+        pager, text="Next", fg_color="#64748B", hover_color="#475569", width=100,
+        state="normal" if page['next'] else "disabled",
+        command=lambda: on_navigate(cursors + [page['next']])
+    )
+    next_button.pack(side="left", padx=5)
+    return pager
+
 class SafetyTipsApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Safety Tips App")
         self.root.geometry("1000x700")
         self.root.configure(fg_color=COLORS["background"])
+        self.worker = get_worker(root)
+        self.pages = get_pages(root)
         self.user = None
         self.login_page()
 
-    def clear_screen(self):
-        """Clear all widgets on the current screen."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
-
     def create_scrollable_frame(self):
         """Create a scrollable frame to hold dynamic content."""
         scrollable_frame = ctk.CTkScrollableFrame(
@@ -47,7 +198,9 @@ class SafetyTipsApp:
 
     def login_page(self):
         """Display login page UI."""
-        self.clear_screen()
+        self.pages.show("login", self.build_login_page, refresh=self.reset_login_page)
+
+    def build_login_page(self):
         frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
         frame.pack(pady=100, padx=200, fill="both", expand=True)
 
@@ -80,6 +233,10 @@ class SafetyTipsApp:
             command=self.sign_up_page
         )
         signup_button.pack()
+        return frame
+
+    def reset_login_page(self):
+        self.password_entry.delete(0, ctk.END)
 
     def attempt_login(self):
         """Attempt user login with provided credentials."""
@@ -89,7 +246,9 @@ class SafetyTipsApp:
 
     def sign_up_page(self):
         """Navigate to sign-up page."""
-        self.clear_screen()
+        self.pages.show("sign_up", self.build_sign_up_page, refresh=self.reset_sign_up_page)
+
+    def build_sign_up_page(self):
         frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
         frame.pack(pady=50, padx=200, fill="both", expand=True)
 
@@ -123,6 +282,11 @@ class SafetyTipsApp:
             command=self.login_page
         )
         back_button.pack()
+        return frame
+
+    def reset_sign_up_page(self):
+        for entry in (self.signup_username, self.signup_password, self.signup_confirm):
+            entry.delete(0, ctk.END)
 
     def attempt_signup(self):
         """Attempt to create a new user account."""
@@ -141,57 +305,54 @@ class SafetyTipsApp:
             self.show_error("Passwords do not match!")
             return
 
-        if add_user(username, password):
-            self.show_success("User registered successfully!")
-            self.login_page()
-        else:
-            self.show_error("Username already exists!")
+        def on_done(added):
+            if added:
+                self.show_success("User registered successfully!")
+                self.login_page()
+            else:
+                self.show_error("Username already exists!")
+
+        self.worker.submit(add_user, username, password, on_done=on_done)
 
     def authenticate(self, username, password):
         """Authenticate user and navigate based on role."""
-        user = authenticate_user(username, password)
-        if user:
-            self.user = user
-            log_activity(self.user['id'], "User logged in") # Log successful login
-            if user.get("is_admin"):
-                AdminDashboard(self.root, self.user)
+        def on_done(user):
+            if user:
+                self.user = user
+                self.worker.submit(log_activity, self.user['id'], "User logged in") # Log successful login
+                if user.get("is_admin"):
+                    AdminDashboard(self.root, self.user)
+                else:
+                    UserDashboard(self.root, self.user)
             else:
-                UserDashboard(self.root, self.user)
-        else:
-            self.show_error("Invalid username or password!")
+                self.show_error("Invalid username or password!")
+
+        self.worker.submit(authenticate_user, username, password, on_done=on_done)
 
     def show_error(self, message):
         """Show error messages on the UI."""
-        # Clear existing error messages
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["danger"]:
-                widget.destroy()
-
-        error = ctk.CTkLabel(self.root, text=message, text_color=COLORS["danger"])
-        error.pack(pady=10)
-        self.root.after(3000, error.destroy)
+        show_message(self.root, message, COLORS["danger"])
 
     def show_success(self, message):
         """Show success messages on the UI."""
-        # Clear existing success messages
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["secondary"]:
-                widget.destroy()
-
-        success = ctk.CTkLabel(self.root, text=message, text_color=COLORS["secondary"])
-        success.pack(pady=10)
-        self.root.after(3000, success.destroy)
+        show_message(self.root, message, COLORS["secondary"])
 
 class UserDashboard:
-    def __init__(self, root, user):
+    def __init__(self, root, user, search_debounce_ms=SEARCH_DEBOUNCE_MS):
         self.root = root
+        self.worker = get_worker(root)
+        self.pages = get_pages(root)
         self.user = user
+        self.search_debounce_ms = search_debounce_ms
+        self.pending_search = None
+        self.tip_query = None
+        self.tip_ranked = True
         self.user_dashboard()
 
-    def clear_screen(self):
-        """Clear all widgets on the current screen."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+    def show_page(self, key, build, refresh=None):
+        """Switch to a page, dropping any search still waiting on the debounce."""
+        self.cancel_pending_search()
+        return self.pages.show(key, build, refresh)
 
     def create_scrollable_frame(self):
         """Create a scrollable frame to hold dynamic content."""
@@ -204,66 +365,41 @@ class UserDashboard:
         scrollable_frame.pack(fill="both", expand=True)
         return scrollable_frame
 
+    def create_page_frame(self):
+        """Create a plain frame for pages whose tip list scrolls itself."""
+        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
+        frame.pack(fill="both", expand=True)
+        return frame
+
     def user_dashboard(self):
         """Display the user dashboard."""
-        self.clear_screen()
-        frame = self.create_scrollable_frame()
+        # Default view: Search tips. Returning re-runs the last search for fresh data
+        self.show_page("search", self.build_search_page,
+                       refresh=lambda: self.show_tips_page(self.tip_query, self.tip_ranked))
+
+    def search_tips_page(self):
+        """Display search functionality and search results."""
+        self.user_dashboard()
+
+    def build_search_page(self):
+        frame = self.create_page_frame()
 
         title = ctk.CTkLabel(frame, text=f"Welcome, {self.user['username']}", font=("Helvetica", 24, "bold"),
                             text_color=COLORS["primary"])
         title.pack(pady=20)
 
-        # --- Navigation Buttons ---
-        nav_frame = ctk.CTkFrame(frame, fg_color="transparent")
-        nav_frame.pack(pady=20)
-
-        search_tips_button = ctk.CTkButton(
-            nav_frame, text="Search Tips", fg_color=COLORS["primary"], hover_color="#4338CA",
-            command=self.search_tips_page
-        )
-        search_tips_button.pack(side="left", padx=10)
-
-        settings_button = ctk.CTkButton(
-            nav_frame, text="Settings", fg_color=COLORS["secondary"], hover_color="#0D9488",
-            command=self.settings_page
-        )
-        settings_button.pack(side="left", padx=10)
-
-        logout_button = ctk.CTkButton(
-            nav_frame, text="Logout", fg_color=COLORS["danger"], hover_color="#EF4444",
-            command=self.logout
-        )
-        logout_button.pack(side="left", padx=10)
-        # --- End Navigation Buttons ---
-
-        # Default view: Search tips
-        self.search_tips_page(frame) # Pass the frame to add search elements
-
-    def search_tips_page(self, parent_frame=None):
-        """Display search functionality and search results."""
-        if parent_frame is None:
-            # If navigating directly to search page, clear and create new frame
-            self.clear_screen()
-            frame = self.create_scrollable_frame()
-            self.add_user_dashboard_nav(frame) # Add navigation buttons back
-        else:
-             # If called from dashboard, use the existing frame
-             frame = parent_frame
-             # Clear previous content within the frame (except navigation)
-             for widget in frame.winfo_children():
-                 if widget not in frame.winfo_children()[:1] and widget.cget("text") not in ["Search Tips", "Settings", "Logout"]: # Keep title and nav
-                     widget.destroy()
-
+        self.add_user_dashboard_nav(frame)
 
         search_frame = ctk.CTkFrame(frame, fg_color="#2D3748")
         search_frame.pack(pady=10, padx=10, fill="x")
 
-        search_label = ctk.CTkLabel(search_frame, text="Search Safety Tips by Title:", text_color=COLORS["text"])
+        search_label = ctk.CTkLabel(search_frame, text="Search Safety Tips:", text_color=COLORS["text"])
         search_label.pack(side="left", padx=10, pady=5)
 
         self.search_entry = ctk.CTkEntry(search_frame, width=300, fg_color="#1E293B", border_color=COLORS["primary"])
         self.search_entry.pack(side="left", padx=5, pady=5, expand=True, fill="x")
         self.search_entry.bind("<Return>", lambda event=None: self.perform_search(frame)) # Bind Enter key
+        self.search_entry.bind("<KeyRelease>", self.schedule_search) # Search as the user types
 
         search_button = ctk.CTkButton(
             search_frame, text="Search", fg_color=COLORS["primary"], hover_color="#4338CA",
@@ -271,49 +407,78 @@ class UserDashboard:
         )
         search_button.pack(side="left", padx=10, pady=5)
 
-        # Frame to hold search results
-        self.results_frame = ctk.CTkFrame(frame, fg_color="transparent")
-        self.results_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        # Virtualized list to hold search results
+        from widgets import VirtualTipList # Only the dashboard needs it, so it loads after login
+        self.tip_list = VirtualTipList(
+            frame,
+            colors={
+                "background": COLORS["background"],
+                "row": "#2D3748",
+                "title": COLORS["accent"],
+                "text": COLORS["text"],
+                "scrollbar": COLORS["primary"],
+                "scrollbar_hover": COLORS["secondary"],
+            },
+            on_end_reached=self.load_more_tips
+        )
+        self.tip_list.pack(fill="both", expand=True, padx=10, pady=10)
+        return frame
+
+    def schedule_search(self, event=None):
+        """Run a live search once typing pauses for search_debounce_ms."""
+        self.cancel_pending_search()
+        self.pending_search = self.root.after(self.search_debounce_ms, self.run_live_search)
 
-        # Display all tips initially when coming from dashboard
-        if parent_frame is not None:
-             self.display_tips(get_tips(), self.results_frame)
+    def cancel_pending_search(self):
+        if self.pending_search is not None:
+            self.root.after_cancel(self.pending_search)
+            self.pending_search = None
 
+    def run_live_search(self):
+        self.pending_search = None
+        query = self.search_entry.get().strip() or None
+        if query != self.tip_query: # Ignore keys that did not change the text
+            self.show_tips_page(query, ranked=False) # Latest added matches first; Enter ranks them
 
     def perform_search(self, parent_frame):
         """Perform the search and display results."""
-        query = self.search_entry.get()
-        tips = get_tips(search_query=query) # Use the search_query parameter
+        self.cancel_pending_search()
+        query = self.search_entry.get().strip() or None
+        self.show_tips_page(query) # Start from the first page of matches
 
-        # Clear previous results
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
+    def show_tips_page(self, query=None, ranked=True):
+        """Load the first batch of tips (optionally matching query) into the tip list."""
+        self.tip_query = query
+        self.tip_ranked = ranked
+        self.tip_cursor = None
+        tip_list = self.tip_list
 
-        self.display_tips(tips, self.results_frame)
+        def on_done(page):
+            self.tip_cursor = page['next']
+            tip_list.set_items(page['items'], has_more=bool(page['next']))
 
+        # A newer search interrupts this one if it is still running
+        self.worker.submit_latest("tips", get_tips_page, limit=TIP_LIST_PAGE_SIZE,
+                                  search_query=query, ranked=ranked, on_done=on_done)
 
-    def display_tips(self, tips, parent_frame):
-         """Helper function to display a list of tips in a given frame."""
-         if not tips:
-             no_tips_label = ctk.CTkLabel(parent_frame, text="No matching safety tips found.", text_color=COLORS["text"])
-             no_tips_label.pack(pady=10)
-         else:
-             for tip in tips:
-                 tip_frame = ctk.CTkFrame(parent_frame, fg_color="#2D3748")
-                 tip_frame.pack(fill="x", pady=5, ipady=10)
+    def load_more_tips(self):
+        """Append the next batch of tips once the list is scrolled near its end."""
+        query, ranked, cursor = self.tip_query, self.tip_ranked, self.tip_cursor
+        tip_list = self.tip_list
 
-                 tip_title = ctk.CTkLabel(tip_frame, text=tip['title'], font=("Helvetica", 16, "bold"),
-                                        text_color=COLORS["accent"])
-                 tip_title.pack(anchor="w", padx=10)
+        def on_done(page):
+            self.tip_cursor = page['next']
+            tip_list.extend(page['items'], has_more=bool(page['next']))
 
-                 tip_content = ctk.CTkLabel(tip_frame, text=tip['content'], text_color=COLORS["text"],
-                                           wraplength=800, justify="left")
-                 tip_content.pack(anchor="w", padx=10, pady=5)
+        self.worker.submit_latest("tips", get_tips_page, limit=TIP_LIST_PAGE_SIZE, after=cursor,
+                                  search_query=query, ranked=ranked, on_done=on_done)
 
 
     def settings_page(self):
         """Display user settings page."""
-        self.clear_screen()
+        self.show_page("settings", self.build_settings_page, refresh=self.reset_settings_page)
+
+    def build_settings_page(self):
         frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
         frame.pack(pady=50, padx=200, fill="both", expand=True)
 
@@ -364,6 +529,11 @@ class UserDashboard:
             command=self.user_dashboard # Go back to the main dashboard view
         )
         back_button.pack(pady=10)
+        return frame
+
+    def reset_settings_page(self):
+        self.new_password_entry.delete(0, ctk.END)
+        self.confirm_new_password_entry.delete(0, ctk.END)
 
     def update_user_password(self):
         """Update the user's password."""
@@ -378,15 +548,18 @@ class UserDashboard:
             self.show_error("Passwords do not match!")
             return
 
+        def on_done(updated):
+            if updated:
+                self.worker.submit(log_activity, self.user['id'], "User updated password") # Log activity
+                self.show_success("Password updated successfully!")
+                # Clear the password fields after successful update
+                self.new_password_entry.delete(0, ctk.END)
+                self.confirm_new_password_entry.delete(0, ctk.END)
+            else:
+                self.show_error("Failed to update password.")
+
         # Call the db function to update only the password
-        if update_user(self.user['id'], new_password=new_password):
-            log_activity(self.user['id'], "User updated password") # Log activity
-            self.show_success("Password updated successfully!")
-            # Clear the password fields after successful update
-            self.new_password_entry.delete(0, ctk.END)
-            self.confirm_new_password_entry.delete(0, ctk.END)
-        else:
-            self.show_error("Failed to update password.")
+        self.worker.submit(update_user, self.user['id'], new_password=new_password, on_done=on_done)
 
     def add_user_dashboard_nav(self, frame):
         """Helper to add navigation buttons back to a page."""
@@ -415,65 +588,34 @@ class UserDashboard:
     def logout(self):
         """Log out the user."""
         if self.user:
-            log_activity(self.user['id'], "User logged out") # Log logout
+            self.worker.submit(log_activity, self.user['id'], "User logged out") # Log logout
+        self.cancel_pending_search()
+        self.pages.clear() # Cached pages belong to this user
         SafetyTipsApp(self.root)
 
     def show_error(self, message):
         """Show error messages on the UI."""
-        # Clear existing error messages
-        # Find the frame containing the dashboard content (which is the scrollable frame)
-        # and look for error labels within it.
-        dashboard_frame = None
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkScrollableFrame):
-                dashboard_frame = widget
-                break
-
-        if dashboard_frame:
-            for widget in dashboard_frame.winfo_children():
-                 # Check widgets within the dashboard frame and its sub-frames
-                 if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["danger"]:
-                     widget.destroy()
-
-        error = ctk.CTkLabel(dashboard_frame if dashboard_frame else self.root, text=message, text_color=COLORS["danger"])
-        error.pack(pady=10)
-        self.root.after(3000, error.destroy)
-
+        show_message(self.root, message, COLORS["danger"])
 
     def show_success(self, message):
         """Show success messages on the UI."""
-        # Clear existing success messages
-         # Find the frame containing the dashboard content (which is the scrollable frame)
-        # and look for success labels within it.
-        dashboard_frame = None
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkScrollableFrame):
-                dashboard_frame = widget
-                break
-
-        if dashboard_frame:
-            for widget in dashboard_frame.winfo_children():
-                 # Check widgets within the dashboard frame and its sub-frames
-                 if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["secondary"]:
-                     widget.destroy()
-
-
-        success = ctk.CTkLabel(dashboard_frame if dashboard_frame else self.root, text=message, text_color=COLORS["secondary"])
-        success.pack(pady=10)
-        self.root.after(3000, success.destroy)
+        show_message(self.root, message, COLORS["secondary"])
 
 
 # Admin Dashboard class
 class AdminDashboard:
     def __init__(self, root, user):
         self.root = root
+        self.worker = get_worker(root)
+        self.pages = get_pages(root)
         self.user = user
         self.admin_dashboard()
 
-    def clear_screen(self):
-        """Clear all widgets on the current screen."""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+    def create_form_frame(self):
+        """Create the padded frame used by the add and edit forms."""
+        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
+        frame.pack(pady=50, padx=200, fill="both", expand=True)
+        return frame
 
     def create_scrollable_frame(self):
         """Create a scrollable frame to hold dynamic content."""
@@ -488,7 +630,9 @@ class AdminDashboard:
 
     def admin_dashboard(self):
         """Display the admin dashboard."""
-        self.clear_screen()
+        self.pages.show("admin_dashboard", self.build_admin_dashboard)
+
+    def build_admin_dashboard(self):
         frame = self.create_scrollable_frame()
 
         title = ctk.CTkLabel(frame, text=f"Admin Dashboard - Welcome {self.user['username']}",
@@ -522,58 +666,28 @@ class AdminDashboard:
             command=self.logout
         )
         logout_button.pack(pady=20)
+        return frame
 
     def logout(self):
         """Log out the admin."""
         if self.user:
-            log_activity(self.user['id'], "Admin logged out") # Log logout
+            self.worker.submit(log_activity, self.user['id'], "Admin logged out") # Log logout
+        self.pages.clear() # Cached pages belong to this user
         SafetyTipsApp(self.root)
 
-    def manage_users(self):
+    def manage_users(self, cursors=None):
         """Allow the admin to manage users (view, add, remove)."""
-        self.clear_screen()
+        cursors = cursors or [None]
+        self.pages.show("manage_users", self.build_manage_users, refresh=lambda: self.load_users(cursors))
+
+    def build_manage_users(self):
         frame = self.create_scrollable_frame()
 
         title = ctk.CTkLabel(frame, text="Manage Users", font=("Helvetica", 20, "bold"), text_color=COLORS["primary"])
         title.pack(pady=20)
 
-        # Display users list
-        users = view_users() # Use view_users from db.py
-        if not users:
-             no_users_label = ctk.CTkLabel(frame, text="No users found.", text_color=COLORS["text"])
-             no_users_label.pack(pady=10)
-        else:
-            for user in users:
-                user_frame = ctk.CTkFrame(frame, fg_color="#2D3748")
-                user_frame.pack(fill="x", padx=10, pady=5, ipady=10)
-
-                user_label = ctk.CTkLabel(user_frame,
-                                        text=f"Username: {user['username']}, Role: {'Admin' if user['is_admin'] else 'User'}",
-                                        text_color=COLORS["text"])
-                user_label.pack(side="left", padx=10)
-
-                # Edit and delete buttons for each user
-                button_frame = ctk.CTkFrame(user_frame, fg_color="transparent")
-                button_frame.pack(side="right", padx=10)
-
-                # Prevent admin from deleting themselves
-                if user['id'] != self.user['id']:
-                    edit_button = ctk.CTkButton(
-                        button_frame, text="Edit", fg_color=COLORS["primary"], hover_color="#4338CA",
-                        command=lambda user_id=user['id']: self.edit_user(user_id)
-                    )
-                    edit_button.pack(side="left", padx=5)
-
-                    delete_button = ctk.CTkButton(
-                        button_frame, text="Delete", fg_color=COLORS["danger"], hover_color="#EF4444",
-                        command=lambda user_id=user['id']: self.remove_user(user_id)
-                    )
-                    delete_button.pack(side="left", padx=5)
-                else:
-                    # Optional: Add a label indicating the current user
-                    current_user_label = ctk.CTkLabel(button_frame, text="(Current Admin)", text_color=COLORS["accent"])
-                    current_user_label.pack(side="left", padx=5)
-
+        self.users_list_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        self.users_list_frame.pack(fill="x")
 
         # Add User Button
         add_user_button = ctk.CTkButton(
@@ -588,12 +702,60 @@ class AdminDashboard:
             command=self.admin_dashboard
         )
         back_button.pack(pady=10)
+        return frame
+
+    def load_users(self, cursors):
+        """Display one page of the users list (view_users_page from db.py)."""
+        list_frame = self.users_list_frame
+        if not list_frame.winfo_children():
+            show_loading(list_frame) # Later visits keep the old rows until new ones arrive
+
+        def on_done(page):
+            for widget in list_frame.winfo_children():
+                widget.destroy()
+            users = page['items']
+            if not users:
+                 no_users_label = ctk.CTkLabel(list_frame, text="No users found.", text_color=COLORS["text"])
+                 no_users_label.pack(pady=10)
+            else:
+                for user in users:
+                    user_frame = ctk.CTkFrame(list_frame, fg_color="#2D3748")
+                    user_frame.pack(fill="x", padx=10, pady=5, ipady=10)
+
+                    user_label = ctk.CTkLabel(user_frame,
+                                            text=f"Username: {user['username']}, Role: {'Admin' if user['is_admin'] else 'User'}",
+                                            text_color=COLORS["text"])
+                    user_label.pack(side="left", padx=10)
+
+                    # Edit and delete buttons for each user
+                    button_frame = ctk.CTkFrame(user_frame, fg_color="transparent")
+                    button_frame.pack(side="right", padx=10)
+
+                    # Prevent admin from deleting themselves
+                    if user['id'] != self.user['id']:
+                        edit_button = ctk.CTkButton(
+                            button_frame, text="Edit", fg_color=COLORS["primary"], hover_color="#4338CA",
+                            command=lambda user_id=user['id']: self.edit_user(user_id)
+                        )
+                        edit_button.pack(side="left", padx=5)
+
+                        delete_button = ctk.CTkButton(
+                            button_frame, text="Delete", fg_color=COLORS["danger"], hover_color="#EF4444",
+                            command=lambda user_id=user['id']: self.remove_user(user_id)
+                        )
+                        delete_button.pack(side="left", padx=5)
+                    else:
+                        # Optional: Add a label indicating the current user
+                        current_user_label = ctk.CTkLabel(button_frame, text="(Current Admin)", text_color=COLORS["accent"])
+                        current_user_label.pack(side="left", padx=5)
+
+            create_pager(list_frame, page, cursors, self.manage_users)
+
+        self.worker.submit(view_users_page, after=cursors[-1], on_done=on_done)
 
     def add_user_page(self):
         """Allow the admin to add a new user."""
-        self.clear_screen()
-        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
-        frame.pack(pady=50, padx=200, fill="both", expand=True)
+        frame = self.pages.show(None, self.create_form_frame) # Forms are rebuilt on every visit
 
         title = ctk.CTkLabel(frame, text="Add New User", font=("Helvetica", 20, "bold"), text_color=COLORS["primary"])
         title.pack(pady=(0, 20))
@@ -648,12 +810,15 @@ class AdminDashboard:
             self.show_error("Passwords do not match!")
             return
 
-        if add_user(username, password, is_admin): # Use add_user from db.py
-            log_activity(self.user['id'], f"Added user: {username}") # Log activity
-            self.show_success(f"User '{username}' added successfully!")
-            self.manage_users()
-        else:
-            self.show_error(f"Failed to add user '{username}'. Username might already exist.")
+        def on_done(added):
+            if added:
+                self.worker.submit(log_activity, self.user['id'], f"Added user: {username}") # Log activity
+                self.show_success(f"User '{username}' added successfully!")
+                self.manage_users()
+            else:
+                self.show_error(f"Failed to add user '{username}'. Username might already exist.")
+
+        self.worker.submit(add_user, username, password, is_admin, on_done=on_done) # Use add_user from db.py
 
     def remove_user(self, user_id):
         """Remove a user from the system."""
@@ -662,35 +827,46 @@ class AdminDashboard:
         response = confirm.get_input()
 
         if response == "YES":
-            # Fetch username before deleting for logging
-            users = view_users()
-            username_to_delete = next((u['username'] for u in users if u['id'] == user_id), "Unknown User")
+            def delete():
+                # Fetch username before deleting for logging
+                user_to_delete = get_user_by_id(user_id)
+                username_to_delete = user_to_delete['username'] if user_to_delete else "Unknown User"
+                if remove_user(user_id): # Use remove_user from db.py
+                    log_activity(self.user['id'], f"Removed user: {username_to_delete}") # Log activity
+                    return True
+                return False
+
+            def on_done(removed):
+                if removed:
+                    self.show_success(f"User removed successfully!")
+                    self.manage_users()
+                else:
+                    self.show_error(f"Failed to remove user.")
 
-            if remove_user(user_id): # Use remove_user from db.py
-                log_activity(self.user['id'], f"Removed user: {username_to_delete}") # Log activity
-                self.show_success(f"User removed successfully!")
-                self.manage_users()
-            else:
-                self.show_error(f"Failed to remove user.")
+            self.worker.submit(delete, on_done=on_done)
         else:
             self.show_error("Deletion cancelled.")
 
 
     def edit_user(self, user_id):
         """Edit user information."""
-        self.clear_screen()
-        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
-        frame.pack(pady=50, padx=200, fill="both", expand=True)
+        frame = self.pages.show(None, self.create_form_frame) # Forms are rebuilt on every visit
 
-        # Fetch current user data
-        users = view_users()
-        current_user = next((u for u in users if u['id'] == user_id), None)
+        # Fetch current user data in the background
+        loading_label = show_loading(frame)
 
-        if not current_user:
-            self.show_error("User not found!")
-            self.manage_users()
-            return
+        def on_done(current_user):
+            loading_label.destroy()
+            if not current_user:
+                self.show_error("User not found!")
+                self.manage_users()
+                return
+            self.edit_user_form(frame, user_id, current_user)
+
+        self.worker.submit(get_user_by_id, user_id, on_done=on_done)
 
+    def edit_user_form(self, frame, user_id, current_user):
+        """Fill the edit user page once the user's data has loaded."""
         title = ctk.CTkLabel(frame, text=f"Edit User: {current_user['username']}", font=("Helvetica", 20, "bold"),
                            text_color=COLORS["primary"])
         title.pack(pady=(0, 20))
@@ -759,26 +935,33 @@ class AdminDashboard:
         update_password = new_password if new_password else None # Only update password if a new one is provided
         update_admin_status = is_admin # Update admin status if checkbox exists
 
-        if update_user(user_id, new_username=update_username, new_password=update_password, is_admin=update_admin_status): # Use update_user from db.py
-            # Log activity (handle username change)
-            activity_message = f"Updated user ID: {user_id}"
-            if new_username:
-                 activity_message += f" (Username changed to: {new_username})"
-            if new_password:
-                 activity_message += " (Password updated)"
-            if self.edit_user_is_admin_var is not None: # Check if admin status was editable
-                 activity_message += f" (Admin status set to: {is_admin})"
-
-            log_activity(self.user['id'], activity_message)
-            self.show_success("User updated successfully!")
-            self.manage_users()
-        else:
-            self.show_error("Failed to update user.")
+        # Log activity (handle username change)
+        activity_message = f"Updated user ID: {user_id}"
+        if new_username:
+             activity_message += f" (Username changed to: {new_username})"
+        if new_password:
+             activity_message += " (Password updated)"
+        if self.edit_user_is_admin_var is not None: # Check if admin status was editable
+             activity_message += f" (Admin status set to: {is_admin})"
+
+        def on_done(updated):
+            if updated:
+                self.worker.submit(log_activity, self.user['id'], activity_message)
+                self.show_success("User updated successfully!")
+                self.manage_users()
+            else:
+                self.show_error("Failed to update user.")
 
+        self.worker.submit(update_user, user_id, new_username=update_username, new_password=update_password,
+                           is_admin=update_admin_status, on_done=on_done) # Use update_user from db.py
 
-    def manage_tips(self):
+
+    def manage_tips(self, cursors=None):
         """Allow the admin to manage safety tips."""
-        self.clear_screen()
+        cursors = cursors or [None]
+        self.pages.show("manage_tips", self.build_manage_tips, refresh=lambda: self.load_tips(cursors))
+
+    def build_manage_tips(self):
         frame = self.create_scrollable_frame()
 
         title = ctk.CTkLabel(frame, text="Manage Safety Tips", font=("Helvetica", 20, "bold"),
@@ -792,35 +975,8 @@ class AdminDashboard:
         )
         add_tip_button.pack(pady=10)
 
-        # Display tips in a lighter format
-        tips = get_tips()
-        if not tips:
-            no_tips_label = ctk.CTkLabel(frame, text="No safety tips available.", text_color=COLORS["text"])
-            no_tips_label.pack(pady=10)
-        else:
-            for tip in tips:
-                tip_summary_frame = ctk.CTkFrame(frame, fg_color="#2D3748")
-                tip_summary_frame.pack(fill="x", padx=10, pady=3) # Reduced vertical padding
-
-                tip_title_label = ctk.CTkLabel(tip_summary_frame, text=tip['title'], font=("Helvetica", 14, "bold"),
-                                             text_color=COLORS["accent"])
-                tip_title_label.pack(side="left", padx=10, pady=5)
-
-                # Edit and delete buttons
-                button_frame = ctk.CTkFrame(tip_summary_frame, fg_color="transparent")
-                button_frame.pack(side="right", padx=10)
-
-                edit_button = ctk.CTkButton(
-                    button_frame, text="Edit", fg_color=COLORS["primary"], hover_color="#4338CA", width=70, # Reduced width
-                    command=lambda tip_id=tip['tip_id']: self.edit_tip(tip_id)
-                )
-                edit_button.pack(side="left", padx=5)
-
-                delete_button = ctk.CTkButton(
-                    button_frame, text="Delete", fg_color=COLORS["danger"], hover_color="#EF4444", width=70, # Reduced width
-                    command=lambda tip_id=tip['tip_id']: self.delete_tip(tip_id)
-                )
-                delete_button.pack(side="left", padx=5)
+        self.tips_list_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        self.tips_list_frame.pack(fill="x")
 
         # Back to Admin Dashboard
         back_button = ctk.CTkButton(
@@ -828,13 +984,54 @@ class AdminDashboard:
             command=self.admin_dashboard
         )
         back_button.pack(pady=10)
+        return frame
+
+    def load_tips(self, cursors):
+        """Display one page of tips in a lighter format."""
+        list_frame = self.tips_list_frame
+        if not list_frame.winfo_children():
+            show_loading(list_frame) # Later visits keep the old rows until new ones arrive
+
+        def on_done(page):
+            for widget in list_frame.winfo_children():
+                widget.destroy()
+            tips = page['items']
+            if not tips:
+                no_tips_label = ctk.CTkLabel(list_frame, text="No safety tips available.", text_color=COLORS["text"])
+                no_tips_label.pack(pady=10)
+            else:
+                for tip in tips:
+                    tip_summary_frame = ctk.CTkFrame(list_frame, fg_color="#2D3748")
+                    tip_summary_frame.pack(fill="x", padx=10, pady=3) # Reduced vertical padding
+
+                    tip_title_label = ctk.CTkLabel(tip_summary_frame, text=tip['title'], font=("Helvetica", 14, "bold"),
+                                                 text_color=COLORS["accent"])
+                    tip_title_label.pack(side="left", padx=10, pady=5)
+
+                    # Edit and delete buttons
+                    button_frame = ctk.CTkFrame(tip_summary_frame, fg_color="transparent")
+                    button_frame.pack(side="right", padx=10)
+
+                    edit_button = ctk.CTkButton(
+                        button_frame, text="Edit", fg_color=COLORS["primary"], hover_color="#4338CA", width=70, # Reduced width
+                        command=lambda tip_id=tip['tip_id']: self.edit_tip(tip_id)
+                    )
+                    edit_button.pack(side="left", padx=5)
+
+                    delete_button = ctk.CTkButton(
+                        button_frame, text="Delete", fg_color=COLORS["danger"], hover_color="#EF4444", width=70, # Reduced width
+                        command=lambda tip_id=tip['tip_id']: self.delete_tip(tip_id)
+                    )
+                    delete_button.pack(side="left", padx=5)
+
+            create_pager(list_frame, page, cursors, self.manage_tips)
+
+        self.worker.submit(get_tips_page, after=cursors[-1], on_done=on_done)
 
 
     def add_tip_page(self):
         """Allow the admin to add a new safety tip."""
-        self.clear_screen()
-        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
-        frame.pack(pady=50, padx=200, fill="both", expand=True)
+        frame = self.pages.show(None, self.create_form_frame) # Forms are rebuilt on every visit
 
         title = ctk.CTkLabel(frame, text="Add New Safety Tip", font=("Helvetica", 20, "bold"),
                            text_color=COLORS["primary"])
@@ -873,28 +1070,42 @@ class AdminDashboard:
             self.show_error("Title and content cannot be empty!")
             return
 
-        if add_tip(title, content.strip()): # Use add_tip from db.py
-            log_activity(self.user['id'], f"Added safety tip: '{title}'") # Log activity
-            self.show_success("Safety tip added successfully!")
-            self.manage_tips() # Navigate back to manage tips after successful addition
-        else:
-            self.show_error("Failed to add safety tip.")
+        def add():
+            if add_tip(title, content.strip()): # Use add_tip from db.py
+                return 'added'
+            return 'duplicate' if tip_exists(title, content.strip()) else 'failed'
+
+        def on_done(result):
+            if result == 'added':
+                self.worker.submit(log_activity, self.user['id'], f"Added safety tip: '{title}'") # Log activity
+                self.show_success("Safety tip added successfully!")
+                self.manage_tips() # Navigate back to manage tips after successful addition
+            elif result == 'duplicate':
+                self.show_error("Tip already exists!")
+            else:
+                self.show_error("Failed to add safety tip.")
+
+        self.worker.submit(add, on_done=on_done)
 
     def edit_tip(self, tip_id):
         """Edit an existing safety tip."""
-        self.clear_screen()
-        frame = ctk.CTkFrame(self.root, fg_color=COLORS["background"])
-        frame.pack(pady=50, padx=200, fill="both", expand=True)
+        frame = self.pages.show(None, self.create_form_frame) # Forms are rebuilt on every visit
 
-        # Fetch the current tip data
-        tips = get_tips()
-        current_tip = next((t for t in tips if t['tip_id'] == tip_id), None)
+        # Fetch the current tip data in the background
+        loading_label = show_loading(frame)
 
-        if not current_tip:
-            self.show_error("Safety tip not found!")
-            self.manage_tips()
-            return
+        def on_done(current_tip):
+            loading_label.destroy()
+            if not current_tip:
+                self.show_error("Safety tip not found!")
+                self.manage_tips()
+                return
+            self.edit_tip_form(frame, tip_id, current_tip)
 
+        self.worker.submit(get_tip_by_id, tip_id, on_done=on_done)
+
+    def edit_tip_form(self, frame, tip_id, current_tip):
+        """Fill the edit tip page once the tip has loaded."""
 
         title = ctk.CTkLabel(frame, text=f"Edit Safety Tip", font=("Helvetica", 20, "bold"),
                            text_color=COLORS["primary"])
@@ -936,12 +1147,15 @@ class AdminDashboard:
             self.show_error("Title and content cannot be empty!")
             return
 
-        if db_update_tip(tip_id, title, content.strip()): # Use db_update_tip from db.py
-            log_activity(self.user['id'], f"Updated safety tip ID: {tip_id} ('{title}')") # Log activity
-            self.show_success("Safety tip updated successfully!")
-            self.manage_tips()
-        else:
-            self.show_error("Failed to update safety tip.")
+        def on_done(updated):
+            if updated:
+                self.worker.submit(log_activity, self.user['id'], f"Updated safety tip ID: {tip_id} ('{title}')") # Log activity
+                self.show_success("Safety tip updated successfully!")
+                self.manage_tips()
+            else:
+                self.show_error("Failed to update safety tip.")
+
+        self.worker.submit(db_update_tip, tip_id, title, content.strip(), on_done=on_done) # Use db_update_tip from db.py
 
     def delete_tip(self, tip_id):
         """Delete a safety tip."""
@@ -950,53 +1164,81 @@ class AdminDashboard:
         response = confirm.get_input()
 
         if response == "YES":
-            # Fetch tip title before deleting for logging
-            tips = get_tips()
-            tip_title_to_delete = next((t['title'] for t in tips if t['tip_id'] == tip_id), "Unknown Tip")
+            def delete():
+                # Fetch tip title before deleting for logging
+                tip_to_delete = get_tip_by_id(tip_id)
+                tip_title_to_delete = tip_to_delete['title'] if tip_to_delete else "Unknown Tip"
+                if db_remove_tip(tip_id): # Use db_remove_tip from db.py
+                    log_activity(self.user['id'], f"Deleted safety tip: '{tip_title_to_delete}' (ID: {tip_id})") # Log activity
+                    return True
+                return False
+
+            def on_done(removed):
+                if removed:
+                    self.show_success("Safety tip deleted successfully!")
+                    self.manage_tips()
+                else:
+                    self.show_error("Failed to delete safety tip.")
 
-            if db_remove_tip(tip_id): # Use db_remove_tip from db.py
-                log_activity(self.user['id'], f"Deleted safety tip: '{tip_title_to_delete}' (ID: {tip_id})") # Log activity
-                self.show_success("Safety tip deleted successfully!")
-                self.manage_tips()
-            else:
-                self.show_error("Failed to delete safety tip.")
+            self.worker.submit(delete, on_done=on_done)
         else:
             self.show_error("Deletion cancelled.")
 
 
-    def view_activities(self):
+    def view_activities(self, cursors=None):
         """View system activities."""
-        self.clear_screen()
+        cursors = cursors or [None]
+        self.pages.show("view_activities", self.build_view_activities,
+                        refresh=lambda: self.load_activities(cursors))
+
+    def build_view_activities(self):
         frame = self.create_scrollable_frame()
 
         title = ctk.CTkLabel(frame, text="System Activities", font=("Helvetica", 20, "bold"),
                            text_color=COLORS["primary"])
         title.pack(pady=20)
 
-        activities = view_activities() # Use view_activities from db.py
-        if not activities:
-            no_activities_label = ctk.CTkLabel(frame, text="No activities found.", text_color=COLORS["text"])
-            no_activities_label.pack(pady=10)
-        else:
-            for activity in activities:
-                activity_frame = ctk.CTkFrame(frame, fg_color="#2D3748")
-                activity_frame.pack(fill="x", padx=10, pady=5, ipady=10)
+        # Filters are applied by the database, not by scanning rows here
+        filter_frame = ctk.CTkFrame(frame, fg_color="#2D3748")
+        filter_frame.pack(fill="x", padx=10, pady=10)
 
-                # Ensure timestamp is formatted nicely
-                timestamp_str = activity['timestamp'].strftime("%Y-%m-%d %H:%M:%S") if isinstance(activity['timestamp'], datetime) else str(activity['timestamp'])
+        self.activity_user_entry = ctk.CTkEntry(filter_frame, width=120, fg_color="#1E293B", border_color=COLORS["primary"],
+                                                placeholder_text="Username")
+        self.activity_user_entry.pack(side="left", padx=5, pady=5)
 
-                # Get username from user_id
-                username = "Unknown User"
-                users = view_users()
-                for user in users:
-                    if user['id'] == activity['user_id']:
-                        username = user['username']
-                        break
+        self.activity_action_var = ctk.StringVar(value="All actions")
+        action_menu = ctk.CTkOptionMenu(filter_frame, variable=self.activity_action_var, width=120,
+                                        values=["All actions"] + [action.capitalize() for action in ACTIVITY_ACTIONS],
+                                        fg_color=COLORS["primary"])
+        action_menu.pack(side="left", padx=5, pady=5)
 
-                activity_text = f"{timestamp_str} - {username}: {activity['activity']}"
-                activity_label = ctk.CTkLabel(activity_frame, text=activity_text, text_color=COLORS["text"],
-                                            wraplength=800, justify="left")
-                activity_label.pack(anchor="w", padx=10, pady=5)
+        self.activity_from_entry = ctk.CTkEntry(filter_frame, width=110, fg_color="#1E293B", border_color=COLORS["primary"],
+                                                placeholder_text="From YYYY-MM-DD")
+        self.activity_from_entry.pack(side="left", padx=5, pady=5)
+
+        self.activity_to_entry = ctk.CTkEntry(filter_frame, width=110, fg_color="#1E293B", border_color=COLORS["primary"],
+                                              placeholder_text="To YYYY-MM-DD")
+        self.activity_to_entry.pack(side="left", padx=5, pady=5)
+
+        self.activity_text_entry = ctk.CTkEntry(filter_frame, fg_color="#1E293B", border_color=COLORS["primary"],
+                                                placeholder_text="Contains text")
+        self.activity_text_entry.pack(side="left", padx=5, pady=5, expand=True, fill="x")
+        self.activity_text_entry.bind("<Return>", lambda event=None: self.view_activities())
+
+        filter_button = ctk.CTkButton(
+            filter_frame, text="Filter", fg_color=COLORS["primary"], hover_color="#4338CA", width=80,
+            command=self.view_activities
+        )
+        filter_button.pack(side="left", padx=5, pady=5)
+
+        export_button = ctk.CTkButton(
+            filter_frame, text="Export", fg_color=COLORS["secondary"], hover_color="#0D9488", width=80,
+            command=self.export_activities
+        )
+        export_button.pack(side="left", padx=5, pady=5)
+
+        self.activities_list_frame = ctk.CTkFrame(frame, fg_color="transparent")
+        self.activities_list_frame.pack(fill="x")
 
         # Back button
         back_button = ctk.CTkButton(
@@ -1004,65 +1246,109 @@ class AdminDashboard:
             command=self.admin_dashboard
         )
         back_button.pack(pady=20)
+        return frame
+
+    def activity_filters(self):
+        """Read the filter bar into get_activity_feed arguments, or None if a date is invalid."""
+        filters = {}
+        username = self.activity_user_entry.get().strip()
+        if username:
+            filters['username'] = username
+        action = self.activity_action_var.get()
+        if action != "All actions":
+            filters['action'] = action.lower()
+        text = self.activity_text_entry.get().strip()
+        if text:
+            filters['text'] = text
+        try:
+            start = self.activity_from_entry.get().strip()
+            if start:
+                filters['start'] = datetime.strptime(start, "%Y-%m-%d")
+            end = self.activity_to_entry.get().strip()
+            if end:
+                filters['end'] = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) # Include the whole day
+        except ValueError:
+            self.show_error("Dates must look like YYYY-MM-DD.")
+            return None
+        return filters
+
+    def export_activities(self):
+        """Save every activity matching the filter bar to a CSV or JSONL file."""
+        filters = self.activity_filters()
+        if filters is None:
+            return
+        from tkinter import filedialog # Only needed once someone exports
+        path = filedialog.asksaveasfilename(
+            title="Export activities", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Compressed CSV", "*.csv.gz")]
+        )
+        if not path:
+            return
+        from export import export_activity_feed
 
-    def show_error(self, message):
-        """Show error messages on the UI."""
-        # Clear existing error messages
-        # Find the frame containing the dashboard content (which is the scrollable frame)
-        # and look for error labels within it.
-        dashboard_frame = None
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkScrollableFrame):
-                dashboard_frame = widget
-                break
+        def on_done(stats):
+            self.show_success(f"Exported {stats['rows']} activities ({stats['rows_per_sec']:.0f} rows/sec).")
 
-        if dashboard_frame:
-            for widget in dashboard_frame.winfo_children():
-                 # Check widgets within the dashboard frame and its sub-frames
-                 if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["danger"]:
-                     widget.destroy()
-                 # Also check within nested frames like the search frame
-                 if isinstance(widget, ctk.CTkFrame):
-                      for sub_widget in widget.winfo_children():
-                           if isinstance(sub_widget, ctk.CTkLabel) and sub_widget.cget("text_color") == COLORS["danger"]:
-                                sub_widget.destroy()
+        def on_error(error):
+            self.show_error(f"Export failed: {error}")
 
+        # Streams page by page on the worker, so the window stays responsive for large logs
+        self.worker.submit(export_activity_feed, path, on_done=on_done, on_error=on_error, **filters)
 
-        error = ctk.CTkLabel(dashboard_frame if dashboard_frame else self.root, text=message, text_color=COLORS["danger"])
-        error.pack(pady=10)
-        self.root.after(3000, error.destroy)
+    def load_activities(self, cursors):
+        """Display one page of the activity log."""
+        list_frame = self.activities_list_frame
+        filters = self.activity_filters()
+        if filters is None:
+            return
+        if not list_frame.winfo_children():
+            show_loading(list_frame) # Later visits keep the old rows until new ones arrive
 
+        def on_done(page):
+            for widget in list_frame.winfo_children():
+                widget.destroy()
+            activities = page['items']
+            if not activities:
+                no_activities_label = ctk.CTkLabel(list_frame, text="No activities found.", text_color=COLORS["text"])
+                no_activities_label.pack(pady=10)
+            else:
+                for activity in activities:
+                    activity_frame = ctk.CTkFrame(list_frame, fg_color="#2D3748")
+                    activity_frame.pack(fill="x", padx=10, pady=5, ipady=10)
 
-    def show_success(self, message):
-        """Show success messages on the UI."""
-        # Clear existing success messages
-         # Find the frame containing the dashboard content (which is the scrollable frame)
-        # and look for success labels within it.
-        dashboard_frame = None
-        for widget in self.root.winfo_children():
-            if isinstance(widget, ctk.CTkScrollableFrame):
-                dashboard_frame = widget
-                break
+                    # Ensure timestamp is formatted nicely
+                    timestamp_str = activity['timestamp'].strftime("%Y-%m-%d %H:%M:%S") if isinstance(activity['timestamp'], datetime) else str(activity['timestamp'])
+
+                    username = activity['username'] or "Unknown User"
+                    activity_text = f"{timestamp_str} - {username}: {activity['activity']}"
+                    activity_label = ctk.CTkLabel(activity_frame, text=activity_text, text_color=COLORS["text"],
+                                                wraplength=800, justify="left")
+                    activity_label.pack(anchor="w", padx=10, pady=5)
 
-        if dashboard_frame:
-            for widget in dashboard_frame.winfo_children():
-                 # Check widgets within the dashboard frame and its sub-frames
-                 if isinstance(widget, ctk.CTkLabel) and widget.cget("text_color") == COLORS["secondary"]:
-                     widget.destroy()
-                 # Also check within nested frames like the search frame
-                 if isinstance(widget, ctk.CTkFrame):
-                      for sub_widget in widget.winfo_children():
-                           if isinstance(sub_widget, ctk.CTkLabel) and sub_widget.cget("text_color") == COLORS["secondary"]:
-                                sub_widget.destroy()
+            create_pager(list_frame, page, cursors, self.view_activities)
 
+        self.worker.submit(get_activity_feed, after=cursors[-1], on_done=on_done, **filters)
 
-        success = ctk.CTkLabel(dashboard_frame if dashboard_frame else self.root, text=message, text_color=COLORS["secondary"])
-        success.pack(pady=10)
-        self.root.after(3000, success.destroy)
+    def show_error(self, message):
+        """Show error messages on the UI."""
+        show_message(self.root, message, COLORS["danger"])
+
+    def show_success(self, message):
+        """Show success messages on the UI."""
+        show_message(self.root, message, COLORS["secondary"])
 
 
 # Main application entry point
 if __name__ == "__main__":
+    start_activity_writer() # Log activities in the background instead of on the UI thread
     root = ctk.CTk()
     app = SafetyTipsApp(root)
-    root.mainloop()
\ No newline at end of file
+    # Open and migrate the database while the login page draws; the first query waits for it if needed
+    get_worker(root).submit(open_database)
+    # Map and paint the login page now; the mark then runs on the first turn of the event loop
+    root.update_idletasks()
+    root.after(0, lambda: startup.mark("first frame drawn"))
+    root.mainloop()
+    get_worker(root).shutdown() # Let in-flight database calls finish
+    stop_activity_writer() # Write any queued activities before exiting
+    close_pool() # Release pooled database connections on exit
\ No newline at end of file
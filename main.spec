@@ -26,7 +26,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False, # Compressed binaries are unpacked on every launch, slowing startup
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
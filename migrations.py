@@ -0,0 +1,245 @@
+"""Versioned schema migrations for safety.db.
+
+The schema version lives in PRAGMA user_version. Each entry in
+MIGRATIONS runs once, in its own transaction, and bumps the version when
+it commits, so opening an up-to-date database costs a single pragma read.
+db.get_pool() runs migrate() when it opens a database; nothing needs to
+call it by hand.
+
+Migrations are never edited once released: change the schema by
+appending a new one.
+
+    python migrations.py            # migrate safety.db and print the version
+    python migrations.py --db other.db
+"""
+import sqlite3
+
+import db as database
+from passwords import hash_password
+
+
+def reconcile_legacy_tips(cursor):
+    """Rebuild a tips(id, ...) table left by old versions of data.py as Tips(tip_id, ...).
+
+    Table names are case-insensitive, so when data.py ran first db.py's
+    CREATE TABLE IF NOT EXISTS Tips silently kept the wrong columns.
+    """
+    columns = [column[1] for column in cursor.execute('PRAGMA table_info(Tips)').fetchall()]
+    if not columns or 'tip_id' in columns:
+        return
+    cursor.execute('ALTER TABLE Tips RENAME TO TipsLegacy')
+    create_tips_table(cursor)
+    cursor.execute('''
+        INSERT INTO Tips (tip_id, title, content, created_at)
+        SELECT id, title, content, COALESCE(created_at, CURRENT_TIMESTAMP) FROM TipsLegacy
+    ''')
+    cursor.execute('DROP TABLE TipsLegacy')
+
+
+def create_tips_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Tips (
+            tip_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def base_schema(cursor):
+    reconcile_legacy_tips(cursor)
+
+    # Users Table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            is_admin BOOLEAN DEFAULT FALSE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Activities Table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS Activities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            activity TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Tips Table
+    create_tips_table(cursor)
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON Users(username)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tips_title ON Tips(title)')
+
+
+def listing_indexes(cursor):
+    # Keyset pagination walks these in (created_at, id) order
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tips_created_at ON Tips(created_at, tip_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_created_at ON Users(created_at, id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_activities_timestamp ON Activities(timestamp, id)')
+    # Activity feed: per-user and whole-log scans, both newest first
+    cursor.execute('DROP INDEX IF EXISTS idx_activities_user_id')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_activities_user_timestamp ON Activities(user_id, timestamp, id)')
+
+
+def tip_search_index(cursor):
+    """Create the TipsFts index and its sync triggers, backfilling it from Tips.
+
+    Skipped with a warning when the SQLite build has no FTS5 module;
+    searches then fall back to LIKE matching.
+    """
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'TipsFts'"
+    ).fetchone() is not None
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS TipsFts USING fts5(
+                title, content,
+                content='Tips', content_rowid='tip_id',
+                tokenize='porter unicode61', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Full-text search unavailable, using LIKE search: {e}")
+        return
+
+    # Keep the index in step with add_tip/update_tip/remove_tip
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tips_fts_insert AFTER INSERT ON Tips BEGIN
+            INSERT INTO TipsFts (rowid, title, content) VALUES (new.tip_id, new.title, new.content);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tips_fts_delete AFTER DELETE ON Tips BEGIN
+            INSERT INTO TipsFts (TipsFts, rowid, title, content)
+            VALUES ('delete', old.tip_id, old.title, old.content);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS tips_fts_update AFTER UPDATE ON Tips BEGIN
+            INSERT INTO TipsFts (TipsFts, rowid, title, content)
+            VALUES ('delete', old.tip_id, old.title, old.content);
+            INSERT INTO TipsFts (rowid, title, content) VALUES (new.tip_id, new.title, new.content);
+        END
+    ''')
+
+    if not exists:
+        # Title matches outrank content matches
+        cursor.execute("INSERT INTO TipsFts (TipsFts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+        cursor.execute("INSERT INTO TipsFts (TipsFts) VALUES ('rebuild')")
+
+
+def tip_content_hashes(cursor):
+    """Add the Tips.content_hash column used to skip duplicate tips, filling it for existing rows."""
+    columns = [column[1] for column in cursor.execute('PRAGMA table_info(Tips)').fetchall()]
+    if 'content_hash' not in columns:
+        cursor.execute('ALTER TABLE Tips ADD COLUMN content_hash TEXT')
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_tips_content_hash
+        ON Tips(content_hash) WHERE content_hash IS NOT NULL
+    ''')
+    cursor.execute('SELECT tip_id, title, content FROM Tips WHERE content_hash IS NULL')
+    hashes = [(database.tip_content_hash(title, content), tip_id) for tip_id, title, content in cursor.fetchall()]
+    # Exact duplicates already in the table keep a NULL hash
+    cursor.executemany('UPDATE OR IGNORE Tips SET content_hash = ? WHERE tip_id = ?', hashes)
+
+
+def tips_generation(cursor):
+    # Bumped by triggers on every Tips write so caches in any process can notice
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS TipsGeneration (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('INSERT OR IGNORE INTO TipsGeneration (id, generation) VALUES (1, 0)')
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS tips_generation_{event.lower()} AFTER {event} ON Tips BEGIN
+                UPDATE TipsGeneration SET generation = generation + 1 WHERE id = 1;
+            END
+        ''')
+
+
+def default_admin(cursor):
+    if cursor.execute("SELECT 1 FROM Users WHERE username = 'ADMIN'").fetchone():
+        return
+    cursor.execute('INSERT INTO Users (username, password, is_admin) VALUES (?, ?, ?)',
+                   ('ADMIN', hash_password('#sbm@86140764'), True))
+
+
+def space_separated_timestamps(cursor):
+    # Datetimes used to be bound as ISO text with a 'T' separator, which sorts
+    # after every CURRENT_TIMESTAMP value and skews range comparisons
+    for table, column in (('Activities', 'timestamp'), ('Tips', 'created_at'), ('Users', 'created_at')):
+        cursor.execute(f'''
+            UPDATE {table} SET {column} = replace({column}, 'T', ' ')
+            WHERE {column} LIKE '____-__-__T%'
+        ''')
+
+
+# (version, description, step). Versions are consecutive from 1. Every step
+# tolerates objects that already exist, because databases created before
+# migrations start at version 0 with most of the schema in place.
+MIGRATIONS = [
+    (1, "base tables", base_schema),
+    (2, "listing and activity feed indexes", listing_indexes),
+    (3, "full-text tip search", tip_search_index),
+    (4, "tip content hashes", tip_content_hashes),
+    (5, "tips generation counter", tips_generation),
+    (6, "default admin account", default_admin),
+    (7, "space-separated timestamps", space_separated_timestamps),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, target=LATEST_VERSION):
+    """Apply pending migrations on conn up to target; return the resulting version."""
+    version = schema_version(conn)
+    if version >= target:
+        return version  # Fast path: nothing to do
+    for number, description, step in MIGRATIONS:
+        if number > target:
+            break
+        # Take the write lock first, then re-check: another process may have
+        # applied this migration while we waited
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if schema_version(conn) >= number:
+                conn.rollback()
+                continue
+            step(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {number}')
+            conn.commit()
+        except sqlite3.DatabaseError as e:
+            conn.rollback()
+            print(f"Migration {number} ({description}) failed: {e}")
+            raise
+
+    return schema_version(conn)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Bring a Safety Tips database up to the latest schema.")
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.configure_pool(path=args.db)  # Opening the pool migrates it
+    with database.db_connection() as conn:
+        print(f"{args.db} is at schema version {schema_version(conn)} (latest {LATEST_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
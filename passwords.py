@@ -0,0 +1,231 @@
+"""Salted, tunable password hashing for Users.password.
+
+Hashes are stored as self-describing strings, so the cost can be raised
+later without invalidating passwords that are already stored:
+
+    scrypt$16384$8$1$<salt>$<hash>
+    pbkdf2_sha256$600000$<salt>$<hash>
+
+Bare 64-character hex strings are the unsalted SHA-256 hashes written by
+earlier versions. They still verify, and authenticate_user replaces them
+(and any hash made with outdated parameters) after the next successful
+login. Verification runs on a small worker pool so a burst of logins
+cannot pin every database thread inside the KDF at once.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+VERIFY_WORKERS = min(4, os.cpu_count() or 1)
+SALT_SIZE = 16
+MAX_SCRYPT_MEMORY = 1 << 30  # Refuse stored parameters that would need more than this to verify
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4), validate=True)
+
+
+def _count(text):
+    """Parse a positive decimal parameter; int() alone would accept signs, spaces and underscores."""
+    if not (text.isascii() and text.isdigit()) or int(text) < 1:
+        raise ValueError(f"Bad hash parameter: {text!r}")
+    return int(text)
+
+
+def _salt_and_digest(salt, digest, dklen):
+    salt, digest = _unb64(salt), _unb64(digest)
+    if len(salt) != SALT_SIZE:
+        raise ValueError(f"Salt is {len(salt)} bytes, expected {SALT_SIZE}")
+    if len(digest) != dklen:
+        raise ValueError(f"Digest is {len(digest)} bytes, expected {dklen}")
+    return salt, digest
+
+
+class ScryptHasher:
+    """hashlib.scrypt with cost n, block size r and parallelism p."""
+    algorithm = 'scrypt'
+
+    def __init__(self, n=2 ** 14, r=8, p=1, dklen=32):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.dklen = dklen
+
+    def _derive(self, password, salt, n, r, p, dklen):
+        return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r * p, dklen=dklen)
+
+    def hash(self, password, salt=None):
+        salt = salt or os.urandom(SALT_SIZE)
+        digest = self._derive(password, salt, self.n, self.r, self.p, self.dklen)
+        return f'{self.algorithm}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(digest)}'
+
+    def parse(self, encoded):
+        """Split an encoded hash into (n, r, p, salt, digest); ValueError if it is malformed."""
+        parts = encoded.split('$')
+        if len(parts) != 6 or parts[0] != self.algorithm:
+            raise ValueError("Not a scrypt hash")
+        n, r, p = (_count(part) for part in parts[1:4])
+        if n < 2 or n & (n - 1):
+            raise ValueError(f"scrypt n must be a power of two, got {n}")
+        if 128 * n * r * p > MAX_SCRYPT_MEMORY:
+            raise ValueError("scrypt parameters need too much memory")
+        return (n, r, p, *_salt_and_digest(parts[4], parts[5], self.dklen))
+
+    def verify(self, password, encoded):
+        n, r, p, salt, expected = self.parse(encoded)
+        actual = self._derive(password, salt, n, r, p, len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, encoded):
+        n, r, p, _, _ = self.parse(encoded)
+        return (n, r, p) != (self.n, self.r, self.p)
+
+    def __repr__(self):
+        return f'ScryptHasher(n={self.n}, r={self.r}, p={self.p})'
+
+
+class Pbkdf2Hasher:
+    """hashlib.pbkdf2_hmac over SHA-256 with a configurable iteration count."""
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations=600000, dklen=32):
+        self.iterations = iterations
+        self.dklen = dklen
+
+    def hash(self, password, salt=None):
+        salt = salt or os.urandom(SALT_SIZE)
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, self.iterations, self.dklen)
+        return f'{self.algorithm}${self.iterations}${_b64(salt)}${_b64(digest)}'
+
+    def parse(self, encoded):
+        """Split an encoded hash into (iterations, salt, digest); ValueError if it is malformed."""
+        parts = encoded.split('$')
+        if len(parts) != 4 or parts[0] != self.algorithm:
+            raise ValueError("Not a pbkdf2_sha256 hash")
+        return (_count(parts[1]), *_salt_and_digest(parts[2], parts[3], self.dklen))
+
+    def verify(self, password, encoded):
+        iterations, salt, expected = self.parse(encoded)
+        actual = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations, len(expected))
+        return hmac.compare_digest(actual, expected)
+
+    def needs_rehash(self, encoded):
+        return self.parse(encoded)[0] != self.iterations
+
+    def __repr__(self):
+        return f'Pbkdf2Hasher(iterations={self.iterations})'
+
+
+class LegacySha256Hasher:
+    """Verify-only support for the old unsalted hex SHA-256 hashes."""
+    algorithm = 'sha256'
+
+    def hash(self, password, salt=None):
+        raise ValueError("Unsalted SHA-256 is only supported for verifying old hashes")
+
+    def parse(self, encoded):
+        """Return the hex digest; ValueError unless it is 64 lowercase hex characters."""
+        if len(encoded) != 64 or any(c not in '0123456789abcdef' for c in encoded):
+            raise ValueError("Not an unsalted SHA-256 hash")
+        return encoded
+
+    def verify(self, password, encoded):
+        return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), self.parse(encoded))
+
+    def needs_rehash(self, encoded):
+        return True
+
+
+HASHERS = {hasher.algorithm: hasher for hasher in (ScryptHasher, Pbkdf2Hasher, LegacySha256Hasher)}
+
+_hasher = ScryptHasher()
+_verify_pool = None
+_pool_lock = threading.Lock()
+
+
+def algorithm_of(encoded):
+    """Name of the algorithm that produced an encoded hash."""
+    if '$' not in encoded:
+        return LegacySha256Hasher.algorithm
+    return encoded.split('$', 1)[0]
+
+
+def configure(hasher=None, verify_workers=None):
+    """Choose the hasher used for new hashes and/or resize the verify pool."""
+    global _hasher, _verify_pool, VERIFY_WORKERS
+    if hasher is not None:
+        _hasher = hasher
+    if verify_workers is not None and verify_workers != VERIFY_WORKERS:
+        with _pool_lock:
+            VERIFY_WORKERS = verify_workers
+            if _verify_pool is not None:
+                _verify_pool.shutdown(wait=False)
+                _verify_pool = None
+
+
+def get_hasher():
+    return _hasher
+
+
+def hash_password(password, salt=None):
+    """Hash password with the configured hasher and a fresh random salt.
+
+    Pass salt (SALT_SIZE bytes) only for reproducible test data; real
+    accounts must always get a random one.
+    """
+    return _hasher.hash(password, salt)
+
+
+def _hasher_for(encoded):
+    algorithm = algorithm_of(encoded)
+    if algorithm == _hasher.algorithm:
+        return _hasher
+    hasher = HASHERS.get(algorithm)
+    if hasher is None:
+        raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+    return hasher()
+
+
+def is_valid_hash(encoded):
+    """True if encoded is a well-formed hash this module can verify: algorithm, parameters, salt and digest."""
+    try:
+        _hasher_for(encoded).parse(encoded)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def _verify(password, encoded):
+    try:
+        return _hasher_for(encoded).verify(password, encoded)
+    except (ValueError, TypeError) as e:
+        print(f"Unreadable password hash: {e}")
+        return False
+
+
+def verify_password(password, encoded):
+    """Check password against an encoded hash on the verify pool; blocks until done."""
+    global _verify_pool
+    with _pool_lock:
+        if _verify_pool is None:
+            _verify_pool = ThreadPoolExecutor(VERIFY_WORKERS, thread_name_prefix='password-verify')
+        future = _verify_pool.submit(_verify, password, encoded)
+    return future.result()
+
+
+def needs_rehash(encoded):
+    """True if encoded was not made by the configured hasher with its current parameters."""
+    if algorithm_of(encoded) != _hasher.algorithm:
+        return True
+    try:
+        return _hasher.needs_rehash(encoded)
+    except (ValueError, TypeError):
+        return True
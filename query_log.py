@@ -0,0 +1,322 @@
+"""Per-statement timing for the connections db.py hands out.
+
+ConnectionPool opens its connections with factory=InstrumentedConnection,
+so every execute() and executemany() is timed, including the time spent
+fetching its rows. A statement's timing closes when its rows run out, its
+cursor is closed or re-executed, or the cursor is garbage collected after
+being abandoned part way. Statements are grouped by a fingerprint of their
+SQL (literals replaced with ?, whitespace collapsed), and each group counts
+calls, total and worst duration and rows.
+
+A statement slower than the threshold (100 ms by default) is appended to
+the slow-query log as one JSON line with its EXPLAIN QUERY PLAN and the
+db.py function that ran it, which is only looked up once a statement turns
+out slow; its group counts slow calls per caller. Parameters are never
+logged, since some of them are password hashes. The log is written next
+to the database unless configure() is given a path with a directory.
+
+    query_log.configure(slow_ms=50, slow_log='/var/log/safety/slow_queries.log')
+    query_log.stats()            # per-statement aggregates, slowest total first
+    query_log.dump('queries.json')
+
+Setting SAFETY_QUERY_STATS=<path> dumps the aggregates there when the
+process exits.
+"""
+import atexit
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+SLOW_MS = 100.0
+SLOW_LOG = 'slow_queries.log'
+
+_slow_ms = SLOW_MS
+_slow_log = SLOW_LOG
+_enabled = True
+_stats = {}  # fingerprint -> aggregate dict
+_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+_fingerprints = {}  # sql text -> fingerprint; the same few statements run over and over
+
+# Frames from these modules are plumbing, not the caller worth reporting
+_SKIP_MODULES = {__name__, 'contextlib', 'threading', 'concurrent.futures.thread'}
+
+
+def configure(slow_ms=None, slow_log=None, enabled=None):
+    """Change the slow threshold (ms), the slow log path ('' to stop logging) or turn timing off.
+
+    A bare file name for slow_log is placed next to the database.
+    """
+    global _slow_ms, _slow_log, _enabled
+    if slow_ms is not None:
+        _slow_ms = slow_ms
+    if slow_log is not None:
+        _slow_log = slow_log or None
+    if enabled is not None:
+        _enabled = enabled
+
+
+def fingerprint(sql):
+    """Normalize sql so statements differing only in literals share one entry."""
+    cached = _fingerprints.get(sql)
+    if cached is None:
+        text = _STRING.sub('?', sql)
+        text = _NUMBER.sub('?', text)
+        text = _SPACE.sub(' ', text).strip()
+        cached = _IN_LIST.sub('IN (...)', text)
+        if len(_fingerprints) < 10000:
+            _fingerprints[sql] = cached
+    return cached
+
+
+def _caller():
+    """The nearest public module-level function outside the plumbing, as 'module.function'.
+
+    Private helpers, methods, lambdas and nested functions are skipped, so a
+    query run by _load_tips_page through TipCache.get is reported as
+    db.get_tips_page. Walking the stack costs microseconds, so it is only
+    done for statements that have turned out slow, while their caller (or,
+    for rows fetched through a generator such as _iter_rows, its consumer)
+    is still running.
+    """
+    frame = sys._getframe(1)
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '')
+        name = frame.f_code.co_name
+        if module not in _SKIP_MODULES:
+            if fallback is None:
+                fallback = f'{module}.{name}'
+            function = frame.f_globals.get(name)
+            if not name.startswith('_') and getattr(function, '__code__', None) is frame.f_code:
+                return f'{module}.{name}'
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+def _record(statement, seconds, rows):
+    """Add time and rows from one step of a statement to its aggregate."""
+    with _lock:
+        entry = _stats.get(statement.fingerprint)
+        if entry is None:
+            entry = _stats[statement.fingerprint] = {
+                'sql': statement.fingerprint, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'rows': 0, 'slow': 0, 'slow_callers': {},
+            }
+        if not statement.counted:
+            statement.counted = True
+            entry['calls'] += 1
+        entry['total_ms'] += seconds * 1000
+        entry['rows'] += rows
+        entry['max_ms'] = max(entry['max_ms'], statement.seconds * 1000)
+
+
+class _Statement:
+    __slots__ = ('sql', 'fingerprint', 'params', 'caller', 'seconds', 'rows', 'counted')
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.fingerprint = fingerprint(sql)
+        self.params = params
+        self.caller = None  # Filled in once the statement is slow
+        self.seconds = 0.0
+        self.rows = 0
+        self.counted = False
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times its statement from execute() until its rows run out."""
+
+    _statement = None
+
+    def execute(self, sql, parameters=()):
+        if not _enabled:
+            return super().execute(sql, parameters)
+        self._finish()
+        statement = self._statement = _Statement(sql, parameters)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._add(statement, time.perf_counter() - started, 0)
+            if self.description is None:
+                # Not a query: nothing to fetch, rowcount is the rows changed
+                self._add(statement, 0.0, max(self.rowcount, 0))
+                self._finish()
+
+    def executemany(self, sql, seq_of_parameters):
+        if not _enabled:
+            return super().executemany(sql, seq_of_parameters)
+        self._finish()
+        statement = self._statement = _Statement(sql, None)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._add(statement, time.perf_counter() - started, max(self.rowcount, 0))
+            self._finish()
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(started, 0, True)
+            raise
+        self._fetched(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # An abandoned cursor, e.g. from a generator that was never finished
+        if self._statement is not None:
+            self._finish()
+
+    def _fetched(self, started, rows, exhausted):
+        statement = self._statement
+        if statement is not None:
+            self._add(statement, time.perf_counter() - started, rows)
+            if exhausted:
+                self._finish()
+
+    def _add(self, statement, seconds, rows):
+        statement.seconds += seconds
+        statement.rows += rows
+        if statement.caller is None and statement.seconds * 1000 >= _slow_ms:
+            statement.caller = _caller()
+        _record(statement, seconds, rows)
+
+    def _finish(self):
+        """Close out the current statement, logging it if it ran slow."""
+        statement, self._statement = self._statement, None
+        if statement is not None and statement.seconds * 1000 >= _slow_ms:
+            _log_slow(self.connection, statement)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those behind execute(), are instrumented."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C shortcuts create a plain cursor, bypassing cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _slow_log_path(conn):
+    """The configured slow log; a bare file name goes in the database's directory."""
+    path = _slow_log
+    if not path or os.path.dirname(path):
+        return path
+    try:
+        database = sqlite3.Cursor(conn).execute('PRAGMA database_list').fetchone()[2]
+    except sqlite3.Error:
+        database = ''
+    return os.path.join(os.path.dirname(database), path) if database else path
+
+
+def _query_plan(conn, statement):
+    if statement.params is None:
+        return None  # executemany: no single set of parameters to plan with
+    try:
+        # A plain cursor, so planning is not itself timed
+        cursor = sqlite3.Cursor(conn)
+        rows = cursor.execute('EXPLAIN QUERY PLAN ' + statement.sql, statement.params).fetchall()
+        return [row[-1] for row in rows]
+    except sqlite3.Error as e:
+        return [f'unavailable: {e}']
+
+
+def _log_slow(conn, statement):
+    with _lock:
+        entry = _stats.get(statement.fingerprint)
+        if entry is not None:
+            entry['slow'] += 1
+            callers = entry['slow_callers']
+            callers[statement.caller] = callers.get(statement.caller, 0) + 1
+    path = _slow_log_path(conn)
+    if not path:
+        return
+    entry = {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'ms': round(statement.seconds * 1000, 3),
+        'rows': statement.rows,
+        'caller': statement.caller,
+        'sql': statement.fingerprint,
+        'plan': _query_plan(conn, statement),
+    }
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+    except OSError as e:
+        print(f"Could not write slow query log: {e}")
+
+
+def stats():
+    """Per-statement aggregates, highest total time first."""
+    with _lock:
+        entries = [dict(entry, slow_callers=dict(entry['slow_callers'])) for entry in _stats.values()]
+    for entry in entries:
+        entry['mean_ms'] = entry['total_ms'] / entry['calls'] if entry['calls'] else 0.0
+        entry['total_ms'] = round(entry['total_ms'], 3)
+        entry['max_ms'] = round(entry['max_ms'], 3)
+        entry['mean_ms'] = round(entry['mean_ms'], 3)
+    entries.sort(key=lambda entry: entry['total_ms'], reverse=True)
+    return entries
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def dump(path):
+    """Write stats() to path as JSON."""
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'slow_ms': _slow_ms, 'statements': stats()}, f, indent=2)
+            f.write('\n')
+    except OSError as e:
+        print(f"Could not write query stats: {e}")
+
+
+def dump_on_exit(path):
+    """Dump stats() to path when the process exits."""
+    atexit.register(dump, path)
+
+
+if os.environ.get('SAFETY_QUERY_STATS'):
+    dump_on_exit(os.environ['SAFETY_QUERY_STATS'])
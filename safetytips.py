@@ -1,10 +1,4 @@
-import sqlite3
-from datetime import datetime
-
-
-# Connect to the database
-def connect_db():
-    return sqlite3.connect('safety.db')
+from tip_import import import_tips
 
 
 # Add safety tips to the database
@@ -357,15 +351,12 @@ def add_safety_tips():
          "content": "Stay in a group and trust no one unless they have proven their loyalty."},
     ]
 
-    conn = connect_db()
-    c = conn.cursor()
-
-    # Commit changes and close connection
-    conn.commit()
-    conn.close()
-
+    # Duplicate tips are skipped, so seeding twice is harmless
+    stats = import_tips(safety_tips)
+    print(f"{stats['inserted']} safety tips have been added to the database "
+          f"({stats['duplicates']} already present).")
 
-# Call the function to add safety tips to the database
-add_safety_tips()
 
-print("Disaster safety tips added successfully!")
\ No newline at end of file
+if __name__ == "__main__":
+    add_safety_tips()
+    print("Disaster safety tips added successfully!")
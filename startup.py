@@ -0,0 +1,129 @@
+"""Startup phase timing for the desktop app.
+
+main.py imports this module before anything else and marks each phase
+as it is reached:
+
+    process started    when the OS created the process (the bootloader
+                       process for a PyInstaller onefile build, so
+                       unpacking the archive is included)
+    interpreter up     this module was imported
+    imports done       main.py finished its imports
+    first frame drawn  the login page was mapped and painted, and the event
+                       loop took its first turn
+    db ready           the connection pool was opened and migrated
+
+Once every phase is in, one JSON line per launch is appended to
+startup.log next to the executable (or in the working directory when
+run from source), with each phase in milliseconds since process start.
+Set SAFETY_STARTUP_LOG to write elsewhere, or to an empty string to
+turn logging off.
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+_wall_start = time.time()
+_perf_start = time.perf_counter()
+
+PHASES = ("interpreter up", "imports done", "first frame drawn", "db ready")
+
+_marks = {"interpreter up": 0.0}
+_lock = threading.Lock()
+_written = False
+
+
+def _process_started(pid):
+    """Wall-clock time the OS started process pid, or None if it cannot be read."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return None
+            try:
+                times = [wintypes.FILETIME() for _ in range(4)]
+                if not kernel32.GetProcessTimes(handle, *(ctypes.byref(t) for t in times)):
+                    return None
+            finally:
+                kernel32.CloseHandle(handle)
+            ticks = (times[0].dwHighDateTime << 32) | times[0].dwLowDateTime
+            return ticks / 1e7 - 11644473600  # 100 ns ticks since 1601 -> Unix time
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
+
+def _is_onefile():
+    """True in a PyInstaller onefile build, which unpacks itself to a temp dir."""
+    bundle = getattr(sys, "_MEIPASS", None)
+    if not getattr(sys, "frozen", False) or not bundle:
+        return False
+    exe_dir = os.path.dirname(os.path.abspath(sys.executable))
+    try:
+        return os.path.commonpath([exe_dir, os.path.abspath(bundle)]) != exe_dir
+    except ValueError:  # Different drives on Windows
+        return True
+
+
+def _launch_time():
+    """When the user launched the app: the bootloader's start for a onefile build."""
+    started = _process_started(os.getppid() if _is_onefile() else os.getpid())
+    return started if started is not None and started <= _wall_start else None
+
+
+def log_path():
+    path = os.environ.get("SAFETY_STARTUP_LOG")
+    if path is not None:
+        return path or None
+    base = os.path.dirname(sys.executable) if getattr(sys, "frozen", False) else os.getcwd()
+    return os.path.join(base, "startup.log")
+
+
+def mark(phase):
+    """Record that phase was reached now. Safe to call from any thread."""
+    with _lock:
+        _marks.setdefault(phase, (time.perf_counter() - _perf_start) * 1000)
+        complete = all(name in _marks for name in PHASES)
+    if complete:
+        write_log()
+
+
+def report():
+    """Phase -> milliseconds since process start (or since interpreter up if unknown)."""
+    launched = _launch_time()
+    offset = (_wall_start - launched) * 1000 if launched is not None else 0.0
+    with _lock:
+        phases = dict(_marks)
+    timings = {"process started": 0.0} if launched is not None else {}
+    timings.update({name: round(ms + offset, 1) for name, ms in sorted(phases.items(), key=lambda item: item[1])})
+    return timings
+
+
+def write_log():
+    """Append this launch's timings to the startup log, once."""
+    global _written
+    with _lock:
+        if _written:
+            return
+        _written = True
+    path = log_path()
+    if not path:
+        return
+    entry = {
+        "launched": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(_wall_start)),
+        "frozen": bool(getattr(sys, "frozen", False)),
+        "phases_ms": report(),
+    }
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write startup log: {e}")
@@ -0,0 +1,262 @@
+"""Fill safety.db with synthetic users, tips and activities for scaling tests.
+
+The data is shaped like the real thing: tip titles come in families
+("Wildfire Safety", "Flood Safety", ...) that repeat with skewed
+frequencies, a few users produce most of the activity (Zipf-distributed),
+and rows are spread over several years with ids increasing in time order.
+The same seed, counts and end date always produce the same rows, password
+hashes included, so perf runs are reproducible. The end date defaults to
+DEFAULT_END rather than today for the same reason.
+
+    python synthetic_data.py --db bench.db --users 10000 --tips 1000000 --activities 5000000 --seed 7
+
+Rows are added to whatever the database already holds, in chunked
+executemany() transactions. Every generated user has the password
+DEFAULT_PASSWORD (hashed once and shared, since hashing millions of
+passwords would dominate the run, with a salt derived from the seed).
+"""
+import argparse
+import hashlib
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import db as database
+from db import db_connection, tip_content_hash
+from passwords import hash_password, SALT_SIZE
+
+CHUNK_SIZE = 50000
+DEFAULT_PASSWORD = 'synthetic-password'
+DEFAULT_END = datetime(2025, 1, 1)  # Latest timestamp unless told otherwise; fixed so reruns match
+
+# (family, relative frequency): the seeded tips repeat some titles far more than others
+TIP_FAMILIES = [
+    ("Fire Safety", 30), ("Wildfire Safety", 24), ("Flood Safety", 20), ("Hurricane Safety", 18),
+    ("Tornado Safety", 18), ("Earthquake Safety", 14), ("Road Safety", 14), ("Home Security", 12),
+    ("Workplace Safety", 10), ("Electrical Safety", 9), ("Water Safety", 9), ("Cybersecurity", 8),
+    ("Food Safety", 7), ("Child Safety", 6), ("Travel Safety", 5), ("Tsunami Safety", 4),
+    ("Blizzard Safety", 4), ("Extreme Heat Safety", 4), ("Landslide Safety", 3), ("Pet Safety", 3),
+    ("Medication Safety", 2), ("Volcanic Eruption Safety", 2), ("Zombie Apocalypse Safety", 1),
+    ("Alien Invasion Safety", 1), ("Robot Uprising Safety", 1),
+]
+TIP_OPENINGS = ["Always", "Never forget to", "Make sure you", "Remember to", "Take time to", "Plan ahead and",
+                "Teach your family to", "Before you leave,", "Once a month,", "If in doubt,"]
+TIP_ACTIONS = ["check the smoke alarms", "keep an emergency kit ready", "know your evacuation route",
+               "store water and food for three days", "unplug unused appliances", "lock doors and windows",
+               "keep a charged phone nearby", "follow local warnings", "move to higher ground",
+               "keep exits clear", "wear protective equipment", "agree on a family meeting point"]
+TIP_REASONS = ["before it is too late.", "so help can reach you.", "to stay safe at home.",
+               "when the weather turns.", "and stay calm.", "even on short trips.", "for everyone's safety."]
+FIRST_NAMES = ["alex", "sam", "jordan", "taylor", "morgan", "casey", "jamie", "riley", "wanjiru", "otieno",
+               "amina", "kofi", "li", "mei", "arjun", "priya", "lucas", "sofia", "noah", "emma"]
+
+# (message template, relative frequency) for ordinary users; mirrors what main.py logs
+USER_ACTIVITIES = [("User logged in", 50), ("User logged out", 45), ("User updated password", 1)]
+ADMIN_ACTIVITIES = [("Admin logged in", 30), ("Admin logged out", 28), ("Added safety tip: '{title}'", 20),
+                    ("Updated safety tip ID: {tip_id} ('{title}')", 10), ("Added user: {username}", 8),
+                    ("Updated user ID: {user_id}", 4)]
+
+
+def _weighted(choices):
+    """Split [(value, weight)] into a population and cumulative weights for rng.choices()."""
+    values, weights = zip(*choices)
+    return list(values), list(itertools.accumulate(weights))
+
+
+def timeline(rng, count, start, end):
+    """Yield count ascending Unix timestamps spread over [start, end) with random gaps."""
+    start_s, end_s = start.timestamp(), end.timestamp()
+    mean_gap = (end_s - start_s) / max(count, 1)
+    t = start_s
+    for _ in range(count):
+        t += rng.expovariate(1 / mean_gap) if mean_gap > 0 else 0
+        yield int(min(t, end_s - 1))
+
+
+def zipf_weights(count, exponent):
+    """Cumulative Zipf weights: the k-th most active user is weighted 1 / k**exponent."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def _chunked(rows, chunk_size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(conn, sql, rows, chunk_size, label, progress, before=None, after=None):
+    """executemany() rows in chunk_size transactions; return the number inserted.
+
+    before(conn) and after(conn), if given, run inside each chunk's
+    transaction around the insert.
+    """
+    inserted = 0
+    started = time.perf_counter()
+    for chunk in _chunked(rows, chunk_size):
+        conn.execute('BEGIN')
+        try:
+            if before:
+                before(conn)
+            inserted += conn.executemany(sql, chunk).rowcount
+            if after:
+                after(conn)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if progress:
+            progress(label, inserted, time.perf_counter() - started)
+    return inserted
+
+
+def _bulk_tip_indexing(conn):
+    """(before, after) hooks that index each chunk of new tips in one statement.
+
+    The tips_fts_insert trigger indexes tips a row at a time, which is most
+    of the cost of a bulk load. Inside each chunk's transaction the trigger
+    is dropped, the chunk is indexed with a single INSERT ... SELECT and
+    the trigger is recreated from its stored SQL. Without full-text search
+    there is nothing to do.
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'tips_fts_insert'"
+    ).fetchone()
+    if row is None:
+        return None, None
+    trigger_sql = row[0]
+    last_id = {}
+
+    def before(conn):
+        last_id['value'] = conn.execute('SELECT COALESCE(MAX(tip_id), 0) FROM Tips').fetchone()[0]
+        conn.execute('DROP TRIGGER tips_fts_insert')
+
+    def after(conn):
+        conn.execute('''
+            INSERT INTO TipsFts (rowid, title, content)
+            SELECT tip_id, title, content FROM Tips WHERE tip_id > ?
+        ''', (last_id['value'],))
+        conn.execute(trigger_sql)
+
+    return before, after
+
+
+def generate(users=1000, tips=10000, activities=100000, seed=0, years=3, end=None, zipf=1.1,
+             chunk_size=CHUNK_SIZE, password=DEFAULT_PASSWORD, progress=None):
+    """Add synthetic rows to the configured database; return counts and rows_per_sec.
+
+    Timestamps run from `years` before `end` (default: DEFAULT_END) up to end.
+    `progress`, if given, is called as progress(table, rows_so_far, seconds)
+    after every chunk.
+    """
+    rng = random.Random(seed)
+    end = end or DEFAULT_END
+    start = end - timedelta(days=365 * years)
+    salt = hashlib.sha256(f'synthetic-data:{seed}'.encode()).digest()[:SALT_SIZE]
+    password_hash = hash_password(password, salt)
+    stats = {'users': 0, 'tips': 0, 'activities': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+    started = time.perf_counter()
+
+    with db_connection() as conn:
+        first_user = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM Users').fetchone()[0]
+        stats['users'] = _insert(conn, '''
+            INSERT OR IGNORE INTO Users (username, password, is_admin, created_at)
+            VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+        ''', (
+            (f'{rng.choice(FIRST_NAMES)}{first_user + i}', password_hash, rng.random() < 0.01, created)
+            for i, created in enumerate(timeline(rng, users, start, end))
+        ), chunk_size, 'users', progress)
+
+        families, family_weights = _weighted(TIP_FAMILIES)
+        first_tip = conn.execute('SELECT COALESCE(MAX(tip_id), 0) + 1 FROM Tips').fetchone()[0]
+
+        def tip_rows():
+            for i, created in enumerate(timeline(rng, tips, start, end)):
+                title = rng.choices(families, cum_weights=family_weights)[0]
+                # The number keeps every tip distinct under the content-hash dedupe
+                content = (f"{rng.choice(TIP_OPENINGS)} {rng.choice(TIP_ACTIONS)} "
+                           f"{rng.choice(TIP_REASONS)} (#{first_tip + i})")
+                yield title, content, tip_content_hash(title, content), created
+
+        stats['tips'] = _insert(conn, '''
+            INSERT INTO Tips (title, content, content_hash, created_at)
+            VALUES (?, ?, ?, datetime(?, 'unixepoch'))
+            ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
+        ''', tip_rows(), chunk_size, 'tips', progress, *_bulk_tip_indexing(conn))
+
+        user_rows = conn.execute('SELECT id, username, is_admin FROM Users WHERE id >= ? ORDER BY id',
+                                 (first_user,)).fetchall()
+        if not user_rows:
+            user_rows = conn.execute('SELECT id, username, is_admin FROM Users ORDER BY id').fetchall()
+        if user_rows and activities:
+            # Who is most active is random, but fixed by the seed
+            ranked = user_rows[:]
+            rng.shuffle(ranked)
+            activity_weights = zipf_weights(len(ranked), zipf)
+            user_messages, user_message_weights = _weighted(USER_ACTIVITIES)
+            admin_messages, admin_message_weights = _weighted(ADMIN_ACTIVITIES)
+            tip_range = (1, max(first_tip + stats['tips'] - 1, 1))
+
+            def activity_rows():
+                batch = 4096  # Draw users in batches: one choices() call per row is the slow part
+                made = 0
+                times = timeline(rng, activities, start, end)
+                while made < activities:
+                    picks = rng.choices(ranked, cum_weights=activity_weights, k=min(batch, activities - made))
+                    for user_id, username, is_admin in picks:
+                        if is_admin:
+                            message = rng.choices(admin_messages, cum_weights=admin_message_weights)[0].format(
+                                title=rng.choice(families), tip_id=rng.randint(*tip_range),
+                                username=f'{rng.choice(FIRST_NAMES)}{rng.randrange(10 ** 6)}',
+                                user_id=rng.choice(user_rows)[0])
+                        else:
+                            message = rng.choices(user_messages, cum_weights=user_message_weights)[0]
+                        yield user_id, message, next(times)
+                    made += len(picks)
+
+            stats['activities'] = _insert(conn, '''
+                INSERT INTO Activities (user_id, activity, timestamp)
+                VALUES (?, ?, datetime(?, 'unixepoch'))
+            ''', activity_rows(), chunk_size, 'activities', progress)
+
+    stats['seconds'] = time.perf_counter() - started
+    total = stats['users'] + stats['tips'] + stats['activities']
+    stats['rows_per_sec'] = total / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Add synthetic users, tips and activities to a Safety Tips database.")
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tips', type=int, default=10000)
+    parser.add_argument('--activities', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0, help="same seed, same rows")
+    parser.add_argument('--years', type=float, default=3, help="spread timestamps over this many years")
+    parser.add_argument('--end', type=datetime.fromisoformat,
+                        help=f"latest timestamp (default: {DEFAULT_END.date()})")
+    parser.add_argument('--zipf', type=float, default=1.1, help="activity skew across users")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help="password for every generated user")
+    args = parser.parse_args()
+
+    database.configure_pool(path=args.db, profile='fast')
+
+    def progress(table, rows, seconds):
+        print(f"\r{table}: {rows} rows ({rows / seconds if seconds else 0:.0f} rows/sec)",
+              end='', file=sys.stderr, flush=True)
+
+    stats = generate(args.users, args.tips, args.activities, seed=args.seed, years=args.years, end=args.end,
+                     zipf=args.zipf, chunk_size=args.chunk_size, password=args.password, progress=progress)
+    print(file=sys.stderr)
+    print(f"Added {stats['users']} users, {stats['tips']} tips and {stats['activities']} activities "
+          f"in {stats['seconds']:.1f}s ({stats['rows_per_sec']:.0f} rows/sec)")
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db as database  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh, migrated database that the process-wide pool points at."""
+    path = str(tmp_path / 'safety.db')
+    database.configure_pool(path=path, profile='fast')
+    yield path
+    database.stop_activity_writer()
+    database.close_pool()
+
+
+@pytest.fixture
+def admin_id(db_path):
+    with database.db_connection() as conn:
+        return conn.execute("SELECT id FROM Users WHERE username = 'ADMIN'").fetchone()[0]
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta, timezone
+
+import activity_archive
+import db as database
+
+
+def add_activity(user_id, activity, days_ago):
+    timestamp = database.timestamp_text(datetime.now(timezone.utc) - timedelta(days=days_ago))
+    with database.db_connection() as conn:
+        conn.execute('INSERT INTO Activities (user_id, activity, timestamp) VALUES (?, ?, ?)',
+                     (user_id, activity, timestamp))
+        conn.commit()
+
+
+def attached_databases():
+    with database.db_connection() as conn:
+        return [row[1] for row in conn.execute('PRAGMA database_list')]
+
+
+def activities(**filters):
+    return [row['activity'] for row in activity_archive.iter_activity_range(**filters)]
+
+
+def test_rotation_moves_old_rows_and_detaches(db_path, admin_id):
+    add_activity(admin_id, 'old', days_ago=200)
+    add_activity(admin_id, 'older', days_ago=300)
+    add_activity(admin_id, 'recent', days_ago=1)
+
+    assert activity_archive.rotate_activities(older_than_days=90, chunk_size=1, pause=0) == 2
+
+    assert attached_databases() == ['main']
+    assert activities() == ['recent', 'old', 'older']
+    assert attached_databases() == ['main']
+
+
+def test_abandoned_range_query_detaches(db_path, admin_id):
+    for days_ago in (200, 201, 202):
+        add_activity(admin_id, f'{days_ago} days ago', days_ago)
+    activity_archive.rotate_activities(older_than_days=90, pause=0)
+
+    rows = activity_archive.iter_activity_range(batch_size=1)
+    assert next(rows)['activity'] == '200 days ago'
+    rows.close()
+
+    assert attached_databases() == ['main']
+
+
+def test_range_keeps_deleted_users_on_both_sides(db_path):
+    database.add_user('alice', 'secret')
+    alice = next(user['id'] for user in database.view_users() if user['username'] == 'alice')
+    add_activity(alice, 'archived', days_ago=200)
+    activity_archive.rotate_activities(older_than_days=90, pause=0)
+    add_activity(alice, 'live', days_ago=1)
+
+    database.remove_user(alice)
+
+    rows = list(activity_archive.iter_activity_range(user_id=alice))
+    assert [(row['activity'], row['user_id']) for row in rows] == [('live', None), ('archived', 'alice')]
+
+
+def test_admin_cli_query_includes_archived_rows(db_path, admin_id, tmp_path, monkeypatch):
+    import admin_cli
+    add_activity(admin_id, 'ADMIN logged in', days_ago=200)
+    add_activity(admin_id, 'Added user: bob', days_ago=150)
+    add_activity(admin_id, 'ADMIN logged in', days_ago=1)
+    activity_archive.rotate_activities(older_than_days=90, pause=0)
+    monkeypatch.setattr(database, 'close_pool', lambda: None)  # Keep the fixture's pool open
+
+    since = (datetime.now() - timedelta(days=365)).date().isoformat()
+    output = tmp_path / 'logins.csv'
+    assert admin_cli.main(['activities', 'query', '--since', since, '--user', 'ADMIN', '--action', 'login',
+                           '--output', str(output)]) == 0
+
+    lines = output.read_text().splitlines()
+    assert lines[0] == 'id,timestamp,username,activity'
+    assert [line.rsplit(',', 1)[1] for line in lines[1:]] == ['ADMIN logged in', 'ADMIN logged in']
+
+
+def test_feed_pages_through_the_archive(db_path, admin_id):
+    for days_ago in (1, 2, 200, 300):
+        add_activity(admin_id, f'{days_ago} days ago', days_ago)
+    activity_archive.rotate_activities(older_than_days=90, pause=0)
+
+    since = datetime.now(timezone.utc) - timedelta(days=365)
+    pages, after = [], None
+    while True:
+        page = database.get_activity_feed(start=since, limit=3, after=after, with_total=True)
+        pages.append([(item['activity'], item['username']) for item in page['items']])
+        assert page['total'] == 4
+        after = page['next']
+        if not after:
+            break
+    assert pages == [[('1 days ago', 'ADMIN'), ('2 days ago', 'ADMIN'), ('200 days ago', 'ADMIN')],
+                     [('300 days ago', 'ADMIN')]]
+    assert attached_databases() == ['main']
+
+    recent = database.get_activity_feed(start=datetime.now(timezone.utc) - timedelta(days=30))
+    assert [item['activity'] for item in recent['items']] == ['1 days ago', '2 days ago']
+
+
+def test_feed_bounds_ignore_the_separator(db_path, admin_id):
+    with database.db_connection() as conn:
+        conn.execute("INSERT INTO Activities (user_id, activity, timestamp) VALUES (?, 'morning', '2024-01-31 08:00:00')",
+                     (admin_id,))
+        conn.commit()
+    for start in ('2024-01-31T08:00', '2024-01-31 08:00:00', datetime(2024, 1, 31, 8)):
+        assert [item['activity'] for item in database.get_activity_feed(start=start)['items']] == ['morning']
+        assert activities(start=start) == ['morning']
+    assert database.get_activity_feed(start='2024-01-31T08:00:01')['items'] == []
@@ -0,0 +1,34 @@
+import asyncio
+import hashlib
+
+import async_db
+import db as database
+import passwords
+
+
+def add_legacy_user(username, password):
+    with database.db_connection() as conn:
+        conn.execute('INSERT INTO Users (username, password) VALUES (?, ?)',
+                     (username, hashlib.sha256(password.encode()).hexdigest()))
+        conn.commit()
+
+
+def stored_algorithm(username):
+    with database.db_connection() as conn:
+        encoded = conn.execute('SELECT password FROM Users WHERE username = ?', (username,)).fetchone()[0]
+    return passwords.algorithm_of(encoded)
+
+
+def test_async_authenticate_upgrades_outdated_hashes(db_path):
+    add_legacy_user('alice', 'secret')
+    adb = async_db.AsyncDB()
+    try:
+        assert asyncio.run(adb.verify_user('alice', 'secret'))['username'] == 'alice'
+        assert stored_algorithm('alice') == 'sha256'  # Verification alone never writes
+
+        user = asyncio.run(adb.authenticate_user('alice', 'secret'))
+        assert user['username'] == 'alice'
+        assert stored_algorithm('alice') == 'scrypt'
+        assert asyncio.run(adb.authenticate_user('alice', 'wrong')) is None
+    finally:
+        adb.close()
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+from concurrent.futures import CancelledError
+from datetime import datetime
+
+import pytest
+
+import db as database
+
+
+def test_profiles_leave_foreign_keys_off(db_path):
+    with database.db_connection() as conn:
+        assert conn.execute('PRAGMA foreign_keys').fetchone()[0] == 0
+
+
+def test_activities_survive_remove_user(db_path, admin_id):
+    assert database.add_user('alice', 'secret')
+    user_id = next(user['id'] for user in database.view_users() if user['username'] == 'alice')
+    database.log_activity(user_id, 'alice logged in')
+
+    assert database.remove_user(user_id)
+
+    feed = database.get_activity_feed(user_id=user_id)
+    assert [item['activity'] for item in feed['items']] == ['alice logged in']
+    assert feed['items'][0]['username'] is None
+
+
+def test_unranked_search_pages_by_tip_id(db_path):
+    for i in range(5):
+        assert database.add_tip(f'Flood tip {i}', f'Flood advice number {i}.')
+    # Backdate the latest tip: unranked search still lists it first
+    with database.db_connection() as conn:
+        conn.execute("UPDATE Tips SET created_at = '2000-01-01 00:00:00' WHERE title = 'Flood tip 4'")
+        conn.commit()
+    database.invalidate_tip_cache()
+
+    titles, after = [], None
+    while True:
+        page = database.get_tips_page(limit=2, after=after, search_query='flood', ranked=False)
+        titles += [tip['title'] for tip in page['items']]
+        after = page['next']
+        if after is None:
+            break
+        assert len(database.decode_cursor(after)) == 1
+
+    assert titles == [f'Flood tip {i}' for i in reversed(range(5))]
+
+
+def test_cancelled_call_never_runs():
+    calls = []
+    call = database.CancellableCall(calls.append, ('ran',))
+    call.cancel()
+    with pytest.raises(CancelledError):
+        call()
+    assert calls == []
+
+
+def test_update_user_changes_admin_flag(db_path):
+    database.add_user('carol', 'secret')
+    carol = next(user for user in database.view_users() if user['username'] == 'carol')
+
+    assert database.update_user(carol['id'], is_admin=True)
+    assert database.get_user_by_id(carol['id'])['is_admin']
+    assert database.authenticate_user('carol', 'secret')  # Other fields are left alone
+
+    assert database.update_user(carol['id'], is_admin=False)
+    assert not database.get_user_by_id(carol['id'])['is_admin']
+    assert database.get_user_by_id(carol['id'])['username'] == 'carol'
+
+
+def test_release_from_another_thread_raises(db_path):
+    pool = database.get_pool()
+    conn = pool.acquire()
+    errors = []
+
+    def release_elsewhere():
+        try:
+            pool.release(conn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=release_elsewhere)
+    thread.start()
+    thread.join()
+    pool.release(conn)
+    assert len(errors) == 1 and pool.depth() == 0
+
+
+def test_nested_error_keeps_outer_transaction(db_path):
+    with database.db_connection() as outer:
+        outer.execute("INSERT INTO Tips (title, content) VALUES ('Outer', 'Kept.')")
+        with pytest.raises(sqlite3.OperationalError):
+            with database.db_connection() as inner:
+                inner.execute('SELECT * FROM NoSuchTable')
+        outer.commit()
+    assert [tip['title'] for tip in database.get_tips()] == ['Outer']
+
+
+def test_activity_writer_rejects_incomplete_rows(db_path, admin_id):
+    writer = database.start_activity_writer(flush_interval=0.01)
+    assert database.log_activity(admin_id, None) is False
+    assert database.log_activity(admin_id, 'Kept') is True
+    assert writer.flush()
+    assert writer.metrics()['failed'] == 0
+    assert [row['activity'] for row in database.view_activities()] == ['Kept']
+
+
+def test_timed_out_stop_keeps_writer_thread(db_path, admin_id, monkeypatch):
+    writer = database.start_activity_writer()
+    release = threading.Event()
+    monkeypatch.setattr(writer, '_write', lambda batch: release.wait())
+    writer.log(admin_id, 'Slow')
+    assert writer.stop(timeout=0.05) is False
+    assert writer.is_running()
+    release.set()
+    assert writer.stop() is True
+    assert not writer.is_running()
+
+
+def test_datetimes_are_stored_with_a_space_separator(db_path, admin_id):
+    import migrations
+    with database.db_connection() as conn:
+        conn.execute('INSERT INTO Activities (user_id, activity, timestamp) VALUES (?, ?, ?)',
+                     (admin_id, 'bound', datetime(2024, 1, 31, 8)))
+        conn.execute("INSERT INTO Activities (user_id, activity, timestamp) VALUES (?, 'legacy', '2024-01-30T08:00:00')",
+                     (admin_id,))
+        migrations.space_separated_timestamps(conn.cursor())
+        conn.commit()
+        stored = conn.execute('SELECT CAST(timestamp AS TEXT) FROM Activities ORDER BY id').fetchall()
+    assert [row[0] for row in stored] == ['2024-01-31 08:00:00', '2024-01-30 08:00:00']
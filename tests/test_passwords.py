@@ -0,0 +1,36 @@
+import hashlib
+
+import pytest
+
+import passwords
+
+
+def test_well_formed_hashes_are_valid():
+    assert passwords.is_valid_hash(passwords.ScryptHasher(n=2 ** 4).hash('pw'))
+    assert passwords.is_valid_hash(passwords.Pbkdf2Hasher(iterations=1000).hash('pw'))
+    assert passwords.is_valid_hash(hashlib.sha256(b'pw').hexdigest())
+
+
+@pytest.mark.parametrize('encoded', [
+    'scrypt$garbage',
+    'scrypt$16384$8$1$c2FsdA$ZGlnZXN0',  # Salt and digest far too short
+    'scrypt$1000$8$1$AAAAAAAAAAAAAAAAAAAAAA$AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',  # n not a power of two
+    'scrypt$1048576$64$64$AAAAAAAAAAAAAAAAAAAAAA$AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',
+    'pbkdf2_sha256$-5$AAAAAAAAAAAAAAAAAAAAAA$AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',
+    'pbkdf2_sha256$1_000$AAAAAAAAAAAAAAAAAAAAAA$AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',
+    'pbkdf2_sha256$1000$!!!!$AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA',
+    'md5$whatever',
+    'ABCDEF',
+])
+def test_malformed_hashes_are_invalid(encoded):
+    assert not passwords.is_valid_hash(encoded)
+    assert not passwords.verify_password('pw', encoded)
+
+
+def test_import_counts_malformed_hashes_as_invalid(db_path):
+    import admin_cli
+    stats = admin_cli.import_users([
+        {'username': 'dave', 'password_hash': 'scrypt$16384$8$1$c2FsdA$ZGlnZXN0'},
+        {'username': 'erin', 'password_hash': passwords.Pbkdf2Hasher(iterations=1000).hash('pw')},
+    ])
+    assert (stats['inserted'], stats['invalid']) == (1, 1)
@@ -0,0 +1,30 @@
+import json
+import os
+
+import pytest
+
+import db as database
+import query_log
+
+
+@pytest.fixture
+def log_everything(db_path):
+    query_log.reset()
+    query_log.configure(slow_ms=0)
+    yield os.path.join(os.path.dirname(db_path), query_log.SLOW_LOG)
+    query_log.configure(slow_ms=query_log.SLOW_MS)
+    query_log.reset()
+
+
+def test_abandoned_cursor_is_slow_logged_next_to_database(log_everything):
+    for i in range(10):
+        database.add_tip(f'Tip {i}', f'Content {i}')
+    rows = database.iter_tips(batch_size=2)
+    next(rows)
+    rows.close()
+
+    with open(log_everything) as f:
+        entries = [json.loads(line) for line in f]
+    scan = [entry for entry in entries if entry['caller'] == 'db.iter_tips']
+    assert [entry['rows'] for entry in scan] == [2]
+    assert scan[0]['plan']
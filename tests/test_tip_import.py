@@ -0,0 +1,75 @@
+import json
+
+import db as database
+import tip_import
+
+
+def test_add_tip_rejects_duplicate_content(db_path):
+    assert database.add_tip('Flood', 'Move to higher ground.')
+    assert not database.add_tip('flood', '  Move to   higher ground. ')
+    assert database.tip_exists('FLOOD', 'move to higher ground.')
+    assert not database.tip_exists('Flood', 'Stay put.')
+    assert len(database.get_tips()) == 1
+
+
+def test_import_is_idempotent(db_path, tmp_path):
+    pack = tmp_path / 'tips.jsonl'
+    pack.write_text('\n'.join(json.dumps(tip) for tip in [
+        {'title': 'Fire', 'content': 'Know two ways out.'},
+        {'title': 'Quake', 'content': 'Drop, cover and hold on.'},
+        {'title': 'fire', 'content': 'know two ways out.'},
+        {'title': '', 'content': 'No title.'},
+    ]) + '\n')
+
+    first = tip_import.import_files([str(pack)])
+    second = tip_import.import_files([str(pack)])
+
+    assert (first['inserted'], first['duplicates'], first['invalid']) == (2, 1, 1)
+    assert (second['inserted'], second['duplicates'], second['invalid']) == (0, 3, 1)
+    assert sorted(tip['title'] for tip in database.get_tips()) == ['Fire', 'Quake']
+
+
+def test_import_cli_migrates_a_new_database(tmp_path):
+    pack = tmp_path / 'tips.csv'
+    pack.write_text('title,content\nFlood,Move to higher ground.\n')
+    path = str(tmp_path / 'new.db')
+    try:
+        tip_import.main([str(pack), '--db', path])
+        assert [tip['title'] for tip in database.get_tips()] == ['Flood']
+    finally:
+        database.close_pool()
+
+
+def test_json_array_counts_non_objects_as_invalid(db_path, tmp_path):
+    pack = tmp_path / 'tips.json'
+    pack.write_text(json.dumps([{'title': 'Fire', 'content': 'Know two ways out.'}, 'not a tip', 42]))
+
+    stats = tip_import.import_files([str(pack)])
+
+    assert (stats['read'], stats['inserted'], stats['invalid']) == (3, 1, 2)
+    assert 'error' not in stats
+
+
+def test_import_cli_fails_on_database_error(db_path, tmp_path):
+    pack = tmp_path / 'tips.jsonl'
+    pack.write_text(json.dumps({'title': 'Fire', 'content': 'Know two ways out.'}) + '\n')
+    with database.db_connection() as conn:
+        conn.execute('DROP TABLE Tips')
+        conn.commit()
+
+    assert tip_import.main([str(pack)]) == 1
+
+
+def test_users_import_cli_reports_invalid_and_failed_imports(db_path, tmp_path, monkeypatch):
+    import admin_cli
+    monkeypatch.setattr(database, 'close_pool', lambda: None)  # Keep the fixture's pool open
+    accounts = tmp_path / 'accounts.jsonl'
+    accounts.write_text('["bob"]\n' + json.dumps({'username': 'carol', 'password': 'pw'}) + '\n')
+
+    assert admin_cli.main(['users', 'import', str(accounts)]) == 1
+    assert database.authenticate_user('carol', 'pw')
+
+    with database.db_connection() as conn:
+        conn.execute('DROP TABLE Users')
+        conn.commit()
+    assert admin_cli.main(['users', 'import', str(accounts)]) == 2
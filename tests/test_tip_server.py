@@ -0,0 +1,125 @@
+import asyncio
+import json
+import re
+import sqlite3
+
+import db as database
+import tip_server
+
+
+async def request(port, path, etag=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    head = f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n'
+    if etag:
+        head += f'If-None-Match: {etag}\r\n'
+    writer.write((head + '\r\n').encode())
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    headers = dict(line.split(': ', 1) for line in lines[1:])
+    return int(lines[0].split(' ')[1]), headers, json.loads(body) if body else None
+
+
+def run_with_server(scenario):
+    async def main():
+        ports = asyncio.get_running_loop().create_future()
+        server = asyncio.create_task(tip_server.serve('127.0.0.1', 0, poll_interval=0.05,
+                                                      ready=lambda address: ports.set_result(address[1])))
+        try:
+            return await scenario(await ports)
+        finally:
+            server.cancel()
+            try:
+                await server
+            except asyncio.CancelledError:
+                pass
+    return asyncio.run(main())
+
+
+def test_etag_revalidates_until_a_tip_changes(db_path):
+    database.add_tip('Flood', 'Move to higher ground.')
+
+    async def scenario(port):
+        status, headers, body = await request(port, '/tips')
+        assert status == 200 and [tip['title'] for tip in body['items']] == ['Flood']
+        etag = headers['ETag']
+
+        status, headers, body = await request(port, '/tips', etag)
+        assert (status, headers['ETag'], body) == (304, etag, None)
+
+        await asyncio.to_thread(database.add_tip, 'Fire', 'Know two ways out.')
+        for _ in range(40):  # The change is noticed within one poll interval
+            status, headers, body = await request(port, '/tips', etag)
+            if status == 200:
+                break
+            await asyncio.sleep(0.05)
+        assert status == 200 and headers['ETag'] != etag
+        assert len(body['items']) == 2
+
+    run_with_server(scenario)
+
+
+def test_missing_tip_is_404(db_path):
+    async def scenario(port):
+        status, headers, body = await request(port, '/tips/12345')
+        assert status == 404 and body == {'error': 'No such tip'}
+
+    run_with_server(scenario)
+
+
+def test_database_errors_are_500_and_not_cached(db_path, monkeypatch):
+    database.add_tip('Flood', 'Move to higher ground.')
+    healthy = database._load_tips_page
+
+    def locked(*args):
+        raise sqlite3.OperationalError('database is locked')
+
+    async def scenario(port):
+        monkeypatch.setattr(database, '_load_tips_page', locked)
+        status, headers, body = await request(port, '/tips')
+        assert status == 500 and 'ETag' not in headers
+        assert headers['Cache-Control'] == 'no-store'
+
+        monkeypatch.setattr(database, '_load_tips_page', healthy)
+        status, headers, body = await request(port, '/tips')
+        assert status == 200 and [tip['title'] for tip in body['items']] == ['Flood']
+
+    run_with_server(scenario)
+
+
+def test_bad_cursor_is_400(db_path):
+    async def scenario(port):
+        status, _, body = await request(port, '/tips?after=not-a-cursor')
+        assert status == 400
+
+    run_with_server(scenario)
+
+
+def test_if_none_match_lists_are_parsed(db_path):
+    database.add_tip('Flood', 'Move to higher ground.')
+
+    async def scenario(port):
+        _, headers, _ = await request(port, '/tips')
+        etag = headers['ETag']
+        assert (await request(port, '/tips', f'"other", W/{etag}'))[0] == 304
+        assert (await request(port, '/tips', '*'))[0] == 304
+        assert (await request(port, '/tips', etag[:-2] + '"'))[0] == 200  # A prefix is not a match
+        assert (await request(port, '/tips/12345', '*'))[0] == 404
+
+    run_with_server(scenario)
+
+
+def test_request_bodies_are_drained_on_keep_alive(db_path):
+    database.add_tip('Flood', 'Move to higher ground.')
+
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /tips HTTP/1.1\r\nHost: localhost\r\nContent-Length: 17\r\n\r\n'
+                     b'GET /tips/1 HTTP/'
+                     b'GET /tips HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        assert re.findall(rb'HTTP/1\.1 (\d+)', response) == [b'405', b'200']
+
+    run_with_server(scenario)
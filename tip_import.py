@@ -0,0 +1,145 @@
+"""Bulk import of safety tips from JSONL, JSON or CSV files.
+
+Rows are read lazily and written in chunked executemany() transactions.
+Each tip carries a content hash, so importing the same pack twice adds
+nothing the second time.
+
+    python tip_import.py tips.jsonl more_tips.csv --chunk-size 5000
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import db as database
+from db import db_connection, tip_content_hash, invalidate_tip_cache
+
+CHUNK_SIZE = 1000
+
+
+def read_tips(path, fmt=None):
+    """Yield {'title', 'content'} dicts from a .jsonl, .json or .csv file.
+
+    A .json file holds one array of records (or a single record) and is
+    parsed whole; use JSONL for packs too large to load at once.
+    """
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'json':
+            try:
+                records = json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"{path}: skipping invalid JSON ({e})", file=sys.stderr)
+                return
+            yield from records if isinstance(records, list) else [records]
+        elif fmt in ('jsonl', 'ndjson'):
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"{path}:{line_number}: skipping invalid JSON ({e})", file=sys.stderr)
+        elif fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            raise ValueError(f"Unsupported tip file format: {fmt}")
+
+
+def _chunks(tips, chunk_size, stats):
+    """Group valid tips into lists of (title, content, content_hash) tuples."""
+    chunk = []
+    for tip in tips:
+        stats['read'] += 1
+        if not isinstance(tip, dict):
+            stats['invalid'] += 1
+            continue
+        title = (tip.get('title') or '').strip()
+        content = (tip.get('content') or '').strip()
+        if not title or not content:
+            stats['invalid'] += 1
+            continue
+        chunk.append((title, content, tip_content_hash(title, content)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_tips(tips, chunk_size=CHUNK_SIZE, progress=None):
+    """Insert an iterable of tip dicts, skipping tips that are already stored.
+
+    Each chunk is committed as one transaction. `progress`, if given, is
+    called with the running stats after every chunk. Returns the final
+    stats: read, inserted, duplicates, invalid, seconds and rows_per_sec,
+    plus 'error' if a database error stopped the import part way.
+    """
+    stats = {'read': 0, 'inserted': 0, 'duplicates': 0, 'invalid': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+    started = time.perf_counter()
+    try:
+        with db_connection() as conn:
+            for chunk in _chunks(tips, chunk_size, stats):
+                cursor = conn.executemany('''
+                    INSERT INTO Tips (title, content, content_hash)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO NOTHING
+                ''', chunk)
+                conn.commit()
+                stats['inserted'] += cursor.rowcount
+                stats['duplicates'] += len(chunk) - cursor.rowcount
+                stats['seconds'] = time.perf_counter() - started
+                stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+                if progress:
+                    progress(stats)
+    except sqlite3.DatabaseError as e:
+        print(f"Error importing tips: {e}")
+        stats['error'] = str(e)
+    finally:
+        invalidate_tip_cache()
+    stats['seconds'] = time.perf_counter() - started
+    stats['rows_per_sec'] = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+    return stats
+
+
+def import_files(paths, fmt=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Import several tip files in order and return the combined stats."""
+    def all_tips():
+        for path in paths:
+            yield from read_tips(path, fmt)
+    return import_tips(all_tips(), chunk_size, progress)
+
+
+def print_progress(stats):
+    print(f"\r{stats['read']} read, {stats['inserted']} inserted, "
+          f"{stats['duplicates']} duplicates ({stats['rows_per_sec']:.0f} rows/sec)",
+          end='', file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import safety tips from JSONL, JSON or CSV files.")
+    parser.add_argument('files', nargs='+', help="tip files with 'title' and 'content' fields")
+    parser.add_argument('--format', choices=['jsonl', 'json', 'csv'], help="override detection by file extension")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.db != database.DB_PATH:
+        database.configure_pool(path=args.db)  # Migrates the database as it opens
+
+    stats = import_files(args.files, args.format, args.chunk_size, print_progress)
+    print(file=sys.stderr)
+    print(f"Imported {stats['inserted']} tips ({stats['duplicates']} duplicates, {stats['invalid']} invalid) "
+          f"in {stats['seconds']:.2f}s, {stats['rows_per_sec']:.0f} rows/sec")
+    if 'error' in stats:
+        print(f"Import stopped early: {stats['error']}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
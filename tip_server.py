@@ -0,0 +1,302 @@
+"""Read-only HTTP/JSON service for the tip catalogue.
+
+Kiosks and other desktops can read tips from one machine instead of each
+opening safety.db over a file share:
+
+    python tip_server.py --db safety.db --port 8080
+
+    GET /tips?limit=20&after=<cursor>     newest first; follow "next" for the next page
+    GET /tips?q=flood&ranked=0            search, best match first unless ranked=0
+    GET /search?q=flood                   same as /tips?q=flood
+    GET /tips/<id>                        one tip
+
+Bodies are the db.get_tips_page() / db.get_tip_by_id() results as JSON.
+Every response carries a strong ETag built from the TipsGeneration
+counter and the request, so a client that sends If-None-Match gets a 304
+until a tip is added, edited or removed. Rendered responses are kept in
+an in-process cache for the current generation.
+
+The generation is held in memory and re-read every --poll-interval
+seconds on async_db's reader threads, so cache hits and 304s are served
+without touching the database or taking a lock, and a tip change shows
+up within one interval. Misses, and the generation checks around them,
+run on the reader threads. A database error is a 500 that is neither
+cached nor given an ETag.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+
+import async_db
+import db as database
+
+MAX_PAGE_SIZE = 100
+CACHE_ENTRIES = 1024
+MAX_HEADER_BYTES = 8192
+MAX_DRAIN_BYTES = 65536  # Larger request bodies are not read; the connection is closed instead
+POLL_INTERVAL = 0.25
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 431: 'Request Header Fields Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ResponseCache:
+    """LRU of rendered bodies for one tips generation; a new generation empties it."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.generation = None
+        self._entries = OrderedDict()  # request key -> (status, body)
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def get(self, generation, key):
+        if generation != self.generation:
+            self._entries.clear()
+            self.generation = generation
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, generation, key, entry):
+        if generation != self.generation:
+            return
+        self._entries[key] = entry
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _json_default(value):
+    return database.timestamp_text(value)
+
+
+def _route(path, query):
+    """Map a request to (request key, db function name, kwargs); raise HTTPError for bad ones."""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    parts = [part for part in path.split('/') if part]
+    if len(parts) == 2 and parts[0] == 'tips':
+        try:
+            tip_id = int(parts[1])
+        except ValueError:
+            raise HTTPError(404, 'No such tip')
+        return f'tip:{tip_id}', 'fetch_tip', {'tip_id': tip_id}
+    if parts not in (['tips'], ['search']):
+        raise HTTPError(404, 'Not found')
+
+    search = params.get('q', '').strip() or None
+    if parts == ['search'] and not search:
+        raise HTTPError(400, 'Missing q')
+    try:
+        limit = min(max(int(params.get('limit', database.PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise HTTPError(400, 'limit must be a number')
+    after = params.get('after') or None
+    if after is not None:
+        try:
+            database.decode_cursor(after)
+        except ValueError:
+            raise HTTPError(400, 'Invalid page cursor')
+    ranked = params.get('ranked', '1') not in ('0', 'false', 'no')
+    key = f'tips:{limit}:{after}:{search}:{ranked}'
+    return key, 'fetch_tips_page', {'limit': limit, 'after': after, 'search_query': search, 'ranked': ranked}
+
+
+def _etag(generation, key):
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'"{generation}-{digest}"'
+
+
+def _none_match(header, etag):
+    """True if an If-None-Match value lists etag or is '*'; W/ prefixes are ignored (weak comparison)."""
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
+
+
+class TipServer:
+    def __init__(self, cache_entries=CACHE_ENTRIES, poll_interval=POLL_INTERVAL):
+        self.cache = ResponseCache(cache_entries)
+        self.poll_interval = poll_interval
+        self.generation = None  # Last tips generation read; None until known or while unreadable
+
+    async def refresh_generation(self):
+        """Re-read the tips generation on a reader thread and remember it."""
+        try:
+            self.generation = await async_db.tips_generation()
+        except asyncio.TimeoutError:
+            self.generation = None
+        return self.generation
+
+    async def watch_generation(self):
+        """Keep self.generation current until cancelled."""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.refresh_generation()
+
+    async def handle(self, reader, writer):
+        """Serve requests on one keep-alive connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 431, b'{"error": "Headers too large"}', keep_alive=False)
+                    return
+                except asyncio.IncompleteReadError:
+                    return
+                keep_alive = await self._respond(head, reader, writer)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, head, reader, writer):
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            await self._send(writer, 400, b'{"error": "Bad request line"}', keep_alive=False)
+            return False
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+        # Bodies are never used, but must be consumed or the next request would be read from them
+        length = headers.get('content-length', '0')
+        if 'transfer-encoding' in headers or not length.isdigit() or int(length) > MAX_DRAIN_BYTES:
+            keep_alive = False
+        elif int(length):
+            try:
+                await reader.readexactly(int(length))
+            except asyncio.IncompleteReadError:
+                return False
+        if method not in ('GET', 'HEAD'):
+            await self._send(writer, 405, b'{"error": "Read-only service"}', keep_alive, extra=[('Allow', 'GET, HEAD')])
+            return keep_alive
+
+        url = urlsplit(target)
+        try:
+            status, body, etag = await self._resource(url.path, url.query)
+        except HTTPError as e:
+            body = json.dumps({'error': str(e)}).encode()
+            await self._send(writer, e.status, body, keep_alive, head_only=method == 'HEAD')
+            return keep_alive
+        if etag is not None and status == 200 and _none_match(headers.get('if-none-match', ''), etag):
+            self.cache.stats['not_modified'] += 1
+            await self._send(writer, 304, b'', keep_alive, etag=etag)
+        else:
+            await self._send(writer, status, body, keep_alive, etag=etag, head_only=method == 'HEAD')
+        return keep_alive
+
+    async def _resource(self, path, query):
+        """Return (status, body, etag) for a GET, from the cache when possible."""
+        key, name, kwargs = _route(path, query)
+        generation = self.generation
+        cached = self.cache.get(generation, key) if generation is not None else None
+        if cached is not None:
+            self.cache.stats['hits'] += 1
+            return cached[0], cached[1], _etag(generation, key)
+
+        self.cache.stats['misses'] += 1
+        generation = await self.refresh_generation()
+        try:
+            # The fetch_* loaders raise, so an error is never served as an empty page or a 404
+            result = await getattr(async_db, name)(**kwargs)
+        except ValueError:
+            raise HTTPError(400, 'Invalid page cursor')
+        except (sqlite3.Error, asyncio.TimeoutError) as e:
+            print(f"Error serving {path}: {e}")
+            raise HTTPError(500, 'Database error')
+        if result is None:
+            status, payload = 404, {'error': 'No such tip'}
+        else:
+            status, payload = 200, result
+        body = json.dumps(payload, default=_json_default).encode()
+
+        # Only vouch for the body if no tip changed while it was loading
+        if generation is None or await self.refresh_generation() != generation:
+            return status, body, None
+        self.cache.put(generation, key, (status, body))
+        return status, body, _etag(generation, key)
+
+    async def _send(self, writer, status, body, keep_alive, etag=None, head_only=False, extra=()):
+        headers = [
+            f'HTTP/1.1 {status} {REASONS[status]}',
+            f'Content-Length: {len(body)}',
+            'Connection: keep-alive' if keep_alive else 'Connection: close',
+        ]
+        if status != 304:
+            headers.append('Content-Type: application/json; charset=utf-8')
+        if etag is not None:
+            headers.append(f'ETag: {etag}')
+            headers.append('Cache-Control: no-cache')  # Cache, but revalidate with If-None-Match
+        else:
+            headers.append('Cache-Control: no-store')
+        headers.extend(f'{name}: {value}' for name, value in extra)
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1'))
+        if not head_only and status != 304:
+            writer.write(body)
+        await writer.drain()
+
+async def serve(host='127.0.0.1', port=8080, cache_entries=CACHE_ENTRIES, ready=None,
+                poll_interval=POLL_INTERVAL):
+    """Run the server until cancelled. ready, if given, is called with the bound (host, port)."""
+    tip_server = TipServer(cache_entries=cache_entries, poll_interval=poll_interval)
+    await tip_server.refresh_generation()
+    watcher = asyncio.create_task(tip_server.watch_generation())
+    server = await asyncio.start_server(tip_server.handle, host, port, limit=MAX_HEADER_BYTES)
+    address = server.sockets[0].getsockname()[:2]
+    if ready:
+        ready(address)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        watcher.cancel()
+        async_db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve safety tips as JSON over HTTP (read-only).")
+    parser.add_argument('--db', default=database.DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--host', default='127.0.0.1', help="use 0.0.0.0 to accept other machines")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=async_db.READ_WORKERS, help="database reader threads")
+    parser.add_argument('--cache-entries', type=int, default=CACHE_ENTRIES, help="rendered responses kept")
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                        help="seconds between tip change checks (default: %(default)s)")
+    args = parser.parse_args()
+
+    database.configure_pool(path=args.db, profile='read-heavy', max_size=args.workers + 2)
+    async_db.configure(read_workers=args.workers)
+    try:
+        asyncio.run(serve(args.host, args.port, args.cache_entries,
+                          ready=lambda address: print(f"Serving tips on http://{address[0]}:{address[1]}"),
+                          poll_interval=args.poll_interval))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        database.close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Reusable widgets for the Safety Tips UI."""
+import math
+from collections import OrderedDict
+import tkinter
+import tkinter.font
+
+import customtkinter as ctk
+
+
+class HeightIndex:
+    """Fenwick tree over row heights: O(log n) updates, offsets and hit tests."""
+
+    def __init__(self, heights=()):
+        self._heights = []
+        self._tree = [0]
+        for height in heights:
+            self.append(height)
+
+    def __len__(self):
+        return len(self._heights)
+
+    def append(self, height):
+        self._heights.append(height)
+        i = len(self._heights)
+        lowbit = i & -i
+        self._tree.append(height + self.prefix(i - 1) - self.prefix(i - lowbit))
+
+    def set(self, index, height):
+        delta = height - self._heights[index]
+        if not delta:
+            return
+        self._heights[index] = height
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def get(self, index):
+        return self._heights[index]
+
+    def prefix(self, index):
+        """Total height of rows before `index`, i.e. the y offset of row `index`."""
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    def total(self):
+        return self.prefix(len(self._heights))
+
+    def find(self, y):
+        """Index of the row covering offset y."""
+        index, remaining = 0, y
+        step = 1 << len(self._tree).bit_length()
+        while step:
+            nxt = index + step
+            if nxt < len(self._tree) and self._tree[nxt] <= remaining:
+                index = nxt
+                remaining -= self._tree[nxt]
+            step >>= 1
+        return min(index, max(len(self._heights) - 1, 0))
+
+
+class _TipRow:
+    """One recyclable row: a frame with a title and a wrapped content label."""
+
+    def __init__(self, canvas, colors, wraplength, on_wheel):
+        self.frame = ctk.CTkFrame(canvas, fg_color=colors["row"])
+        self.title = ctk.CTkLabel(self.frame, text="", font=("Helvetica", 16, "bold"),
+                                  text_color=colors["title"], anchor="w")
+        self.title.pack(anchor="w", padx=10, pady=(10, 0))
+        self.content = ctk.CTkLabel(self.frame, text="", text_color=colors["text"],
+                                    wraplength=wraplength, justify="left", anchor="w")
+        self.content.pack(anchor="w", padx=10, pady=(5, 10))
+        self.window = canvas.create_window(0, 0, window=self.frame, anchor="nw", state="hidden")
+        self.key = None
+        for widget in (self.frame, self.title, self.content):
+            widget.bind("<MouseWheel>", on_wheel)
+            widget.bind("<Button-4>", on_wheel)
+            widget.bind("<Button-5>", on_wheel)
+
+    def show(self, tip, key):
+        self.title.configure(text=tip['title'])
+        self.content.configure(text=tip['content'])
+        self.key = key
+
+
+class VirtualTipList(ctk.CTkFrame):
+    """Scrollable list of tips that only builds widgets for rows in view.
+
+    Rows outside the viewport (plus `overscan` rows either side) are
+    recycled for the rows scrolling in, so the widget count stays constant
+    however many tips are loaded. Row heights start as an estimate from the
+    text length and are corrected once a row has been laid out.
+    `on_end_reached` is called when the user scrolls near the last loaded
+    row while `has_more` is set, so callers can append the next page.
+    """
+
+    ROW_GAP = 10
+    PAD_X = 10
+
+    def __init__(self, parent, colors, empty_text="No matching safety tips found.",
+                 overscan=3, on_end_reached=None, **kwargs):
+        super().__init__(parent, fg_color=colors["background"], **kwargs)
+        self.colors = colors
+        self.empty_text = empty_text
+        self.overscan = overscan
+        self.on_end_reached = on_end_reached
+        self.has_more = False
+        self._loading_more = False
+
+        self._items = []
+        self._keys = []
+        self._heights = HeightIndex()
+        self._measured = {}   # key -> laid-out height for the current width
+        self._rows = {}       # item index -> visible _TipRow
+        self._free = []       # hidden rows ready for reuse
+        self._width = 0
+        self._render_pending = False
+        self._scrollregion = None
+        self._view = None
+
+        self.canvas = tkinter.Canvas(self, bg=colors["background"], highlightthickness=0, bd=0)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview,
+                                          button_color=colors["scrollbar"],
+                                          button_hover_color=colors["scrollbar_hover"])
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self._empty_label = self.canvas.create_text(
+            20, 20, text=empty_text, fill=colors["text"], anchor="nw", state="hidden"
+        )
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", self._on_wheel)
+        self.canvas.bind("<Button-5>", self._on_wheel)
+
+        font = tkinter.font.nametofont("TkDefaultFont")
+        self._line_height = font.metrics("linespace") + 2
+        self._char_width = max(font.measure("abcdefghijklmnopqrstuvwxyz") / 26, 1)
+
+    # --- data -------------------------------------------------------------
+
+    def set_items(self, items, has_more=False):
+        """Replace the list contents. Rows whose tip is unchanged keep their widgets."""
+        self._items = list(items)
+        self._keys = [self._key(item) for item in self._items]
+        self._heights = HeightIndex(self._height(item, key) for item, key in zip(self._items, self._keys))
+        # Move visible rows to their tip's new position so only changed rows are redrawn
+        positions = {key: index for index, key in enumerate(self._keys)}
+        rows, self._rows = self._rows, {}
+        for row in rows.values():
+            index = positions.get(row.key)
+            if index is not None:
+                self._rows[index] = row
+            else:
+                self.canvas.itemconfigure(row.window, state="hidden")
+                self._free.append(row)
+        self.has_more = has_more
+        self._loading_more = False
+        self.canvas.yview_moveto(0)
+        self.schedule_render()
+
+    def extend(self, items, has_more=False):
+        """Append another page of tips."""
+        for item in items:
+            key = self._key(item)
+            self._items.append(item)
+            self._keys.append(key)
+            self._heights.append(self._height(item, key))
+        self.has_more = has_more
+        self._loading_more = False
+        self.schedule_render()
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _key(item):
+        # Content is part of the key so an edited tip is redrawn and remeasured
+        return (item.get('tip_id'), item['title'], item['content'])
+
+    def _height(self, item, key):
+        measured = self._measured.get(key)
+        if measured is not None:
+            return measured
+        return self._estimate(item)
+
+    def _estimate(self, item):
+        wrap = max(self._wraplength(), 1)
+        lines = max(1, math.ceil(len(item['content']) * self._char_width / wrap))
+        return 30 + 20 + lines * self._line_height + self.ROW_GAP
+
+    def _wraplength(self):
+        return max(self._width - 2 * self.PAD_X - 40, 100)
+
+    # --- rendering --------------------------------------------------------
+
+    def schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        self._render_pending = False
+        count = len(self._items)
+        self.canvas.itemconfigure(self._empty_label, state="normal" if count == 0 else "hidden")
+
+        visible = {}
+        if count:
+            view_top = self.canvas.canvasy(0)
+            view_bottom = view_top + self.canvas.winfo_height()
+            first = max(0, self._heights.find(view_top) - self.overscan)
+            y = self._heights.prefix(first)
+            index, after_view = first, 0
+            while index < count and after_view <= self.overscan:
+                row = self._rows.pop(index, None) or self._take_row()
+                y += self._place(row, index, y)
+                visible[index] = row
+                if y > view_bottom:
+                    after_view += 1
+                index += 1
+
+        for row in self._rows.values():
+            self.canvas.itemconfigure(row.window, state="hidden")
+            self._free.append(row)
+        self._rows = visible
+
+        scrollregion = (0, 0, self._width, max(self._heights.total(), 1))
+        if scrollregion != self._scrollregion:
+            self._scrollregion = scrollregion
+            self.canvas.configure(scrollregion=scrollregion)
+        last = max(visible) if visible else -1
+        if self.has_more and not self._loading_more and last >= count - 1 - self.overscan:
+            if self.on_end_reached:
+                self._loading_more = True
+                self.on_end_reached()
+
+    def _take_row(self):
+        if self._free:
+            return self._free.pop()
+        return _TipRow(self.canvas, self.colors, self._wraplength(), self._on_wheel)
+
+    def _place(self, row, index, y):
+        """Show item `index` in row at offset y and return the row's height."""
+        key = self._keys[index]
+        if row.key != key:
+            row.show(self._items[index], key)
+        self.canvas.coords(row.window, self.PAD_X, y)
+        self.canvas.itemconfigure(row.window, state="normal", width=self._width - 2 * self.PAD_X)
+
+        height = self._measured.get(key)
+        if height is None:
+            row.frame.update_idletasks()
+            height = row.frame.winfo_reqheight() + self.ROW_GAP
+            self._measured[key] = height
+        if self._heights.get(index) != height:
+            self._heights.set(index, height)
+        return height
+
+    # --- events -----------------------------------------------------------
+
+    def _on_configure(self, event):
+        if event.width == self._width:
+            self.schedule_render()
+            return
+        # Wrapped heights change with the width: drop measurements and re-estimate
+        self._width = event.width
+        wraplength = self._wraplength()
+        for row in list(self._rows.values()) + self._free:
+            row.content.configure(wraplength=wraplength)
+        self._measured.clear()
+        self._heights = HeightIndex(self._estimate(item) for item in self._items)
+        self.schedule_render()
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if (first, last) != self._view:
+            self._view = (first, last)
+            self.schedule_render()
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            steps = -1
+        elif getattr(event, "num", None) == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(steps * 3, "units")
+        return "break"
+
+
+class PageManager:
+    """Switch between screens by hiding and re-packing them instead of rebuilding.
+
+    show(key, build, refresh) builds a page the first time by calling
+    build(), which creates and packs the page's top-level frame and returns
+    it. Later visits re-pack the cached frame and only call refresh(), so
+    the page reloads its data without recreating its widgets. Pages shown
+    with key=None are not cached and are destroyed when the user leaves
+    them. At most `max_pages` pages are kept; the least recently shown one
+    is destroyed to make room.
+    """
+
+    def __init__(self, max_pages=8, on_switch=None):
+        self.max_pages = max_pages
+        self.on_switch = on_switch
+        self._pages = OrderedDict()   # key -> (frame, pack options)
+        self._current = None          # (key, frame) of the page on screen
+
+    @property
+    def current(self):
+        """The frame on screen, or None."""
+        return self._current[1] if self._current else None
+
+    def show(self, key, build, refresh=None):
+        """Show the page cached under key, building it first if needed; return its frame."""
+        if self.on_switch:
+            self.on_switch()
+        if self._current and (key is None or self._current[0] != key):
+            self._hide_current()
+
+        cached = self._pages.get(key) if key is not None else None
+        if cached is not None and cached[0].winfo_exists():
+            frame, options = cached
+            self._pages.move_to_end(key)
+            if not frame.winfo_ismapped():
+                frame.pack(**options)
+        else:
+            frame = build()
+            if key is not None:
+                self._pages[key] = (frame, self._pack_options(frame))
+                while len(self._pages) > self.max_pages:
+                    _, (old_frame, _) = self._pages.popitem(last=False)
+                    old_frame.destroy()
+        self._current = (key, frame)
+        if refresh:
+            refresh()
+        return frame
+
+    def drop(self, key):
+        """Destroy the cached page under key so the next visit rebuilds it."""
+        cached = self._pages.pop(key, None)
+        if cached is not None:
+            if self._current and self._current[1] is cached[0]:
+                self._current = None
+            cached[0].destroy()
+
+    def clear(self):
+        """Destroy every page, e.g. when the user logs out."""
+        for frame, _ in self._pages.values():
+            frame.destroy()
+        self._pages.clear()
+        if self._current:
+            self._current[1].destroy()
+            self._current = None
+
+    def _hide_current(self):
+        key, frame = self._current
+        self._current = None
+        if key is None:
+            frame.destroy()
+        elif frame.winfo_exists():
+            frame.pack_forget()
+
+    @staticmethod
+    def _pack_options(frame):
+        options = frame.pack_info()
+        options.pop("in", None)
+        return options